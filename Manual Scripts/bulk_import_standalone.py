@@ -7,37 +7,175 @@ Usage:
     python bulk_import_standalone.py import.csv --url http://localhost:8000 --username admin --password pass --test
     python bulk_import_standalone.py import.csv --url http://localhost:8000 --username admin --password pass
     python bulk_import_standalone.py import.csv --url https://your-server.com --username admin --password pass --verbose
+    python bulk_import_standalone.py import.csv --url https://your-server.com --username admin --password pass --workers 8
 """
 
 import csv
 import os
 import sys
+import time
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from typing import List, Dict, Tuple
+from urllib.parse import urlsplit
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     from requests.auth import HTTPBasicAuth
+    from urllib3.exceptions import ConnectTimeoutError
 except ImportError:
     print("Error: 'requests' library not installed")
     print("Install with: pip install requests")
     sys.exit(1)
 
 
+# Responses worth retrying: server errors and overloaded proxies
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# Methods safe to resend after the server may already have acted on them
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+# Columns every CSV needs; tag columns come from the server's import mappings
+REQUIRED_COLUMNS = ['Name', 'Folder path', 'Publisher', 'Range']
+
+NORMALIZERS = {'none': None, 'lower': str.lower, 'upper': str.upper, 'title': str.title}
+
+
+def not_sent(error: Exception) -> bool:
+    """True if the request failed before any of it reached the server"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    # Refused or unresolvable connections arrive wrapped in urllib3's MaxRetryError
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectionError) and isinstance(reason, ConnectTimeoutError)
+
+
+def row_key(row: Dict) -> Tuple[str, str, str]:
+    """Name, publisher and range as the server's duplicate check compares them"""
+    return tuple(row.get(column, '').strip().lower() for column in ('Name', 'Publisher', 'Range'))
+
+
+def compile_mapping(mapping: Dict):
+    """Raw column value -> tag names, mirroring the server's import mapping rules"""
+    delimiter = mapping.get('delimiter') or ''
+    normalize = NORMALIZERS.get(mapping.get('normalization'))
+    collapse = mapping.get('collapse_whitespace', True)
+    
+    def transform(value: str) -> List[str]:
+        names = []
+        for part in (value.split(delimiter) if delimiter else [value]):
+            name = ' '.join(part.split()) if collapse else part.strip()
+            if normalize:
+                name = normalize(name)
+            if name and name not in names:
+                names.append(name)
+        return names
+    
+    return transform
+
+
+class ThroughputMeter:
+    """Thread-safe counters with a periodic rows/s and MB/s readout"""
+    
+    def __init__(self, total_rows: int, interval: float = 2.0):
+        self.total_rows = total_rows
+        self.interval = interval
+        self.rows = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._report, daemon=True)
+    
+    def add(self, rows: int = 0, nbytes: int = 0):
+        with self._lock:
+            self.rows += rows
+            self.bytes += nbytes
+    
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return (f"{self.rows}/{self.total_rows} rows, {self.rows / elapsed:.1f} rows/s, "
+                f"{self.bytes / elapsed / (1024 * 1024):.2f} MB/s")
+    
+    def _report(self):
+        while not self._stop.wait(self.interval):
+            print(f"  [{self.summary()}]", flush=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
 class STLCollectionImporter:
     """HTTP API client for STL Collection bulk import"""
     
-    def __init__(self, base_url: str, username: str, password: str):
+    def __init__(self, base_url: str, username: str, password: str,
+                 workers: int = 1, max_per_host: int = None, retries: int = 3, backoff: float = 1.0):
         self.base_url = base_url.rstrip('/')
         self.auth = HTTPBasicAuth(username, password)
-        self.session = requests.Session()
-        self.session.auth = self.auth
+        self.workers = max(workers, 1)
+        self.retries = retries
+        self.backoff = backoff
+        self.meter = None
+        self.mappings = []
+        # Each thread keeps its own keep-alive session; a per-host semaphore
+        # caps how many requests hit the same server at once
+        self._local = threading.local()
+        self._host_limit = max_per_host or self.workers
+        self._host_semaphores = {}
+        self._semaphores_lock = threading.Lock()
+    
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.auth = self.auth
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self._host_limit)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+    
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._semaphores_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self._host_limit)
+            return self._host_semaphores[host]
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request with exponential backoff. Idempotent requests are retried
+        on 5xx responses, timeouts and connection errors; others (POSTs) only
+        when the connection failed before the request was sent, since the
+        server may have acted on them.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in range(self.retries + 1):
+            # Rewind uploads so a retry sends the whole file again
+            for file_tuple in (kwargs.get('files') or {}).values():
+                file_tuple[1].seek(0)
+            try:
+                with self._host_semaphore(url):
+                    response = self.session.request(method, url, **kwargs)
+                if not idempotent or response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                if attempt == self.retries or not (idempotent or not_sent(error)):
+                    raise
+            time.sleep(self.backoff * (2 ** attempt))
         
     def health_check(self) -> bool:
         """Test API connection and authentication"""
         try:
-            response = self.session.get(f'{self.base_url}/upload/api/health/', timeout=10)
+            response = self.request('GET', f'{self.base_url}/upload/api/health/', timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 print(f"✓ Connected to {self.base_url}")
@@ -61,7 +199,8 @@ class STLCollectionImporter:
     def get_existing_tags(self) -> Dict[str, List[str]]:
         """Fetch all existing tags from server grouped by tag type"""
         try:
-            response = self.session.get(
+            response = self.request(
+                'GET',
                 f'{self.base_url}/upload/api/get-tags/',
                 timeout=10
             )
@@ -75,6 +214,35 @@ class STLCollectionImporter:
             print(f"    Warning: Could not fetch tags - {e}")
             return {}
     
+    def load_import_mappings(self) -> bool:
+        """Fetch the server's column -> tag type mappings"""
+        try:
+            response = self.request(
+                'GET',
+                f'{self.base_url}/upload/api/import-mappings/',
+                timeout=10
+            )
+            if response.status_code == 200:
+                self.mappings = [
+                    (mapping['column'], mapping['tag_type'], compile_mapping(mapping))
+                    for mapping in response.json().get('mappings', [])
+                ]
+                return True
+            print(f"✗ Could not fetch import mappings - HTTP {response.status_code}")
+        except Exception as e:
+            print(f"✗ Could not fetch import mappings - {e}")
+        return False
+    
+    def row_tags(self, row: Dict) -> Dict[str, List[str]]:
+        """Tag names per tag type for a CSV row, as the server will create them"""
+        tags = {}
+        for column, tag_type, transform in self.mappings:
+            names = transform(row.get(column) or '')
+            if names:
+                existing = tags.setdefault(tag_type, [])
+                existing.extend(name for name in names if name not in existing)
+        return tags
+    
     def check_duplicate(self, name: str, publisher: str, range_name: str) -> Tuple[bool, int]:
         """Check if entry exists on server"""
         params = {
@@ -84,7 +252,8 @@ class STLCollectionImporter:
         }
         
         try:
-            response = self.session.get(
+            response = self.request(
+                'GET',
                 f'{self.base_url}/upload/api/check-duplicate/',
                 params=params,
                 timeout=10
@@ -105,40 +274,34 @@ class STLCollectionImporter:
         range_name = row.get('Range', '').strip()
         folder_path = row.get('Folder path', '').strip()
         
-        # Parse tags from CSV
-        tags = {}
-        
-        # Publisher tag
-        if publisher:
-            tags['Publisher'] = [publisher]
-        
-        # Faction Tag
-        if row.get('Faction Tag', '').strip():
-            tags['Faction Tag'] = [row['Faction Tag'].strip()]
-        
-        # Army Role
-        if row.get('Army Role', '').strip():
-            tags['Army Role'] = [row['Army Role'].strip()]
-        
-        # GW Alternative (semicolon-separated)
-        gw_alt = row.get('GW Alternative', '').strip()
-        if gw_alt:
-            tags['GW Alternative'] = [x.strip() for x in gw_alt.split(';') if x.strip()]
-        
         payload = {
             'name': name,
             'publisher': publisher,
             'range': range_name,
             'folder_location': folder_path,
-            'tags': tags
+            # Raw column values; the server maps them to tags
+            'row': {column: value for column, value in row.items() if column and not column.startswith('_')}
         }
         
         try:
-            response = self.session.post(
-                f'{self.base_url}/upload/api/create-entry/',
-                json=payload,
-                timeout=30
-            )
+            for attempt in range(self.retries + 1):
+                try:
+                    response = self.request(
+                        'POST',
+                        f'{self.base_url}/upload/api/create-entry/',
+                        json=payload,
+                        timeout=30
+                    )
+                    if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        break
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if attempt == self.retries:
+                        raise
+                # The server may have created the entry before failing: look before resending
+                time.sleep(self.backoff * (2 ** attempt))
+                exists, entry_id = self.check_duplicate(name, publisher, range_name)
+                if exists:
+                    return True, entry_id, name
             
             if response.status_code == 201:
                 data = response.json()
@@ -163,7 +326,8 @@ class STLCollectionImporter:
                     'is_primary': 'true' if is_primary else 'false'
                 }
                 
-                response = self.session.post(
+                response = self.request(
+                    'POST',
                     f'{self.base_url}/upload/api/upload-image/',
                     files=files,
                     data=data,
@@ -171,6 +335,8 @@ class STLCollectionImporter:
                 )
                 
                 if response.status_code == 201:
+                    if self.meter:
+                        self.meter.add(nbytes=image_path.stat().st_size)
                     result = response.json()
                     return True, result.get('filename')
                 else:
@@ -211,6 +377,120 @@ class STLCollectionImporter:
         
         return errors
     
+    def list_images(self, folder_path: str) -> List[Path]:
+        """Image files of a folder, sorted alphabetically"""
+        folder = Path(folder_path)
+        image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.gif',
+                          '*.JPG', '*.JPEG', '*.PNG', '*.GIF']
+        image_files = set()  # Use set to avoid duplicates on case-insensitive filesystems
+        for ext in image_extensions:
+            image_files.update(folder.glob(ext))
+        return sorted(image_files)
+    
+    def create_row_entry(self, row: Dict) -> Tuple[str, int, str]:
+        """Duplicate check and entry creation for one row: ('created'|'duplicate'|'error', entry_id, message)"""
+        name = row.get('Name', '').strip()
+        is_dup, dup_id = self.check_duplicate(name, row.get('Publisher', '').strip(), row.get('Range', '').strip())
+        if is_dup:
+            return 'duplicate', dup_id, f"⊘ Skipped duplicate: {name}"
+        success, entry_id, message = self.create_entry(row)
+        if not success:
+            return 'error', None, f"✗ Failed to create entry: {message}"
+        return 'created', entry_id, name
+    
+    def import_rows_concurrently(self, rows: List[Dict], verbose: bool = False) -> Tuple[int, int, int]:
+        """
+        Import rows over a bounded thread pool. Entry creation and image
+        uploads are pipelined: a row's images are queued as soon as its entry
+        exists, while later rows are being created. Returns (created, skipped, errors).
+        """
+        created = skipped = errors = 0
+        max_rows_in_flight = self.workers * 2
+        self.meter = ThroughputMeter(len(rows))
+        self.meter.start()
+        
+        pending_rows = iter(rows)
+        # Rows with the same name, publisher and range would all pass the
+        # server's duplicate check while in flight together
+        first_rows = {}
+        row_futures = {}
+        upload_futures = {}
+        row_uploads = {}  # row number -> [name, images total, uploaded, failed, outstanding]
+        
+        def finish_row(row_num):
+            name, total, uploaded, failed, _ = row_uploads.pop(row_num)
+            self.meter.add(rows=1)
+            if failed:
+                print(f"Row {row_num}: ✓ Created {name} with {uploaded}/{total} images ({failed} failed)")
+            else:
+                print(f"Row {row_num}: ✓ Created {name} with {uploaded} images")
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                # Keep a bounded number of rows in flight so uploads are not
+                # starved behind thousands of queued entry creations
+                while len(row_futures) < max_rows_in_flight:
+                    row = next(pending_rows, None)
+                    if row is None:
+                        break
+                    errors_found = self.validate_row(row, row['_row_number'])
+                    if errors_found:
+                        print(f"✗ Row {row['_row_number']}: Validation failed")
+                        for error in errors_found:
+                            print(f"    {error}")
+                        errors += 1
+                        self.meter.add(rows=1)
+                        continue
+                    first_row = first_rows.setdefault(row_key(row), row['_row_number'])
+                    if first_row != row['_row_number']:
+                        print(f"Row {row['_row_number']}: ⊘ Skipped duplicate of row {first_row}: {row['Name'].strip()}")
+                        skipped += 1
+                        self.meter.add(rows=1)
+                        continue
+                    row_futures[pool.submit(self.create_row_entry, row)] = row
+                
+                if not row_futures and not upload_futures:
+                    break
+                
+                done, _ = wait(list(row_futures) + list(upload_futures), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in row_futures:
+                        row = row_futures.pop(future)
+                        row_num = row['_row_number']
+                        status, entry_id, message = future.result()
+                        if status != 'created':
+                            print(f"Row {row_num}: {message}")
+                            if status == 'duplicate':
+                                skipped += 1
+                            else:
+                                errors += 1
+                            self.meter.add(rows=1)
+                            continue
+                        created += 1
+                        image_files = self.list_images(row['Folder path'].strip())
+                        row_uploads[row_num] = [message, len(image_files), 0, 0, len(image_files)]
+                        if verbose:
+                            print(f"    Created entry: {message} (ID: {entry_id})")
+                        for idx, image_path in enumerate(image_files):
+                            upload = pool.submit(self.upload_image, entry_id, image_path, idx == 0)
+                            upload_futures[upload] = (row_num, image_path)
+                        if not image_files:
+                            finish_row(row_num)
+                    else:
+                        row_num, image_path = upload_futures.pop(future)
+                        success, result = future.result()
+                        state = row_uploads[row_num]
+                        state[2 if success else 3] += 1
+                        state[4] -= 1
+                        if verbose and not success:
+                            print(f"      Failed: {image_path.name} - {result}")
+                        if state[4] == 0:
+                            finish_row(row_num)
+        
+        self.meter.stop()
+        print(f"  [{self.meter.summary()}]")
+        return created, skipped, errors
+    
     def import_row(self, row: Dict, row_num: int, verbose: bool = False) -> Tuple[bool, str]:
         """Import single CSV row with all its images"""
         name = row.get('Name', '').strip()
@@ -232,15 +512,7 @@ class STLCollectionImporter:
             print(f"    Created entry: {name} (ID: {entry_id})")
         
         # Upload images from folder
-        folder = Path(folder_path)
-        image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.gif',
-                          '*.JPG', '*.JPEG', '*.PNG', '*.GIF']
-        image_files = set()  # Use set to avoid duplicates on case-insensitive filesystems
-        for ext in image_extensions:
-            image_files.update(folder.glob(ext))
-        
-        # Sort alphabetically
-        image_files = sorted(list(image_files))
+        image_files = self.list_images(folder_path)
         
         uploaded_count = 0
         failed_count = 0
@@ -279,6 +551,9 @@ Examples:
   
   # Import to remote server with verbose output
   python bulk_import_standalone.py import.csv --url https://server.com --username admin --password pass --verbose
+  
+  # Import over a slow link with 8 concurrent requests
+  python bulk_import_standalone.py import.csv --url https://server.com --username admin --password pass --workers 8
         """
     )
     
@@ -288,6 +563,12 @@ Examples:
     parser.add_argument('--password', required=True, help='Password')
     parser.add_argument('--test', action='store_true', help='Test mode (validation only, no API writes)')
     parser.add_argument('--verbose', action='store_true', help='Verbose output showing detailed progress')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Concurrent requests; above 1, entry creation and image uploads are pipelined (default 1)')
+    parser.add_argument('--max-per-host', type=int, default=None,
+                        help='Maximum concurrent requests to the server (default: same as --workers)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Retries with exponential backoff for 5xx responses and timeouts (default 3)')
     
     args = parser.parse_args()
     
@@ -298,7 +579,10 @@ Examples:
     print()
     
     # Initialize importer
-    importer = STLCollectionImporter(args.url, args.username, args.password)
+    importer = STLCollectionImporter(
+        args.url, args.username, args.password,
+        workers=args.workers, max_per_host=args.max_per_host, retries=args.retries
+    )
     
     # Test connection
     print("Testing connection...")
@@ -309,6 +593,9 @@ Examples:
         print("  - User has staff permissions")
         sys.exit(1)
     
+    if not importer.load_import_mappings():
+        sys.exit(1)
+    print(f"✓ Loaded {len(importer.mappings)} import column mapping(s)")
     print()
     
     # Read CSV file
@@ -323,19 +610,19 @@ Examples:
         with open(args.csv_file, 'r', encoding='utf-8-sig') as f:
             reader = csv.DictReader(f)
             
-            # Verify required columns
-            required_columns = ['Name', 'Folder path', 'Publisher', 'Range', 
-                              'Faction Tag', 'Army Role', 'GW Alternative']
-            
             if not reader.fieldnames:
                 print("✗ CSV file is empty or has no header row")
                 sys.exit(1)
             
-            missing_columns = set(required_columns) - set(reader.fieldnames)
+            missing_columns = set(REQUIRED_COLUMNS) - set(reader.fieldnames)
             if missing_columns:
                 print(f"✗ CSV is missing required columns: {', '.join(missing_columns)}")
                 sys.exit(1)
             
+            unmapped = [column for column, _, _ in importer.mappings if column not in reader.fieldnames]
+            if unmapped:
+                print(f"⚠ CSV has no column for import mapping(s): {', '.join(unmapped)}")
+            
             for idx, row in enumerate(reader, start=2):
                 row['_row_number'] = idx
                 rows.append(row)
@@ -362,28 +649,14 @@ Examples:
         print(f"✓ Found {sum(len(tags) for tags in existing_tags.values())} existing tags across {len(existing_tags)} tag types\n")
         
         # Collect all tags from CSV
-        csv_tags = {
-            'Publisher': set(),
-            'Faction Tag': set(),
-            'Army Role': set(),
-            'GW Alternative': set()
-        }
+        csv_tags = {}
         
         for row in rows:
             row_num = row['_row_number']
             
             # Collect tags from this row
-            if row.get('Publisher', '').strip():
-                csv_tags['Publisher'].add(row['Publisher'].strip())
-            if row.get('Faction Tag', '').strip():
-                csv_tags['Faction Tag'].add(row['Faction Tag'].strip())
-            if row.get('Army Role', '').strip():
-                csv_tags['Army Role'].add(row['Army Role'].strip())
-            gw_alt = row.get('GW Alternative', '').strip()
-            if gw_alt:
-                for tag in gw_alt.split(';'):
-                    if tag.strip():
-                        csv_tags['GW Alternative'].add(tag.strip())
+            for tag_type, names in importer.row_tags(row).items():
+                csv_tags.setdefault(tag_type, set()).update(names)
             
             # Local validation
             errors = importer.validate_row(row, row_num)
@@ -470,7 +743,13 @@ Examples:
         skip_count = 0
         error_count = 0
         
-        for idx, row in enumerate(rows, start=1):
+        if args.workers > 1:
+            success_count, skip_count, error_count = importer.import_rows_concurrently(rows, args.verbose)
+            rows_to_import = []
+        else:
+            rows_to_import = rows
+        
+        for idx, row in enumerate(rows_to_import, start=1):
             row_num = row['_row_number']
             name = row.get('Name', '').strip()
             
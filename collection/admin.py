@@ -1,3 +1,14 @@
 from django.contrib import admin
+from unfold.admin import ModelAdmin
 
-# Register your models here.
+from .models import CollectionStats
+
+
+@admin.register(CollectionStats)
+class CollectionStatsAdmin(ModelAdmin):
+    list_display = ['entry_count', 'tag_count', 'publisher_count', 'range_count']
+    readonly_fields = ['entry_count', 'tag_count', 'publisher_count', 'range_count']
+
+    def has_add_permission(self, request):
+        # The row is maintained from entries and tags; see rebuild_collection_stats
+        return False
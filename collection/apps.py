@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CollectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'collection'
+
+    def ready(self):
+        # Cached pages are invalidated by entry, file and tag changes
+        from stl_collection.page_cache import connect_page_cache_signals
+        connect_page_cache_signals()
+        # Landing page counters follow entry and tag changes
+        from .stats import connect_stats_signals
+        connect_stats_signals()
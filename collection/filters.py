@@ -0,0 +1,176 @@
+"""
+Gallery filtering and cursor pagination, shared by the gallery page and the
+JSON entries API.
+
+Entries are listed newest first (upload date, then id). A cursor is the
+(upload date, id) of the last entry of a page, so fetching the next page is an
+indexed range query however far the user has scrolled, and entries added
+meanwhile do not shift the pages.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from image_upload.models import ArchiveMember, Entry, Image
+from tags.models import TagType
+
+PAGE_SIZE = 12
+MAX_PAGE_SIZE = 100
+ORDERING = ['-upload_date', '-id']
+
+
+def gallery_tag_types():
+    return TagType.objects.filter(is_active=True, show_in_gallery=True).order_by('sort_order', 'name')
+
+
+def filter_entries(params, tag_types):
+    """
+    Apply the gallery filters in `params` (a QueryDict) to all entries.
+
+    Returns (entries, filters): the filtered queryset and the values the
+    gallery form shows. Only tag types in `tag_types` can be filtered on.
+    """
+    entries = Entry.objects.all()
+
+    # Search functionality
+    search_query = params.get('search', '')
+    if search_query:
+        # Archive contents are matched through the member index, not by opening archives
+        archive_matches = ArchiveMember.objects.filter(
+            path__icontains=search_query
+        ).values('stl_file__entry_id')
+        entries = entries.filter(
+            Q(name__icontains=search_query) |
+            Q(publisher__icontains=search_query) |
+            Q(range__icontains=search_query) |
+            Q(tags__name__icontains=search_query) |
+            Q(id__in=archive_matches)
+        ).distinct()
+
+    # Filter by publisher
+    publisher_filter = params.get('publisher', '')
+    if publisher_filter:
+        entries = entries.filter(publisher__icontains=publisher_filter)
+
+    # Filter by range
+    range_filter = params.get('range', '')
+    if range_filter:
+        entries = entries.filter(range__icontains=range_filter)
+
+    # Filter by model size (largest bounding-box dimension of the entry's STL meshes)
+    min_size = params.get('min_size', '')
+    max_size = params.get('max_size', '')
+    try:
+        if min_size:
+            entries = entries.filter(max_dimension_mm__gte=float(min_size))
+        if max_size:
+            entries = entries.filter(max_dimension_mm__lte=float(max_size))
+    except ValueError:
+        pass
+
+    # Filter by individual tag type selections (AND logic - entry must have ALL selected tags)
+    tag_filter = []
+    selected_tags = {}  # Track which tag is selected for each tag type
+    for tag_type in tag_types:
+        tag_param = params.get(f'tag_type_{tag_type.id}', '')
+        if tag_param:
+            try:
+                tag_id = int(tag_param)
+            except (ValueError, TypeError):
+                continue
+            tag_filter.append(str(tag_id))
+            selected_tags[tag_type.id] = tag_id
+            entries = entries.filter(tags__id=tag_id)
+
+    if tag_filter:
+        entries = entries.distinct()
+
+    return entries, {
+        'search_query': search_query,
+        'publisher_filter': publisher_filter,
+        'range_filter': range_filter,
+        'min_size': min_size,
+        'max_size': max_size,
+        'tag_filter': tag_filter,
+        'selected_tags': selected_tags,
+    }
+
+
+def encode_cursor(entry):
+    value = f'{entry.upload_date.isoformat()}|{entry.id}'
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(upload_date, id) of a cursor; raises ValueError if it is malformed."""
+    value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    upload_date, entry_id = value.split('|')
+    return datetime.fromisoformat(upload_date), int(entry_id)
+
+
+def entry_page(entries, cursor=None, limit=PAGE_SIZE):
+    """
+    One page of `entries` after `cursor` (None for the first page).
+
+    Returns (entries, next_cursor); next_cursor is None on the last page.
+    """
+    entries = entries.order_by(*ORDERING)
+    if cursor:
+        upload_date, entry_id = decode_cursor(cursor)
+        entries = entries.filter(Q(upload_date__lt=upload_date) | Q(upload_date=upload_date, id__lt=entry_id))
+    page = list(entries[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(page[-1])
+
+
+def display_images(entry_ids):
+    """
+    The display image (see Entry.get_display_image) and image count of each
+    entry, as {entry_id: (image or None, count)}, in one query.
+    """
+    per_entry = {'partition_by': [F('entry_id')]}
+    images = (
+        Image.objects.filter(entry_id__in=entry_ids)
+        .only('id', 'entry_id', 'image', 'thumbnail')
+        .annotate(
+            position=Window(RowNumber(), order_by=[F('is_primary').desc(), F('upload_date').asc()], **per_entry),
+            image_count=Window(Count('id'), **per_entry),
+        )
+        .filter(position=1)
+    )
+    found = {image.entry_id: (image, image.image_count) for image in images}
+    return {entry_id: found.get(entry_id, (None, 0)) for entry_id in entry_ids}
+
+
+def serialize_entries(entries):
+    """Compact JSON-ready dicts for a page of entries (two queries)."""
+    entry_ids = [entry.id for entry in entries]
+    images = display_images(entry_ids)
+    tag_ids = {entry_id: [] for entry_id in entry_ids}
+    links = (
+        Entry.tags.through.objects.filter(entry_id__in=entry_ids)
+        # Same order as Tag.Meta.ordering, so badges match the server-rendered cards
+        .order_by('tag__tag_type__sort_order', 'tag__tag_type__name', 'tag__name')
+        .values_list('entry_id', 'tag_id')
+    )
+    for entry_id, tag_id in links:
+        tag_ids[entry_id].append(tag_id)
+
+    serialized = []
+    for entry in entries:
+        image, image_count = images[entry.id]
+        serialized.append({
+            'id': entry.id,
+            'name': entry.name,
+            'publisher': entry.publisher,
+            'range': entry.range,
+            'thumbnail': image.display_url if image else None,
+            'tags': tag_ids[entry.id],
+            'image_count': image_count,
+            'upload_date': entry.upload_date.isoformat(),
+        })
+    return serialized
@@ -0,0 +1,197 @@
+"""
+Django management command to generate a synthetic collection for
+performance testing (see run_benchmarks).
+
+Creates tag types (all referencing the first one), tags with reference
+links, entries spread over publishers and ranges, tag assignments with a
+skewed (Zipf-like) tag popularity, and tiny generated JPEG images. The same
+options and --seed always produce the same names, tags and assignments.
+Rows are written with bulk_create in batched transactions; the denormalized
+counters, range summaries and caches are rebuilt once at the end.
+
+Generated rows are marked (entries by a "benchmark/" folder location, tag
+types by a "Benchmark " name prefix) so --clear can remove them again.
+Related entries shown on detail pages are not computed; run
+rebuild_related_entries afterwards if they matter.
+
+Usage:
+    python manage.py generate_benchmark_data --entries 1000
+    python manage.py generate_benchmark_data --entries 100000 --images-per-entry 0
+    python manage.py generate_benchmark_data --clear
+"""
+
+import io
+import random
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image as PILImage
+
+from collection.stats import rebuild_stats
+from image_upload.models import Entry, Image, range_slug_for
+from ranges.summary import rebuild_summaries
+from stl_collection.page_cache import COLLECTION_VERSION, TAGS_VERSION, bump_versions
+from tags.cache import bump_version
+from tags.models import Tag, TagType
+from tags.usage import recount_usage
+
+FOLDER_PREFIX = 'benchmark/'
+TAG_TYPE_PREFIX = 'Benchmark '
+
+ADJECTIVES = [
+    'Ancient', 'Arcane', 'Blighted', 'Crimson', 'Dread', 'Elder', 'Frost', 'Gilded',
+    'Hollow', 'Iron', 'Jade', 'Lunar', 'Molten', 'Obsidian', 'Radiant', 'Shadow',
+    'Storm', 'Sunken', 'Verdant', 'Wild',
+]
+NOUNS = [
+    'Archer', 'Beast', 'Champion', 'Dragon', 'Golem', 'Hydra', 'Knight', 'Lich',
+    'Mage', 'Ogre', 'Paladin', 'Ranger', 'Sentinel', 'Serpent', 'Titan', 'Troll',
+    'Warden', 'Wolf', 'Wraith', 'Wyvern',
+]
+COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f']
+
+
+def tiny_jpeg(color):
+    """An 8x8 JPEG of a single colour."""
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (8, 8), color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic collection for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=1000, help='Entries to create (default 1000)')
+        parser.add_argument('--tag-types', type=int, default=6, help='Tag types to create (default 6)')
+        parser.add_argument('--tags', type=int, default=500, help='Tags to create (default 500)')
+        parser.add_argument('--tags-per-entry', type=int, default=4, help='Tags assigned to each entry (default 4)')
+        parser.add_argument('--images-per-entry', type=int, default=1, help='Images per entry (default 1)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (default 1)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Entries written per transaction (default 1000)')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously generated data first (only that, with --entries 0)',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.clear()
+        if options['entries'] <= 0:
+            return
+        if TagType.objects.filter(name__startswith=TAG_TYPE_PREFIX).exists():
+            raise CommandError('Generated data already exists; use --clear to replace it')
+
+        rng = random.Random(options['seed'])
+        tags = self.create_tags(rng, max(options['tag_types'], 1), max(options['tags'], 1))
+        # Tag popularity follows 1/rank, like real vocabularies
+        weights = [1 / rank for rank in range(1, len(tags) + 1)]
+        images = [tiny_jpeg(color) for color in COLORS]
+        # (publisher, its ranges)
+        publishers = [
+            (f'Benchmark Publisher {number}', [f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}s {number}' for _ in range(5)])
+            for number in range(max(options['entries'] // 200, 5))
+        ]
+
+        batch_size = max(options['batch_size'], 1)
+        created = 0
+        while created < options['entries']:
+            count = min(batch_size, options['entries'] - created)
+            with transaction.atomic():
+                self.create_entries(
+                    rng, created, count, publishers, tags, weights, images,
+                    options['tags_per_entry'], options['images_per_entry'],
+                )
+            created += count
+            self.stdout.write(f'Created {created}/{options["entries"]} entries')
+
+        # bulk_create sends no signals: bring the derived data up to date once
+        recount_usage([tag.id for tag in tags])
+        rebuild_stats()
+        rebuild_summaries()
+        bump_versions(COLLECTION_VERSION, TAGS_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {created} entries, {len(tags)} tags and '
+            f'{created * options["images_per_entry"]} images (seed {options["seed"]}).'
+        ))
+
+    def clear(self):
+        entries = Entry.objects.filter(folder_location__startswith=FOLDER_PREFIX)
+        entry_count = entries.count()
+        entries.delete()
+        # Deleting the tag types cascades to their tags
+        TagType.objects.filter(name__startswith=TAG_TYPE_PREFIX).delete()
+        self.stdout.write(f'Deleted {entry_count} generated entries and their tags')
+
+    def create_tags(self, rng, type_count, tag_count):
+        tag_types = TagType.objects.bulk_create([
+            TagType(
+                name=f'{TAG_TYPE_PREFIX}Type {number}',
+                color=COLORS[number % len(COLORS)],
+                sort_order=100 + number,
+                show_in_gallery=True,
+                set_at_upload=number < 2,
+            )
+            for number in range(type_count)
+        ])
+        # Every other type references the first, like factions and their sub-factions
+        for tag_type in tag_types[1:]:
+            tag_type.reference_tagtypes.add(tag_types[0])
+
+        names = [f'{adjective} {noun}' for adjective in ADJECTIVES for noun in NOUNS]
+        rng.shuffle(names)
+        Tag.objects.bulk_create([
+            Tag(
+                name=f'{names[number % len(names)]} {number}',
+                tag_type=tag_types[number % type_count],
+            )
+            for number in range(tag_count)
+        ])
+        tags = list(Tag.objects.filter(tag_type__in=tag_types).order_by('id'))
+
+        referenced = [tag for tag in tags if tag.tag_type_id == tag_types[0].id]
+        links = [
+            Tag.reference_tags.through(from_tag_id=tag.id, to_tag_id=rng.choice(referenced).id)
+            for tag in tags
+            if tag.tag_type_id != tag_types[0].id and rng.random() < 0.5
+        ]
+        Tag.reference_tags.through.objects.bulk_create(links)
+        bump_version()
+        # Popularity order is random rather than creation order
+        rng.shuffle(tags)
+        return tags
+
+    def create_entries(self, rng, start, count, publishers, tags, weights, images, tags_per_entry, images_per_entry):
+        entries = []
+        for number in range(start, start + count):
+            publisher, ranges = rng.choice(publishers)
+            range_name = rng.choice(ranges)
+            entries.append(Entry(
+                name=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {number}',
+                publisher=publisher,
+                range=range_name,
+                range_slug=range_slug_for(range_name),
+                folder_location=f'{FOLDER_PREFIX}{number}',
+            ))
+        entries = Entry.objects.bulk_create(entries)
+
+        entry_tags = []
+        new_images = []
+        for entry in entries:
+            picked = {tag.id for tag in rng.choices(tags, weights=weights, k=tags_per_entry)}
+            entry_tags += [Entry.tags.through(entry_id=entry.id, tag_id=tag_id) for tag_id in picked]
+            for index in range(images_per_entry):
+                image = Image(
+                    entry=entry,
+                    name=entry.name,
+                    publisher=entry.publisher,
+                    range=entry.range,
+                    is_primary=index == 0,
+                )
+                data = images[rng.randrange(len(images))]
+                image.image.save(f'benchmark_{entry.id}_{index}.jpg', ContentFile(data), save=False)
+                new_images.append(image)
+        Entry.tags.through.objects.bulk_create(entry_tags)
+        Image.objects.bulk_create(new_images)
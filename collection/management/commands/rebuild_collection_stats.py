@@ -0,0 +1,25 @@
+"""
+Django management command to recount the landing page statistics
+(CollectionStats) from entries and tags.
+
+The counters are kept up to date by signals; run this after bulk changes
+that bypass them (queryset updates, raw SQL, restores) or to verify them.
+
+Usage:
+    python manage.py rebuild_collection_stats
+"""
+
+from django.core.management.base import BaseCommand
+
+from collection.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the collection statistics shown on the landing pages'
+
+    def handle(self, *args, **options):
+        stats = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'{stats.entry_count} entries, {stats.tag_count} tags, '
+            f'{stats.publisher_count} publishers, {stats.range_count} ranges.'
+        ))
@@ -0,0 +1,219 @@
+"""
+Django management command to time the main pages and APIs under the Django
+test client and write the results as JSON.
+
+Each case is requested a few times to warm up, then --repeat times; the
+timings (min, median, mean, p95, max in milliseconds), SQL query count and
+response size are recorded together with the dataset size, the git commit
+and the versions in use. Keys are sorted, so two result files diff cleanly;
+--compare prints the median change against an earlier file.
+
+Pages are rendered on every request: the page cache is disabled unless
+--page-cache is given. Requests are made as a temporary superuser without a
+usable password, deleted again when the run ends (the public landing page
+anonymously). Run it against generated data (see generate_benchmark_data),
+not production.
+
+Usage:
+    python manage.py run_benchmarks --output results.json
+    python manage.py run_benchmarks --repeat 50 --only gallery --only api
+    python manage.py run_benchmarks --output new.json --compare old.json
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+import uuid
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from collection.filters import gallery_tag_types
+from image_upload.models import Entry, Image
+from ranges.models import RangeSummary
+from tags.models import Tag, TagType
+
+
+# Cases requested without logging in (the landing page redirects users)
+PUBLIC_CASES = {'public_landing'}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Time the main views and APIs and write the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per case (default 20)')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per case first (default 2)')
+        parser.add_argument('--output', default='-', help='Result file (default: standard output)')
+        parser.add_argument('--compare', help='Earlier result file to compare medians with')
+        parser.add_argument('--page-cache', action='store_true', help='Keep the rendered page cache enabled')
+        parser.add_argument(
+            '--only',
+            action='append',
+            default=[],
+            help='Only run cases whose name contains this text (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        cases = [
+            case for case in self.cases()
+            if not options['only'] or any(text in case[0] for text in options['only'])
+        ]
+        if not cases:
+            raise CommandError('No benchmark case matches --only')
+
+        user = get_user_model().objects.create_superuser(f'benchmark-{uuid.uuid4().hex[:12]}', password=None)
+        client = Client()
+        try:
+            client.force_login(user)
+            results = self.run_cases(client, cases, options)
+        finally:
+            client.logout()
+            user.delete()
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'git_commit': git_commit(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'page_cache': options['page_cache'],
+                'repeat': options['repeat'],
+                'warmup': options['warmup'],
+            },
+            'dataset': {
+                'entries': Entry.objects.count(),
+                'images': Image.objects.count(),
+                'tags': Tag.objects.count(),
+                'tag_types': TagType.objects.count(),
+                'entry_tags': Entry.tags.through.objects.count(),
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            Path(options['output']).write_text(output + '\n', encoding='utf-8')
+            self.stderr.write(self.style.SUCCESS(f'Wrote {len(results)} result(s) to {options["output"]}'))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def run_cases(self, client, cases, options):
+        anonymous = Client()
+        page_cache_timeout = settings.PAGE_CACHE_TIMEOUT if options['page_cache'] else 0
+        results = {}
+        with override_settings(PAGE_CACHE_TIMEOUT=page_cache_timeout):
+            for name, url, params in cases:
+                case_client = anonymous if name in PUBLIC_CASES else client
+                results[name] = self.measure(
+                    case_client, url, params, max(options['repeat'], 1), max(options['warmup'], 0)
+                )
+                self.stderr.write(
+                    f'{name:<28} median {results[name]["median_ms"]:>9.2f} ms  '
+                    f'{results[name]["queries"]:>4} queries  status {results[name]["status"]}'
+                )
+        return results
+
+    def cases(self):
+        """(name, url, query parameters) of every benchmark case."""
+        entry = Entry.objects.order_by('-upload_date', '-id').first()
+        tag = Tag.objects.order_by('-usage_count', 'id').select_related('tag_type').first()
+        summary = RangeSummary.objects.order_by('-entry_count').first()
+        search = entry.name.split()[0] if entry else 'a'
+
+        cases = [
+            ('public_landing', reverse('public_landing'), {}),
+            ('landing', reverse('home'), {}),
+            ('gallery', reverse('collection:gallery'), {}),
+            ('gallery_search', reverse('collection:gallery'), {'search': search}),
+            ('api_entries', reverse('collection:api_entries'), {}),
+            ('api_entries_search', reverse('collection:api_entries'), {'search': search}),
+            ('range_list', reverse('ranges:list'), {}),
+            ('tag_list', reverse('tags:list'), {}),
+            ('tag_autocomplete', reverse('tags:api_autocomplete'), {'q': search[:3]}),
+            ('tag_autocomplete_blank', reverse('tags:api_autocomplete'), {}),
+            ('tag_assign', reverse('tag_assign:assign'), {}),
+            ('admin_entries', reverse('admin:image_upload_entry_changelist'), {}),
+            ('admin_images', reverse('admin:image_upload_image_changelist'), {}),
+            ('admin_tags', reverse('admin:tags_tag_changelist'), {}),
+        ]
+        if entry:
+            cases += [
+                ('entry_detail', reverse('image_details:detail', args=[entry.id]), {}),
+                ('entry_edit', reverse('collection:edit', args=[entry.id]), {}),
+            ]
+        if tag and tag.tag_type and tag.tag_type in gallery_tag_types():
+            cases.append(('gallery_tag_filter', reverse('collection:gallery'), {f'tag_type_{tag.tag_type_id}': tag.id}))
+        if summary:
+            cases.append(('range_detail', reverse('ranges:detail', args=[summary.range_key]), {}))
+        return cases
+
+    def measure(self, client, url, params, repeat, warmup):
+        for _ in range(warmup):
+            client.get(url, params)
+
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url, params)
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'url': url,
+            'params': params,
+            'status': response.status_code,
+            'bytes': len(response.content),
+            'queries': len(queries),
+            'min_ms': round(timings[0], 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'max_ms': round(timings[-1], 3),
+        }
+
+    def compare(self, path, results):
+        try:
+            previous = json.loads(Path(path).read_text(encoding='utf-8'))['results']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Cannot read {path}: {error}')
+        self.stderr.write(f'\nMedian change against {path}:')
+        for name, result in results.items():
+            if name not in previous:
+                self.stderr.write(f'{name:<28} (new)')
+                continue
+            before = previous[name]['median_ms']
+            change = (result['median_ms'] - before) / before * 100 if before else 0
+            line = (
+                f'{name:<28} {before:>9.2f} -> {result["median_ms"]:>9.2f} ms ({change:+.1f}%)  '
+                f'queries {previous[name]["queries"]} -> {result["queries"]}'
+            )
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            self.stderr.write(style(line))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('tag_count', models.PositiveIntegerField(default=0)),
+                ('publisher_count', models.PositiveIntegerField(default=0)),
+                ('range_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Collection stats',
+            },
+        ),
+    ]
@@ -1,3 +1,18 @@
 from django.db import models
 
-# Create your models here.
+
+class CollectionStats(models.Model):
+    """
+    Single row of collection totals for the landing pages, kept up to date by
+    signals (see collection.stats) so showing them is one primary-key read.
+    """
+    entry_count = models.PositiveIntegerField(default=0)
+    tag_count = models.PositiveIntegerField(default=0)
+    publisher_count = models.PositiveIntegerField(default=0)
+    range_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Collection stats'
+
+    def __str__(self):
+        return f"{self.entry_count} entries, {self.tag_count} tags"
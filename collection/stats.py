@@ -0,0 +1,131 @@
+"""
+Maintenance of the CollectionStats counters shown on the landing pages.
+
+Every save or delete of an entry or tag adjusts the counters with a single
+UPDATE. The distinct publisher and range counts only change when a value is
+used for the first time or its last entry goes; the UPDATE checks that itself
+with EXISTS subqueries. It runs inside the saving transaction, so a rollback
+undoes it too. rebuild_stats recounts everything (see the
+rebuild_collection_stats command).
+"""
+from django.db import transaction
+from django.db.models import Case, Exists, F, Value, When, signals
+from django.db.models.functions import Greatest
+
+from image_upload.models import Entry
+from tags.models import Tag
+
+from .models import CollectionStats
+
+STATS_ID = 1
+# Entry field -> counter of its distinct non-empty values
+DISTINCT_FIELDS = {'publisher': 'publisher_count', 'range': 'range_count'}
+
+
+def count_stats():
+    counts = {'entry_count': Entry.objects.count(), 'tag_count': Tag.objects.count()}
+    for field, counter in DISTINCT_FIELDS.items():
+        counts[counter] = (
+            Entry.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            .values(field).distinct().count()
+        )
+    return counts
+
+
+def rebuild_stats():
+    """Recount every counter. Returns the CollectionStats row."""
+    stats, _ = CollectionStats.objects.update_or_create(pk=STATS_ID, defaults=count_stats())
+    return stats
+
+
+def get_stats():
+    """The collection totals; counted on first use."""
+    return CollectionStats.objects.filter(pk=STATS_ID).first() or rebuild_stats()
+
+
+def recount_tags():
+    """Recount tags after bulk creation, which sends no signals."""
+    CollectionStats.objects.filter(pk=STATS_ID).update(tag_count=Tag.objects.count())
+
+
+def adjust_stats(**changes):
+    """Add a delta (an int or an expression) to each named counter in one UPDATE."""
+    changes = {
+        counter: Greatest(F(counter) + delta, Value(0))
+        for counter, delta in changes.items() if not isinstance(delta, int) or delta
+    }
+    if changes and not CollectionStats.objects.filter(pk=STATS_ID).update(**changes):
+        # Never counted: the first count includes this change
+        rebuild_stats()
+
+
+def _is_new(field, value, entry_id):
+    """1 if no other entry uses `value`, else 0 (evaluated by the database)."""
+    others = Entry.objects.filter(**{field: value}).exclude(pk=entry_id)
+    return Case(When(Exists(others), then=Value(0)), default=Value(1))
+
+
+def _stats_values(instance):
+    values = instance.__dict__
+    return {field: values[field] or None for field in DISTINCT_FIELDS if field in values}
+
+
+def remember_entry_values(sender, instance, **kwargs):
+    """post_init receiver: publisher and range as loaded, to spot changes."""
+    instance._stats_values = _stats_values(instance)
+
+
+def entry_saved(sender, instance, created, update_fields, **kwargs):
+    """post_save receiver for Entry."""
+    previous = {} if created else instance._stats_values
+    changes = {'entry_count': 1 if created else 0}
+    for field, counter in DISTINCT_FIELDS.items():
+        if update_fields is not None and field not in update_fields:
+            continue
+        if not created and field not in previous:
+            # Loaded without the field: its old value is unknown
+            transaction.on_commit(rebuild_stats)
+            return
+        old, new = previous.get(field), getattr(instance, field) or None
+        if old == new:
+            continue
+        delta = Value(0)
+        if new:
+            delta += _is_new(field, new, instance.pk)
+        if old:
+            delta -= _is_new(field, old, None)
+        changes[counter] = delta
+    adjust_stats(**changes)
+    instance._stats_values = _stats_values(instance)
+
+
+def entry_deleted(sender, instance, **kwargs):
+    """post_delete receiver for Entry."""
+    values = _stats_values(instance)
+    if len(values) < len(DISTINCT_FIELDS):
+        transaction.on_commit(rebuild_stats)
+        return
+    changes = {'entry_count': -1}
+    for field, value in values.items():
+        if value:
+            changes[DISTINCT_FIELDS[field]] = -_is_new(field, value, None)
+    adjust_stats(**changes)
+
+
+def tag_saved(sender, instance, created, **kwargs):
+    """post_save receiver for Tag."""
+    if created:
+        adjust_stats(tag_count=1)
+
+
+def tag_deleted(sender, instance, **kwargs):
+    """post_delete receiver for Tag."""
+    adjust_stats(tag_count=-1)
+
+
+def connect_stats_signals():
+    signals.post_init.connect(remember_entry_values, sender=Entry, dispatch_uid='collection_stats_init:entry')
+    signals.post_save.connect(entry_saved, sender=Entry, dispatch_uid='collection_stats_saved:entry')
+    signals.post_delete.connect(entry_deleted, sender=Entry, dispatch_uid='collection_stats_deleted:entry')
+    signals.post_save.connect(tag_saved, sender=Tag, dispatch_uid='collection_stats_saved:tag')
+    signals.post_delete.connect(tag_deleted, sender=Tag, dispatch_uid='collection_stats_deleted:tag')
@@ -1,3 +1,259 @@
-from django.test import TestCase
+import json
+import re
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.messages import constants
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import MessageEncoder
+from django.contrib.messages.storage.session import SessionStorage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.middleware.csrf import _unmask_cipher_token
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from collection.stats import count_stats, get_stats
+from image_upload.models import Entry, Image
+from stl_collection.page_cache import CSRF_PLACEHOLDER, USERNAME_PLACEHOLDER
+from stl_collection.views import serve_media
+from tags.models import Tag, TagType
+
+
+@override_settings(MESSAGE_STORAGE='django.contrib.messages.storage.session.SessionStorage')
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.entry = Entry.objects.create(name='Hero With Sword', publisher='Forge', range='Heroes')
+        self.user = User.objects.create_user('alice', password='secret')
+        self.other = User.objects.create_user('bob', password='secret')
+        self.client.force_login(self.user)
+        self.url = reverse('collection:gallery')
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertContains(first, 'Hero With Sword')
+        # Only the session and user lookups of login_required remain
+        with self.assertNumQueries(2):
+            second = self.client.get(self.url)
+        self.assertIsNone(second.context)
+        self.assertContains(second, 'Hero With Sword')
+
+    def test_query_string_is_normalized(self):
+        self.client.get(self.url, {'publisher': 'Forge', 'range': 'Heroes'})
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {'range': 'Heroes', 'search': '', 'publisher': 'Forge'})
+
+    def test_unchanged_pages_are_revalidated(self):
+        # The first visit sets the CSRF cookie the ETag depends on
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # Another user's copy of the page is not theirs to reuse
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_changes_invalidate_cached_pages(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry.name = 'Hero With Axe'
+            self.entry.save()
+        self.assertContains(self.client.get(self.url), 'Hero With Axe')
+
+        detail_url = reverse('image_details:detail', args=[self.entry.id])
+        self.client.get(detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry.tags.add(Tag.objects.create(name='paladin'))
+        self.assertContains(self.client.get(detail_url), 'paladin')
+
+    def test_per_user_values_are_not_shared(self):
+        self.client.get(self.url)
+        self.client.force_login(self.other)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        content = response.content.decode()
+        self.assertIn('bob', content)
+        self.assertNotIn('alice', content)
+        self.assertNotIn(CSRF_PLACEHOLDER, content)
+        self.assertNotIn(USERNAME_PLACEHOLDER, content)
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', content).group(1)
+        self.assertEqual(_unmask_cipher_token(token), self.client.cookies['csrftoken'].value)
+
+    def test_staff_get_their_own_pages(self):
+        self.client.get(self.url)
+        self.user.is_staff = True
+        self.user.save()
+        # Rendered rather than served from the cache
+        self.assertIsNotNone(self.client.get(self.url).context)
+
+    def test_pending_messages_bypass_the_cache(self):
+        self.client.get(self.url)
+        session = self.client.session
+        session[SessionStorage.session_key] = json.dumps([Message(constants.SUCCESS, 'Entry saved')], cls=MessageEncoder)
+        session.save()
+        self.assertContains(self.client.get(self.url), 'Entry saved')
+        self.assertNotContains(self.client.get(self.url), 'Entry saved')
+
+
+class CollectionStatsTests(TestCase):
+    def assertStatsMatchCounts(self):
+        stats = get_stats()
+        self.assertEqual(
+            {counter: getattr(stats, counter) for counter in count_stats()},
+            count_stats(),
+        )
+
+    def test_counters_follow_entry_and_tag_changes(self):
+        dragon = Entry.objects.create(name='Dragon', publisher='Forge', range='Beasts')
+        Entry.objects.create(name='Wyvern', publisher='Forge', range='Beasts')
+        Entry.objects.create(name='Knight', publisher='', range='Heroes')
+        tag = Tag.objects.create(name='Chaos')
+        self.assertStatsMatchCounts()
+        self.assertEqual(get_stats().publisher_count, 1)
+
+        dragon.publisher = 'Anvil'
+        dragon.save()
+        self.assertEqual(get_stats().publisher_count, 2)
+
+        # Renaming the last entry of a range replaces it rather than adding one
+        knight = Entry.objects.get(name='Knight')
+        knight.range = 'Knights'
+        knight.save()
+        self.assertEqual(get_stats().range_count, 2)
+
+        dragon.delete()
+        tag.delete()
+        self.assertStatsMatchCounts()
+        self.assertEqual(get_stats().publisher_count, 1)
+
+    def test_stats_are_a_single_read(self):
+        Entry.objects.create(name='Dragon', publisher='Forge', range='Beasts')
+        with self.assertNumQueries(1):
+            self.assertEqual(get_stats().entry_count, 1)
+
+
+class MediaCacheHeaderTests(TestCase):
+    def test_unique_named_files_are_immutable(self):
+        with tempfile.TemporaryDirectory() as media_root:
+            for name in ('forge_beasts_dragon_1a2b3c4d.jpg', 'forge_beasts_dragon_1a2b3c4d_thumb.jpg', 'logo.png'):
+                with open(f'{media_root}/{name}', 'wb') as handle:
+                    handle.write(b'data')
+
+            def cache_control(name):
+                request = RequestFactory().get(f'/media/{name}')
+                return serve_media(request, name, document_root=media_root).get('Cache-Control', '')
+
+            self.assertIn('immutable', cache_control('forge_beasts_dragon_1a2b3c4d.jpg'))
+            self.assertIn('max-age=31536000', cache_control('forge_beasts_dragon_1a2b3c4d_thumb.jpg'))
+            self.assertEqual(cache_control('logo.png'), '')
+
+
+class GalleryApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('alice', password='secret'))
+        self.url = reverse('collection:api_entries')
+        now = timezone.now()
+        self.entries = []
+        # Two entries share an upload date; ids break the tie
+        for days, name in [(0, 'Dragon'), (1, 'Wyvern'), (1, 'Hydra'), (2, 'Knight'), (3, 'Orc')]:
+            entry = Entry.objects.create(name=name, publisher='Forge', range='Beasts')
+            Entry.objects.filter(pk=entry.pk).update(upload_date=now - timedelta(days=days))
+            self.entries.append(entry)
+
+    def test_cursor_pages_walk_every_entry_once(self):
+        response = self.client.get(self.url, {'limit': 2})
+        data = response.json()
+        self.assertEqual(data['count'], 5)
+        names = [entry['name'] for entry in data['entries']]
+        while data['next_cursor']:
+            data = self.client.get(self.url, {'limit': 2, 'cursor': data['next_cursor']}).json()
+            self.assertNotIn('count', data)
+            names += [entry['name'] for entry in data['entries']]
+        self.assertEqual(names, ['Dragon', 'Hydra', 'Wyvern', 'Knight', 'Orc'])
+
+    def test_filters_match_the_gallery(self):
+        faction = TagType.objects.create(name='Test Faction')
+        chaos = Tag.objects.create(name='Chaos', tag_type=faction)
+        self.entries[1].tags.add(chaos)
+        self.entries[3].tags.add(chaos)
+        params = {f'tag_type_{faction.id}': chaos.id, 'search': 'n'}
+
+        data = self.client.get(self.url, params).json()
+        self.assertEqual([entry['name'] for entry in data['entries']], ['Wyvern', 'Knight'])
+        self.assertEqual(data['entries'][0]['tags'], [chaos.id])
+        self.assertIsNone(data['entries'][0]['thumbnail'])
+        gallery = self.client.get(reverse('collection:gallery'), params)
+        self.assertEqual(list(gallery.context['entries']), [self.entries[1], self.entries[3]])
+
+    def test_entries_show_their_display_image(self):
+        Image.objects.create(entry=self.entries[0], image='uploaded_images/first_1a2b3c4d.jpg')
+        Image.objects.create(entry=self.entries[0], image='uploaded_images/cover_5e6f7a8b.jpg', is_primary=True)
+        dragon = self.client.get(self.url).json()['entries'][0]
+        self.assertEqual(dragon['thumbnail'], '/media/uploaded_images/cover_5e6f7a8b.jpg')
+        self.assertEqual(dragon['image_count'], 2)
+
+    def test_page_queries_do_not_depend_on_page_size(self):
+        # Session, user, tag types, entries, display images, tag links, count
+        with self.assertNumQueries(7):
+            response = self.client.get(self.url, {'limit': 5})
+        self.assertEqual(len(response.json()['entries']), 5)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+
+class BenchmarkCommandTests(TestCase):
+    def generate(self, seed):
+        call_command(
+            'generate_benchmark_data', entries=30, tags=20, tag_types=3,
+            images_per_entry=0, seed=seed, clear=True, stdout=StringIO(),
+        )
+        return sorted(
+            (entry.name, entry.range, tuple(sorted(entry.tags.values_list('name', flat=True))))
+            for entry in Entry.objects.prefetch_related('tags')
+        )
+
+    def test_generated_data_is_deterministic(self):
+        first = self.generate(seed=7)
+        self.assertEqual(len(first), 30)
+        self.assertEqual(self.generate(seed=7), first)
+        self.assertNotEqual(self.generate(seed=8), first)
+        # Counters are brought up to date despite bulk_create
+        self.assertEqual(get_stats().entry_count, 30)
+        tag = Tag.objects.order_by('-usage_count').first()
+        self.assertEqual(tag.usage_count, tag.entry_set.count())
+
+    def test_benchmarks_write_comparable_results(self):
+        self.generate(seed=1)
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'results.json'
+            call_command('run_benchmarks', repeat=1, warmup=0, output=str(output), stderr=StringIO())
+            # The user the pages were requested as is gone again
+            self.assertFalse(User.objects.exists())
+            report = json.loads(output.read_text())
+            self.assertEqual(report['dataset']['entries'], 30)
+            for name, result in report['results'].items():
+                self.assertEqual(result['status'], 200, name)
+
+            stderr = StringIO()
+            call_command(
+                'run_benchmarks', repeat=1, warmup=0, only=['api'], compare=str(output),
+                output=str(Path(directory) / 'new.json'), stderr=stderr,
+            )
+            self.assertIn('api_entries', stderr.getvalue())
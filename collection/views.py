@@ -8,75 +8,20 @@ from django.http import JsonResponse
 from django.core.files.base import ContentFile
 from image_upload.models import Entry, Image
 from image_upload.forms import EntryEditForm
+from jobs.registry import enqueue
+from stl_collection.page_cache import cache_page_versions
+from .filters import MAX_PAGE_SIZE, PAGE_SIZE, entry_page, filter_entries, gallery_tag_types, serialize_entries
 from tags.models import Tag, TagType
-import os
-import re
-import uuid
 
-def to_camel_case(text):
-    """Convert text to camelCase format"""
-    if not text:
-        return "unknown"
-    # Remove special characters and split by spaces/underscores/hyphens
-    words = re.split(r'[^a-zA-Z0-9]+', str(text).strip())
-    # Filter out empty strings
-    words = [word for word in words if word]
-    if not words:
-        return "unknown"
-    # First word lowercase, rest title case
-    camel_case = words[0].lower()
-    for word in words[1:]:
-        camel_case += word.capitalize()
-    return camel_case
 
 @login_required
+@cache_page_versions('gallery')
 def gallery(request):
-    """Gallery view with search and filtering"""
-    entries = Entry.objects.all()
-    
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        entries = entries.filter(
-            Q(name__icontains=search_query) |
-            Q(publisher__icontains=search_query) |
-            Q(range__icontains=search_query) |
-            Q(tags__name__icontains=search_query)
-        ).distinct()
-    
-    # Filter by publisher
-    publisher_filter = request.GET.get('publisher', '')
-    if publisher_filter:
-        entries = entries.filter(publisher__icontains=publisher_filter)
-    
-    # Filter by range
-    range_filter = request.GET.get('range', '')
-    if range_filter:
-        entries = entries.filter(range__icontains=range_filter)
-    
-    # Get tag types for filters
-    tag_types = TagType.objects.filter(is_active=True, show_in_gallery=True).order_by('sort_order', 'name')
-    
-    # Filter by individual tag type selections (AND logic - entry must have ALL selected tags)
-    tag_filter = []
-    selected_tags = {}  # Track which tag is selected for each tag type
-    
-    for tag_type in tag_types:
-        tag_param = request.GET.get(f'tag_type_{tag_type.id}', '')
-        if tag_param:
-            try:
-                tag_id = int(tag_param)
-                # Add to filter list for display purposes
-                tag_filter.append(str(tag_id))
-                # Track the selection
-                selected_tags[tag_type.id] = tag_id
-                # Filter entries that have this specific tag
-                entries = entries.filter(tags__id=tag_id)
-            except (ValueError, TypeError):
-                pass
-    
-    if tag_filter:
-        entries = entries.distinct()
+    """Gallery view with search and filtering; further pages come from api_entries"""
+    tag_types = gallery_tag_types()
+    entries, filters = filter_entries(request.GET, tag_types)
+    total_count = entries.count()
+    page, next_cursor = entry_page(entries.prefetch_related('images', 'tags__tag_type'))
     
     # Get filter options for dropdowns
     publishers = Entry.objects.exclude(
@@ -86,34 +31,50 @@ def gallery(request):
     ranges = Entry.objects.exclude(
         Q(range__isnull=True) | Q(range__exact='')
     ).values_list('range', flat=True).distinct().order_by('range')
-    all_tags = Tag.objects.all()
+    all_tags = Tag.objects.select_related('tag_type')
     
-    # Pagination
-    paginator = Paginator(entries, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Build query string for pagination (exclude 'page' parameter)
-    query_params = []
-    for key, value in request.GET.items():
-        if key != 'page' and value:
-            query_params.append(f'{key}={value}')
-    query_string = '&'.join(query_params)
+    # Badge styles for cards built from the JSON API
+    tag_styles = {
+        tag.id: {'name': tag.name, 'color': tag.get_color(), 'text_color': tag.get_text_color()}
+        for tag in all_tags
+    }
     
     return render(request, 'collection/gallery.html', {
-        'page_obj': page_obj,
-        'search_query': search_query,
-        'publisher_filter': publisher_filter,
-        'range_filter': range_filter,
-        'tag_filter': tag_filter,
-        'selected_tags': selected_tags,
+        'entries': page,
+        'next_cursor': next_cursor,
+        'total_count': total_count,
+        **filters,
         'publishers': publishers,
         'ranges': ranges,
         'all_tags': all_tags,
+        'tag_styles': tag_styles,
         'tag_types': tag_types,
-        'query_string': query_string,
     })
 
+@login_required
+@cache_page_versions('api_entries')
+def api_entries(request):
+    """
+    Gallery entries as compact JSON, filtered like the gallery, one page per
+    request: pass the previous response's next_cursor as `cursor` for the next
+    page. The first page also carries the total count.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        limit = PAGE_SIZE
+    entries, _ = filter_entries(request.GET, gallery_tag_types())
+    cursor = request.GET.get('cursor') or None
+    try:
+        page, next_cursor = entry_page(entries.only('id', 'name', 'publisher', 'range', 'upload_date'), cursor, limit)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+    
+    data = {'success': True, 'entries': serialize_entries(page), 'next_cursor': next_cursor}
+    if cursor is None:
+        data['count'] = entries.count()
+    return JsonResponse(data)
+
 @staff_member_required
 def edit_image(request, image_id):
     """Edit an existing entry - staff only"""
@@ -137,83 +98,28 @@ def edit_image(request, image_id):
                 range=updated_entry.range
             )
             
-            # Rename files if metadata changed
-            for image in entry.images.all():
-                if image.image and os.path.exists(image.image.path):
-                    old_path = image.image.path
-                    _, ext = os.path.splitext(old_path)
-                    
-                    # Create new filename with UUID
-                    publisher = to_camel_case(updated_entry.publisher)
-                    range_name = to_camel_case(updated_entry.range)
-                    name = to_camel_case(updated_entry.name)
-                    unique_id = uuid.uuid4().hex[:8]
-                    
-                    new_filename = f"{publisher}_{range_name}_{name}_{unique_id}{ext}"
-                    new_path = os.path.join(os.path.dirname(old_path), new_filename)
-                    
-                    # Rename file
-                    try:
-                        os.rename(old_path, new_path)
-                        image.image.name = f"uploaded_images/{new_filename}"
-                        image.save()
-                    except OSError:
-                        pass
+            # Rename stored files in the background if naming metadata changed
+            if {'name', 'publisher', 'range'} & set(form.changed_data):
+                enqueue('image_upload.rename_entry_files', entry_id=updated_entry.id)
             
             messages.success(request, f'Successfully updated "{updated_entry.name}"!')
             return redirect('collection:gallery')
     else:
         form = EntryEditForm(instance=entry)
     
-    # Get tag types and all tags for quick tags section
-    tag_types = TagType.objects.filter(is_active=True, show_in_gallery=True).order_by('sort_order', 'name')
-    all_tags = Tag.objects.select_related('tag_type').prefetch_related('reference_tags').all()
-    
-    # Handle quick tags filtering
-    tag_type_filter = request.GET.get('tag_type', '')
-    reference_tag_filter = request.GET.get('reference_tag', '')
-    
-    quick_tags = all_tags
-    selected_tag_type_obj = None
-    
-    # Filter by tag type
-    if tag_type_filter:
-        try:
-            tag_type_id = int(tag_type_filter)
-            quick_tags = quick_tags.filter(tag_type_id=tag_type_id)
-            selected_tag_type_obj = TagType.objects.get(id=tag_type_id)
-        except (ValueError, TagType.DoesNotExist):
-            pass
-    
-    # Filter by reference tag
-    if selected_tag_type_obj and selected_tag_type_obj.reference_tagtypes.exists():
-        if reference_tag_filter == 'none':
-            quick_tags = quick_tags.filter(reference_tags__isnull=True)
-        elif reference_tag_filter:
-            try:
-                reference_tag_id = int(reference_tag_filter)
-                quick_tags = quick_tags.filter(reference_tags__id=reference_tag_id)
-            except ValueError:
-                pass
-    
-    # Get reference tags for the filter
-    reference_tags = []
-    if selected_tag_type_obj and selected_tag_type_obj.reference_tagtypes.exists():
-        reference_tags = Tag.objects.filter(
-            tag_type__in=selected_tag_type_obj.reference_tagtypes.all()
-        ).order_by('name')
+    # Tag types for the quick tags filter; the tags are loaded from the tag autocomplete API
+    tag_types = (
+        TagType.objects.filter(is_active=True, show_in_gallery=True)
+        .order_by('sort_order', 'name').prefetch_related('reference_tagtypes')
+    )
     
     return render(request, 'collection/edit.html', {
         'form': form,
         'image': entry,  # Keep 'image' for template compatibility
         'entry': entry,
         'tag_types': tag_types,
-        'all_tags': all_tags,
-        'quick_tags': quick_tags,
-        'tag_type_filter': tag_type_filter,
-        'reference_tag_filter': reference_tag_filter,
-        'selected_tag_type_obj': selected_tag_type_obj,
-        'reference_tags': reference_tags
+        'tag_type_filter': request.GET.get('tag_type', ''),
+        'reference_tag_filter': request.GET.get('reference_tag', ''),
     })
 
 @staff_member_required
@@ -225,16 +131,8 @@ def delete_image(request, image_id):
     if request.method == 'POST':
         entry_name = entry.name
         
-        # Delete all associated image files
-        for image in entry.images.all():
-            if image.image:
-                try:
-                    if os.path.isfile(image.image.path):
-                        os.remove(image.image.path)
-                except (ValueError, OSError):
-                    pass
-        
-        # Delete the entry (CASCADE will delete associated images)
+        # Delete the entry (CASCADE deletes its images and files; the stored
+        # files are removed in the background once the delete commits)
         entry.delete()
         
         messages.success(request, f'Successfully deleted "{entry_name}" and all its images!')
@@ -256,26 +154,12 @@ def bulk_delete(request):
             messages.warning(request, 'No entries selected for deletion.')
             return redirect('collection:bulk_delete')
         
-        # Get all entries to delete
+        # Delete all entries (CASCADE deletes associated images and files; the
+        # stored files are removed in the background once the delete commits)
         entries = Entry.objects.filter(id__in=entry_ids)
-        deleted_count = 0
-        deleted_images_count = 0
-        
-        for entry in entries:
-            # Delete all associated image files
-            for image in entry.images.all():
-                if image.image:
-                    try:
-                        if os.path.isfile(image.image.path):
-                            os.remove(image.image.path)
-                            deleted_images_count += 1
-                    except (ValueError, OSError):
-                        pass
-            
-            deleted_count += 1
-        
-        # Delete all entries (CASCADE will delete associated Image records)
-        entries.delete()
+        _, deleted_per_model = entries.delete()
+        deleted_count = deleted_per_model.get(Entry._meta.label, 0)
+        deleted_images_count = deleted_per_model.get(Image._meta.label, 0)
         
         messages.success(request, f'Successfully deleted {deleted_count} entries and {deleted_images_count} image files!')
         return redirect('collection:bulk_delete')
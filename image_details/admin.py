@@ -1,3 +1,11 @@
 from django.contrib import admin
+from unfold.admin import ModelAdmin
+from .models import RelatedEntry
 
-# Register your models here.
+
+@admin.register(RelatedEntry)
+class RelatedEntryAdmin(ModelAdmin):
+    list_display = ['entry', 'rank', 'related', 'score']
+    search_fields = ['entry__name', 'related__name']
+    list_select_related = ['entry', 'related']
+    ordering = ['entry', 'rank']
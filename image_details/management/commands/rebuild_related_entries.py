@@ -0,0 +1,32 @@
+"""
+Django management command to precompute "more like this" related entries
+from tag overlap. Intended to run nightly (e.g. from cron).
+
+Usage:
+    python manage.py rebuild_related_entries
+    python manage.py rebuild_related_entries --limit 12
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from image_details.similarity import RELATED_ENTRY_LIMIT, rebuild_related_entries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the related entries table from IDF-weighted tag similarity'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=RELATED_ENTRY_LIMIT,
+            help=f'Related entries to keep per entry (default: {RELATED_ENTRY_LIMIT})',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        row_count = rebuild_related_entries(limit=options['limit'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f'Stored {row_count} related entries in {elapsed:.1f}s')
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('image_upload', '0004_add_file_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='image_upload.entry')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='image_upload.entry')),
+            ],
+            options={
+                'verbose_name_plural': 'Related entries',
+                'ordering': ['entry', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('entry', 'rank'), name='unique_related_entry_rank')],
+            },
+        ),
+    ]
@@ -1,3 +1,23 @@
 from django.db import models
+from image_upload.models import Entry
 
-# Create your models here.
+
+class RelatedEntry(models.Model):
+    """
+    Precomputed "more like this" neighbour of an Entry, ranked by tag similarity.
+    Rebuilt by the rebuild_related_entries management command.
+    """
+    entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['entry', 'rank']
+        verbose_name_plural = 'Related entries'
+        constraints = [
+            models.UniqueConstraint(fields=['entry', 'rank'], name='unique_related_entry_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.entry_id} -> {self.related_id} ({self.score:.3f})"
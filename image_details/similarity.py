@@ -0,0 +1,117 @@
+"""
+Tag-overlap similarity between entries.
+
+Entries are compared by IDF-weighted Jaccard similarity over their tags:
+shared rare tags count for more than shared common ones. The entry x tag
+matrix is sparse, so it is held as two adjacency maps (entry -> tags and
+tag -> entries) and only entries sharing at least one tag are ever scored.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+from image_upload.models import Entry
+from stl_collection.page_cache import RELATED_VERSION, bump_versions_on_commit
+from .models import RelatedEntry
+
+RELATED_ENTRY_LIMIT = 6
+
+EntryTag = Entry.tags.through
+
+
+class TagMatrix:
+    """Sparse entry x tag incidence matrix with IDF weights per tag."""
+
+    def __init__(self, pairs, entry_count, document_frequency=None):
+        self.entry_tags = defaultdict(set)
+        self.tag_entries = defaultdict(set)
+        for entry_id, tag_id in pairs:
+            self.entry_tags[entry_id].add(tag_id)
+            self.tag_entries[tag_id].add(entry_id)
+
+        self.entry_count = entry_count
+        if document_frequency is None:
+            document_frequency = {tag_id: len(entries) for tag_id, entries in self.tag_entries.items()}
+        self.idf = {
+            tag_id: math.log((1 + entry_count) / (1 + df)) + 1
+            for tag_id, df in document_frequency.items()
+        }
+        self._weights = {}
+
+    @classmethod
+    def from_database(cls):
+        """Load every entry/tag assignment in one streamed query."""
+        pairs = EntryTag.objects.values_list('entry_id', 'tag_id').iterator(chunk_size=5000)
+        return cls(pairs, Entry.objects.count())
+
+    @classmethod
+    def around_entry(cls, entry):
+        """
+        Load just the neighbourhood of one entry: every entry sharing a tag
+        with it, with their full tag sets and global document frequencies.
+        """
+        tag_ids = list(entry.tags.values_list('id', flat=True))
+        if not tag_ids:
+            return cls([], 0)
+
+        candidates = EntryTag.objects.filter(tag_id__in=tag_ids).values('entry_id')
+        pairs = list(EntryTag.objects.filter(entry_id__in=candidates).values_list('entry_id', 'tag_id'))
+        involved_tags = {tag_id for _, tag_id in pairs}
+        document_frequency = dict(
+            EntryTag.objects.filter(tag_id__in=involved_tags)
+            .values('tag_id')
+            .annotate(df=Count('entry_id'))
+            .values_list('tag_id', 'df')
+        )
+        return cls(pairs, Entry.objects.count(), document_frequency)
+
+    def weight(self, entry_id):
+        """Sum of IDF weights over an entry's tags."""
+        if entry_id not in self._weights:
+            self._weights[entry_id] = sum(self.idf[tag_id] for tag_id in self.entry_tags[entry_id])
+        return self._weights[entry_id]
+
+    def related(self, entry_id, limit=RELATED_ENTRY_LIMIT):
+        """Return up to `limit` (entry_id, score) pairs, most similar first."""
+        overlap = defaultdict(float)
+        for tag_id in self.entry_tags.get(entry_id, ()):
+            tag_weight = self.idf[tag_id]
+            for other_id in self.tag_entries[tag_id]:
+                if other_id != entry_id:
+                    overlap[other_id] += tag_weight
+
+        own_weight = self.weight(entry_id)
+        scores = (
+            (shared / (own_weight + self.weight(other_id) - shared), other_id)
+            for other_id, shared in overlap.items()
+        )
+        # Ties go to the newer entry (higher id)
+        best = heapq.nlargest(limit, scores)
+        return [(other_id, score) for score, other_id in best]
+
+
+def related_entries_for(entry, limit=RELATED_ENTRY_LIMIT):
+    """Compute related entries for a single entry on the fly."""
+    matrix = TagMatrix.around_entry(entry)
+    ranked = matrix.related(entry.id, limit)
+    if not ranked:
+        return []
+    entries = Entry.objects.prefetch_related('images').in_bulk([entry_id for entry_id, _ in ranked])
+    return [entries[entry_id] for entry_id, _ in ranked if entry_id in entries]
+
+
+def rebuild_related_entries(limit=RELATED_ENTRY_LIMIT, batch_size=1000):
+    """Recompute the top-k RelatedEntry table for every tagged entry."""
+    matrix = TagMatrix.from_database()
+    rows = []
+    for entry_id in matrix.entry_tags:
+        for rank, (related_id, score) in enumerate(matrix.related(entry_id, limit)):
+            rows.append(RelatedEntry(entry_id=entry_id, related_id=related_id, score=score, rank=rank))
+
+    with transaction.atomic():
+        RelatedEntry.objects.all().delete()
+        RelatedEntry.objects.bulk_create(rows, batch_size=batch_size)
+        bump_versions_on_commit(RELATED_VERSION)
+    return len(rows)
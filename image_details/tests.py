@@ -1,3 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from image_upload.models import Entry
+from tags.models import Tag
+from .models import RelatedEntry
+from .similarity import TagMatrix, rebuild_related_entries
+
+
+class RelatedEntryTests(TestCase):
+    def setUp(self):
+        self.common = Tag.objects.create(name='Common')
+        self.rare = Tag.objects.create(name='Rare')
+        self.entry = Entry.objects.create(name='Base')
+        self.rare_match = Entry.objects.create(name='Rare Match')
+        self.common_match = Entry.objects.create(name='Common Match')
+        self.unrelated = Entry.objects.create(name='Unrelated')
+        self.entry.tags.add(self.common, self.rare)
+        self.rare_match.tags.add(self.rare)
+        self.common_match.tags.add(self.common)
+        for index in range(3):
+            Entry.objects.create(name=f'Filler {index}').tags.add(self.common)
+
+    def test_rare_shared_tags_rank_higher(self):
+        matrix = TagMatrix.from_database()
+        ranked = [entry_id for entry_id, _ in matrix.related(self.entry.id)]
+        self.assertEqual(ranked[0], self.rare_match.id)
+        self.assertIn(self.common_match.id, ranked)
+        self.assertNotIn(self.unrelated.id, ranked)
+
+    def test_neighbourhood_matches_full_matrix(self):
+        full = TagMatrix.from_database().related(self.entry.id)
+        local = TagMatrix.around_entry(self.entry).related(self.entry.id)
+        self.assertEqual([entry_id for entry_id, _ in full], [entry_id for entry_id, _ in local])
+
+    def test_detail_page_uses_precomputed_table(self):
+        rebuild_related_entries()
+        self.assertEqual(
+            RelatedEntry.objects.filter(entry=self.entry).first().related, self.rare_match
+        )
+        get_user_model().objects.create_user(username='viewer', password='password123')
+        self.client.login(username='viewer', password='password123')
+        response = self.client.get(reverse('image_details:detail', args=[self.entry.id]))
+        self.assertEqual(response.context['related_images'][0], self.rare_match)
+
+    def test_cached_page_follows_changes_to_related_entries(self):
+        cache.clear()
+        rebuild_related_entries()
+        get_user_model().objects.create_user(username='viewer', password='password123')
+        self.client.login(username='viewer', password='password123')
+        url = reverse('image_details:detail', args=[self.entry.id])
+        self.assertContains(self.client.get(url), 'Rare Match')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rare_match.name = 'Renamed Match'
+            self.rare_match.save()
+        self.assertContains(self.client.get(url), 'Renamed Match')
+
+        # Deleting it removes its RelatedEntry rows by cascade
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rare_match.delete()
+        self.assertNotContains(self.client.get(url), 'Renamed Match')
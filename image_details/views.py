@@ -2,8 +2,21 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from image_upload.models import Entry, Image
+from stl_collection.page_cache import (
+    COLLECTION_VERSION, RELATED_VERSION, TAGS_VERSION, cache_page_versions, entry_version,
+)
+from .models import RelatedEntry
+from .similarity import RELATED_ENTRY_LIMIT, related_entries_for
+
+
+def detail_versions(entry_id):
+    # The related-entry cards show other entries, and the on-the-fly and
+    # publisher/range fallbacks depend on the whole collection
+    return [entry_version(entry_id), COLLECTION_VERSION, TAGS_VERSION, RELATED_VERSION]
+
 
 @login_required
+@cache_page_versions('image_detail', detail_versions)
 def image_detail(request, entry_id):
     """Show detailed view of an entry with all its images"""
     entry = get_object_or_404(Entry, id=entry_id)
@@ -11,13 +24,24 @@ def image_detail(request, entry_id):
     # Get all images for this entry, ordered by primary first, then upload date
     images = entry.images.all()
     
-    # Get related entries (same publisher or range, excluding current entry)
-    related_entries = Entry.objects.filter(
-        Q(publisher=entry.publisher) | Q(range=entry.range)
-    ).exclude(id=entry.id)[:6]
+    # Related entries ranked by tag similarity, precomputed by rebuild_related_entries
+    related_entries = [
+        related.related for related in
+        RelatedEntry.objects.filter(entry=entry)
+        .select_related('related')
+        .prefetch_related('related__images')[:RELATED_ENTRY_LIMIT]
+    ]
+    if not related_entries:
+        # Not precomputed yet (e.g. a new entry) - score its tag neighbourhood now
+        related_entries = related_entries_for(entry)
+    if not related_entries:
+        # Untagged entry: fall back to same publisher or range
+        related_entries = Entry.objects.filter(
+            Q(publisher=entry.publisher) | Q(range=entry.range)
+        ).exclude(id=entry.id).prefetch_related('images')[:RELATED_ENTRY_LIMIT]
 
     user_prints = entry.user_prints.all()
-    stl_files = entry.stl_files.all()
+    stl_files = entry.stl_files.prefetch_related('members')
     print_files = entry.print_files.all()
     
     return render(request, 'image_details/detail.html', {
@@ -1,13 +1,16 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
-from .models import Entry, Image, PrintFile, STLFile, UserPrintImage
+from unfold.contrib.filters.admin import AutocompleteSelectFilter
+from .models import ArchiveMember, Entry, FileRename, Image, PrintFile, STLFile, UserPrintImage
 
 @admin.register(Entry)
 class EntryAdmin(ModelAdmin):
     list_display = ['name', 'publisher', 'range', 'upload_date']
-    list_filter = ['publisher', 'range', 'upload_date', 'tags']
+    # Tags are picked by search rather than listing the whole vocabulary
+    list_filter = ['publisher', 'range', 'upload_date', ('tags', AutocompleteSelectFilter)]
+    list_filter_submit = True
     search_fields = ['name', 'publisher', 'range', 'notes']
-    filter_horizontal = ['tags']
+    autocomplete_fields = ['tags']
     ordering = ['-upload_date']
     
     fieldsets = (
@@ -50,10 +53,13 @@ EntryAdmin.inlines = [ImageInline, STLFileInline, PrintFileInline, UserPrintInli
 
 @admin.register(Image)
 class ImageAdmin(ModelAdmin):
-    list_display = ['__str__', 'entry', 'is_primary', 'upload_date']
-    list_filter = ['is_primary', 'upload_date', 'entry__publisher', 'entry__range']
+    list_display = ['__str__', 'entry', 'is_primary', 'is_generated', 'upload_date']
+    list_filter = ['is_primary', 'is_generated', 'upload_date', 'entry__publisher', 'entry__range']
     search_fields = ['entry__name', 'entry__publisher', 'entry__range']
     ordering = ['-upload_date']
+    # __str__ and the entry column both read the entry
+    list_select_related = ['entry']
+    autocomplete_fields = ['entry', 'generated_from']
     
     fieldsets = (
         ('Entry Association', {
@@ -62,6 +68,10 @@ class ImageAdmin(ModelAdmin):
         ('File Information', {
             'fields': ('image', 'is_primary')
         }),
+        ('Generated Preview', {
+            'fields': ('is_generated', 'generated_from'),
+            'classes': ('collapse',)
+        }),
         ('Denormalized Metadata', {
             'fields': ('name', 'publisher', 'range'),
             'description': 'These fields are copied from the Entry for filename generation.'
@@ -69,12 +79,22 @@ class ImageAdmin(ModelAdmin):
     )
 
 
+class ArchiveMemberInline(admin.TabularInline):
+    model = ArchiveMember
+    extra = 0
+    fields = ['path', 'extension', 'size', 'compressed_size', 'crc']
+    readonly_fields = fields
+    can_delete = False
+
 @admin.register(STLFile)
 class STLFileAdmin(ModelAdmin):
-    list_display = ['__str__', 'entry', 'uploaded_by', 'upload_date']
-    list_filter = ['upload_date', 'entry__publisher', 'entry__range']
+    list_display = ['__str__', 'entry', 'inspection_status', 'member_count', 'uploaded_by', 'upload_date']
+    list_filter = ['inspection_status', 'upload_date', 'entry__publisher', 'entry__range']
     search_fields = ['original_name', 'entry__name', 'entry__publisher', 'entry__range']
     ordering = ['-upload_date']
+    list_select_related = ['entry', 'uploaded_by']
+    autocomplete_fields = ['entry']
+    inlines = [ArchiveMemberInline]
 
 
 @admin.register(PrintFile)
@@ -83,6 +103,8 @@ class PrintFileAdmin(ModelAdmin):
     list_filter = ['upload_date', 'entry__publisher', 'entry__range']
     search_fields = ['original_name', 'entry__name', 'entry__publisher', 'entry__range']
     ordering = ['-upload_date']
+    list_select_related = ['entry', 'uploaded_by']
+    autocomplete_fields = ['entry']
 
 
 @admin.register(UserPrintImage)
@@ -91,3 +113,13 @@ class UserPrintImageAdmin(ModelAdmin):
     list_filter = ['upload_date', 'entry__publisher', 'entry__range']
     search_fields = ['original_name', 'entry__name', 'entry__publisher', 'entry__range']
     ordering = ['-upload_date']
+    list_select_related = ['entry', 'uploaded_by']
+    autocomplete_fields = ['entry']
+
+
+@admin.register(FileRename)
+class FileRenameAdmin(ModelAdmin):
+    list_display = ['old_name', 'new_name', 'model', 'entry', 'created_at']
+    search_fields = ['old_name', 'new_name', 'entry__name']
+    list_select_related = ['entry']
+    readonly_fields = ['entry', 'model', 'object_id', 'field', 'old_name', 'new_name', 'created_at']
@@ -5,31 +5,21 @@ These endpoints use HTTP Basic Authentication and can be called from standalone
 
 import json
 import os
-import re
 import uuid
 import base64
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST, require_http_methods
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_POST, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import authenticate
-from django.core.files.base import ContentFile
 from django.db import transaction
 from .models import Entry, Image
-from tags.models import Tag, TagType
-
-
-def to_camel_case(text):
-    """Convert text to camelCase format"""
-    if not text:
-        return "unknown"
-    words = re.split(r'[^a-zA-Z0-9]+', str(text).strip())
-    words = [word for word in words if word]
-    if not words:
-        return "unknown"
-    camel_case = words[0].lower()
-    for word in words[1:]:
-        camel_case += word.capitalize()
-    return camel_case
+from .naming import to_camel_case
+from .tasks import queue_upload_processing
+from tags.cache import current_version, tag_cache
+from tags.models import ImportMapping
+from tags.usage import add_usage
+from collection.stats import recount_tags
 
 
 def require_basic_auth(view_func):
@@ -122,29 +112,45 @@ def api_check_duplicate(request):
         })
 
 
+def tags_etag(request):
+    """Strong ETag of the tag vocabulary, from its version counter."""
+    return f'tags-v{current_version()}'
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 @require_basic_auth
+@condition(etag_func=tags_etag)
 def api_get_tags(request):
     """
     Get all existing tags grouped by tag type.
     GET /upload/api/get-tags/
-    Returns: {"success": true, "tags": {"Publisher": ["Tag1", "Tag2"], "Faction Tag": [...]}}
+    Returns: {"success": true, "version": 12, "tags": {"Publisher": ["Tag1", "Tag2"], "Faction Tag": [...]},
+              "untyped": ["Tag3"]}
+    The response carries an ETag; send it back in If-None-Match to get
+    304 Not Modified while the vocabulary is unchanged.
     """
     try:
-        # Get all tag types
-        tag_types = TagType.objects.all()
-        
-        tags_by_type = {}
-        for tag_type in tag_types:
-            # Get all tags for this type
-            tags = Tag.objects.filter(tag_type=tag_type).values_list('name', flat=True)
-            tags_by_type[tag_type.name] = list(tags)
+        # Served from the vocabulary cache, which is reloaded only when the
+        # version changes, so an unchanged vocabulary costs no tag queries
+        tag_cache.refresh()
+        tags_by_type = {tag_type_name: [] for tag_type_name in tag_cache.tag_types}
+        untyped = []
+        for tag in tag_cache.tags.values():
+            if tag.tag_type_id is None:
+                untyped.append(tag.name)
+            else:
+                tags_by_type.setdefault(tag.tag_type.name, []).append(tag.name)
         
-        return JsonResponse({
+        response = JsonResponse({
             'success': True,
-            'tags': tags_by_type
+            'version': tag_cache.version,
+            'tags': tags_by_type,
+            'untyped': untyped
         })
+        # Clients may keep the response but must revalidate it
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -152,6 +158,32 @@ def api_get_tags(request):
         }, status=500)
 
 
+@csrf_exempt
+@require_http_methods(["GET"])
+@require_basic_auth
+def api_import_mappings(request):
+    """
+    List the active import column mappings.
+    GET /upload/api/import-mappings/
+    Returns: {"success": true, "mappings": [{"column": "GW Alternative", "tag_type": "GW Alternative",
+              "delimiter": ";", "normalization": "none", "collapse_whitespace": true}, ...]}
+    """
+    mappings = ImportMapping.objects.filter(is_active=True).select_related('tag_type')
+    return JsonResponse({
+        'success': True,
+        'mappings': [
+            {
+                'column': mapping.column,
+                'tag_type': mapping.tag_type.name,
+                'delimiter': mapping.delimiter,
+                'normalization': mapping.normalization,
+                'collapse_whitespace': mapping.collapse_whitespace,
+            }
+            for mapping in mappings
+        ]
+    })
+
+
 @csrf_exempt
 @require_POST
 @require_basic_auth
@@ -164,13 +196,15 @@ def api_create_entry(request):
         "publisher": "Publisher Name",
         "range": "Range Name",
         "folder_location": "Original folder path",
+        "row": {"Faction Tag": "Tag2", "GW Alternative": "Tag4; Tag5"},
         "tags": {
             "Publisher": ["Tag1"],
-            "Faction Tag": ["Tag2"],
-            "Army Role": ["Tag3"],
-            "GW Alternative": ["Tag4", "Tag5"]
+            "Army Role": ["Tag3"]
         }
     }
+    Keys of "row" (raw CSV values) and "tags" (lists of names) are import
+    columns, mapped to tag types by the Import Mappings set up in the admin
+    (see GET /upload/api/import-mappings/). Unmapped columns are ignored.
     Returns: {"success": true, "entry_id": 123, "entry_name": "...", "tags_assigned": 5}
     """
     try:
@@ -179,7 +213,8 @@ def api_create_entry(request):
         publisher = data.get('publisher', '').strip()
         range_name = data.get('range', '').strip()
         folder_location = data.get('folder_location', '').strip()
-        tags_data = data.get('tags', {})
+        row_data = data.get('row') or {}
+        tags_data = data.get('tags') or {}
         
         if not name:
             return JsonResponse({
@@ -210,45 +245,22 @@ def api_create_entry(request):
                 folder_location=folder_location or None
             )
             
-            # Tag type configurations
-            tag_type_configs = {
-                'Publisher': {'color': '#3498db', 'sort_order': 10},
-                'Faction Tag': {'color': '#e74c3c', 'sort_order': 20},
-                'Army Role': {'color': '#2ecc71', 'sort_order': 30},
-                'GW Alternative': {'color': '#f39c12', 'sort_order': 40}
-            }
-            
-            all_tags = []
-            
-            # Create or get tags
-            for tag_type_name, config in tag_type_configs.items():
-                # Get or create tag type
-                tag_type, _ = TagType.objects.get_or_create(
-                    name=tag_type_name,
-                    defaults={
-                        'description': f'{tag_type_name} tags',
-                        'color': config['color'],
-                        'sort_order': config['sort_order'],
-                        'is_active': True,
-                        'show_in_gallery': True,
-                        'set_at_upload': True
-                    }
-                )
-                
-                # Get tag names for this type
-                tag_names = tags_data.get(tag_type_name, [])
-                for tag_name in tag_names:
-                    tag_name = tag_name.strip()
-                    if tag_name:
-                        tag, _ = Tag.objects.get_or_create(
-                            name=tag_name,
-                            defaults={'tag_type': tag_type}
-                        )
-                        all_tags.append(tag)
+            # Columns are mapped to tag types by the ImportMapping table; known
+            # tags come from the vocabulary cache, missing ones are created in
+            # one query and everything is linked in another
+            tag_cache.refresh()
+            mapper = tag_cache.row_mapper
+            names_by_type = mapper.map({**row_data, **tags_data})
+            all_tags = list(tag_cache.resolve_tags(names_by_type, mapper.tag_types).values())
+            # Tags are bulk-created without signals
+            transaction.on_commit(recount_tags)
             
             # Assign tags to entry
-            if all_tags:
-                entry.tags.add(*all_tags)
+            Entry.tags.through.objects.bulk_create(
+                [Entry.tags.through(entry_id=entry.id, tag_id=tag.id) for tag in all_tags]
+            )
+            # bulk_create sends no m2m_changed, so count the new links here
+            add_usage([tag.id for tag in all_tags])
             
             return JsonResponse({
                 'success': True,
@@ -327,15 +339,15 @@ def api_upload_image(request):
             is_primary=is_primary
         )
         
-        # Save file (this will also save the model because save=True)
-        file_content = uploaded_file.read()
-        image.image.save(new_filename, ContentFile(file_content), save=True)
+        # Stream the file to storage (this will also save the model because save=True)
+        image.image.save(new_filename, uploaded_file, save=True)
         
         return JsonResponse({
             'success': True,
             'image_id': image.id,
             'filename': new_filename,
-            'is_primary': image.is_primary
+            'is_primary': image.is_primary,
+            'job_ids': queue_upload_processing(image)
         }, status=201)
         
     except Exception as e:
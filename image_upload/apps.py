@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
 
 
 class ImageUploadConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'image_upload'
+
+    def ready(self):
+        # Stored files are removed after the deleting transaction commits
+        from .file_cleanup import connect_file_cleanup
+        from .models import Image, PrintFile, STLFile, UserPrintImage
+        connect_file_cleanup(Image, STLFile, PrintFile, UserPrintImage)
+
+        # Entry sizes come from archive members, which go with their STLFile
+        from .tasks import stl_file_deleted
+        post_delete.connect(stl_file_deleted, sender=STLFile, dispatch_uid='entry_size_stl_file_deleted')
@@ -0,0 +1,160 @@
+"""
+Readers that list and read the members of uploaded STL archives.
+
+Zip is handled by the standard library. Other formats are pluggable:
+register a reader class for its extensions with @register_reader. The 7z
+and rar readers below are only active when their optional packages
+(py7zr, rarfile) are installed.
+"""
+import os
+import struct
+import zipfile
+from collections import namedtuple
+
+import numpy as np
+
+ArchiveMemberInfo = namedtuple('ArchiveMemberInfo', ['path', 'size', 'compressed_size', 'crc'])
+
+
+class ArchiveError(Exception):
+    """The archive is corrupt or cannot be read by its reader."""
+
+
+_readers = {}
+
+
+def register_reader(*extensions):
+    """Register an archive reader class for the given file extensions."""
+    def decorator(reader_class):
+        for extension in extensions:
+            _readers[extension.lower()] = reader_class
+        return reader_class
+    return decorator
+
+
+def get_reader(filename):
+    """Return a reader instance for `filename`, or None if the format is unsupported."""
+    extension = os.path.splitext(filename)[1].lower()
+    reader_class = _readers.get(extension)
+    if reader_class is None or not reader_class.is_available():
+        return None
+    return reader_class()
+
+
+class ArchiveReader:
+    """Base class for archive readers; `fileobj` is a seekable binary file."""
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def list_members(self, fileobj):
+        """Yield an ArchiveMemberInfo for every regular file in the archive."""
+        raise NotImplementedError
+
+    def read_members(self, fileobj, paths, local_path=None):
+        """
+        Yield (path, data) for the requested members, where data is a
+        bytes-like object. `local_path` is the archive's path on disk when
+        the storage has one.
+        """
+        raise NotImplementedError
+
+
+@register_reader('.zip')
+class ZipReader(ArchiveReader):
+    def list_members(self, fileobj):
+        try:
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    yield ArchiveMemberInfo(info.filename, info.file_size, info.compress_size, f'{info.CRC:08x}')
+        except zipfile.BadZipFile as exc:
+            raise ArchiveError(str(exc)) from exc
+
+    def read_members(self, fileobj, paths, local_path=None):
+        # Stored (uncompressed) members of an archive on disk are memory-mapped
+        # in place; compressed ones have to be inflated into memory.
+        try:
+            with zipfile.ZipFile(fileobj) as archive:
+                for path in paths:
+                    info = archive.getinfo(path)
+                    if info.compress_type == zipfile.ZIP_STORED and local_path and info.file_size:
+                        yield path, self._map_stored_member(fileobj, info, local_path)
+                    else:
+                        yield path, archive.read(info)
+        except (zipfile.BadZipFile, KeyError) as exc:
+            raise ArchiveError(str(exc)) from exc
+
+    @staticmethod
+    def _map_stored_member(fileobj, info, local_path):
+        fileobj.seek(info.header_offset)
+        header = fileobj.read(zipfile.sizeFileHeader)
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        data_offset = info.header_offset + zipfile.sizeFileHeader + name_length + extra_length
+        return np.memmap(local_path, dtype=np.uint8, mode='r', offset=data_offset, shape=(info.file_size,))
+
+
+try:
+    import py7zr
+except ImportError:  # pragma: no cover - optional dependency
+    py7zr = None
+
+
+@register_reader('.7z')
+class SevenZipReader(ArchiveReader):
+    @classmethod
+    def is_available(cls):
+        return py7zr is not None
+
+    def list_members(self, fileobj):
+        try:
+            with py7zr.SevenZipFile(fileobj, 'r') as archive:
+                for info in archive.list():
+                    if info.is_directory:
+                        continue
+                    crc = f'{info.crc32:08x}' if info.crc32 is not None else ''
+                    yield ArchiveMemberInfo(info.filename, info.uncompressed, info.compressed, crc)
+        except py7zr.Bad7zFile as exc:
+            raise ArchiveError(str(exc)) from exc
+
+    def read_members(self, fileobj, paths, local_path=None):
+        try:
+            with py7zr.SevenZipFile(fileobj, 'r') as archive:
+                for path, data in archive.read(list(paths)).items():
+                    yield path, data.getbuffer()
+        except py7zr.Bad7zFile as exc:
+            raise ArchiveError(str(exc)) from exc
+
+
+try:
+    import rarfile
+except ImportError:  # pragma: no cover - optional dependency
+    rarfile = None
+
+
+@register_reader('.rar')
+class RarReader(ArchiveReader):
+    @classmethod
+    def is_available(cls):
+        return rarfile is not None
+
+    def list_members(self, fileobj):
+        try:
+            with rarfile.RarFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    yield ArchiveMemberInfo(info.filename, info.file_size, info.compress_size, f'{info.CRC:08x}')
+        except rarfile.Error as exc:
+            raise ArchiveError(str(exc)) from exc
+
+    def read_members(self, fileobj, paths, local_path=None):
+        try:
+            with rarfile.RarFile(fileobj) as archive:
+                for path in paths:
+                    yield path, archive.read(path)
+        except rarfile.Error as exc:
+            raise ArchiveError(str(exc)) from exc
+
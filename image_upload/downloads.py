@@ -0,0 +1,229 @@
+"""
+File download backends.
+
+Views check permissions and then call serve_file(); the configured backend
+decides how the bytes reach the client:
+
+- 'django' (default): served by Django, with Range/If-Range support and 206
+  partial responses. The open file is handed to the WSGI server's
+  wsgi.file_wrapper positioned at the range start, so servers that support
+  it (gunicorn, uWSGI) transmit it with sendfile(2) instead of copying it
+  through Python.
+- 'nginx': an empty response with X-Accel-Redirect pointing at an internal
+  location (FILE_DOWNLOAD_INTERNAL_PREFIX) that maps to MEDIA_ROOT.
+- 'sendfile': an empty response with X-Sendfile carrying the absolute path,
+  for Apache mod_xsendfile and lighttpd.
+
+FILE_DOWNLOAD_BACKEND may also be the dotted path of a callable with the
+same signature as the backends below.
+
+Whole entries (or ranges of entries) are downloaded as one streamed zip,
+see bundle_response().
+"""
+import logging
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from django.utils.module_loading import import_string
+
+from .zipstream import ZipStream
+
+logger = logging.getLogger(__name__)
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Read-only view of `length` bytes of an open file starting at `start`."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # Lets the WSGI server sendfile() from the current offset for Content-Length bytes
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Return the (start, end) inclusive byte range requested by a single-range
+    Range header, None to serve the whole file, or False if unsatisfiable.
+    """
+    match = RANGE_PATTERN.match(header.replace(' ', ''))
+    if not match or not any(match.groups()):
+        # Malformed or multi-range requests may be answered with the full body
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        # An empty file has no last bytes to serve
+        if suffix == 0 or size == 0:
+            return False
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _validators(fieldfile):
+    """ETag and Last-Modified timestamp for a stored file (timestamp may be None)."""
+    try:
+        modified = int(fieldfile.storage.get_modified_time(fieldfile.name).timestamp())
+    except (NotImplementedError, OSError):
+        modified = None
+    etag = f'"{fieldfile.size:x}-{modified or 0:x}"'
+    return etag, modified
+
+
+def _if_range_matches(header, etag, modified):
+    if header.startswith('"') or header.startswith('W/'):
+        # Weak validators never match for If-Range
+        return header == etag
+    timestamp = parse_http_date_safe(header)
+    return timestamp is not None and modified is not None and timestamp == modified
+
+
+def _content_type(filename):
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+def django_backend(request, fieldfile, filename):
+    size = fieldfile.size
+    etag, modified = _validators(fieldfile)
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header:
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range or _if_range_matches(if_range, etag, modified):
+            byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range is None:
+        response = FileResponse(fieldfile.open('rb'), as_attachment=True, filename=filename)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(fieldfile.open('rb'), start, end - start + 1),
+            status=206,
+            content_type=_content_type(filename),
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    return response
+
+
+def _offloaded_response(filename):
+    response = HttpResponse(content_type=_content_type(filename))
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def nginx_backend(request, fieldfile, filename):
+    response = _offloaded_response(filename)
+    prefix = getattr(settings, 'FILE_DOWNLOAD_INTERNAL_PREFIX', '/protected-media/')
+    response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(fieldfile.name)
+    return response
+
+
+def sendfile_backend(request, fieldfile, filename):
+    response = _offloaded_response(filename)
+    response['X-Sendfile'] = fieldfile.path
+    return response
+
+
+BACKENDS = {
+    'django': django_backend,
+    'nginx': nginx_backend,
+    'sendfile': sendfile_backend,
+}
+
+
+def get_backend():
+    name = getattr(settings, 'FILE_DOWNLOAD_BACKEND', 'django')
+    return BACKENDS.get(name) or import_string(name)
+
+
+def serve_file(request, fieldfile, filename=None):
+    """Return a download response for a stored file; permission checks are up to the caller."""
+    return get_backend()(request, fieldfile, filename or fieldfile.name.rsplit('/', 1)[-1])
+
+
+# Related file sets of an Entry and the folder each goes to inside a bundle
+BUNDLE_FOLDERS = [
+    ('stl_files', 'file', 'STL Files'),
+    ('print_files', 'file', 'Print Files'),
+    ('images', 'image', 'Images'),
+    ('user_prints', 'image', 'User Prints'),
+]
+
+_UNSAFE_PATH_CHARACTERS = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+def _safe_path_part(text):
+    return _UNSAFE_PATH_CHARACTERS.sub('_', str(text or '')).strip(' .') or 'unnamed'
+
+
+def build_bundle(entries, per_entry_folder=False):
+    """
+    Return a ZipStream with every file of the given entries. The entries'
+    file relations should be prefetched.
+    """
+    bundle = ZipStream()
+    for entry in entries:
+        prefix = f'{_safe_path_part(entry.name)}/' if per_entry_folder else ''
+        for relation, field, folder in BUNDLE_FOLDERS:
+            for item in getattr(entry, relation).all():
+                fieldfile = getattr(item, field)
+                if not fieldfile:
+                    continue
+                try:
+                    size = fieldfile.size
+                except OSError:
+                    logger.warning('Skipping missing file %s in bundle of entry %s', fieldfile.name, entry.id)
+                    continue
+                filename = getattr(item, 'original_name', '') or os.path.basename(fieldfile.name)
+                bundle.add(
+                    f'{prefix}{folder}/{_safe_path_part(filename)}',
+                    size,
+                    lambda fieldfile=fieldfile: fieldfile.storage.open(fieldfile.name, 'rb'),
+                    timezone.localtime(item.upload_date),
+                )
+    return bundle
+
+
+def bundle_response(entries, filename, per_entry_folder=False):
+    """Stream a zip of the entries' files with a precomputed Content-Length."""
+    bundle = build_bundle(entries, per_entry_folder)
+    response = StreamingHttpResponse(iter(bundle), content_type='application/zip')
+    response['Content-Length'] = len(bundle)
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
@@ -0,0 +1,109 @@
+"""
+Deferred removal of stored files when their rows are deleted.
+
+A post_delete handler on every model with file fields registers the files
+with transaction.on_commit, so nothing is removed if the surrounding
+transaction rolls back. Once committed, the files are handed to a background
+thread that unlinks them in batches, which keeps large (cascading) deletes
+from blocking the request on thousands of synchronous unlinks. Pending
+deletions are flushed at interpreter exit.
+
+Set FILE_DELETION_ASYNC = False to unlink in the committing thread instead.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import models, transaction
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 500
+
+
+class FileDeleter:
+    """Background worker that deletes (storage, name) pairs."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def schedule(self, files):
+        if not getattr(settings, 'FILE_DELETION_ASYNC', True):
+            self._delete_batch(files)
+            return
+        for item in files:
+            self._queue.put(item)
+        self._ensure_thread()
+
+    def flush(self):
+        """Block until every scheduled file has been deleted."""
+        self._queue.join()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='file-deleter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < DELETE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._delete_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _delete_batch(files):
+        for storage, name in files:
+            try:
+                storage.delete(name)
+            except Exception:
+                logger.exception('Could not delete stored file %s', name)
+
+    def drain(self):
+        """Delete whatever is still queued in the calling thread (used at exit)."""
+        files = []
+        while True:
+            try:
+                files.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._delete_batch(files)
+        for _ in files:
+            self._queue.task_done()
+
+
+deleter = FileDeleter()
+atexit.register(deleter.drain)
+
+
+def delete_files_on_commit(sender, instance, using, **kwargs):
+    """post_delete receiver: remove the instance's stored files after commit."""
+    files = []
+    for field in sender._meta.concrete_fields:
+        if isinstance(field, models.FileField):
+            fieldfile = getattr(instance, field.attname)
+            if fieldfile:
+                files.append((fieldfile.storage, fieldfile.name))
+    if files:
+        transaction.on_commit(lambda: deleter.schedule(files), using=using)
+
+
+def connect_file_cleanup(*model_classes):
+    for model_class in model_classes:
+        models.signals.post_delete.connect(
+            delete_files_on_commit,
+            sender=model_class,
+            dispatch_uid=f'delete_files_on_commit:{model_class._meta.label}',
+        )
@@ -0,0 +1,52 @@
+"""
+Image folder scanning for local imports.
+
+Kept free of Django imports so the functions can run in worker processes
+(including spawned ones on Windows) without configuring Django there.
+"""
+import os
+
+from PIL import Image as PILImage, UnidentifiedImageError
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif'}
+
+
+def scan_image_folder(folder_path):
+    """
+    List and validate the images of one import folder (not recursive).
+
+    Returns (images, errors): `images` is a sorted list of readable image
+    paths, `errors` a list of messages for the folder and unreadable files.
+    """
+    if not folder_path:
+        return [], ['Folder path is required']
+    if not os.path.isdir(folder_path):
+        return [], [f'Folder does not exist: {folder_path}']
+
+    try:
+        with os.scandir(folder_path) as entries:
+            candidates = sorted(
+                entry.path for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            )
+    except OSError as exc:
+        # An unreadable folder fails its own row, not the whole import
+        return [], [f'Cannot read folder {folder_path}: {exc}']
+
+    images, errors = [], []
+    for path in candidates:
+        try:
+            # verify() catches corrupt structure, load() decodes the pixels
+            # and catches truncated data
+            with PILImage.open(path) as picture:
+                picture.verify()
+            with PILImage.open(path) as picture:
+                picture.load()
+        except (OSError, SyntaxError, UnidentifiedImageError) as exc:
+            errors.append(f'Unreadable image {os.path.basename(path)}: {exc}')
+            continue
+        images.append(path)
+
+    if not candidates:
+        errors.append(f'No image files found in: {folder_path}')
+    return images, errors
@@ -0,0 +1,172 @@
+"""
+Django management command to find (and optionally delete) orphaned media:
+files under MEDIA_ROOT that no FileField/ImageField row references, plus
+rows whose file is missing from disk.
+
+Referenced paths are loaded from every model with a file field in batches
+and kept as 64-bit hashes, and MEDIA_ROOT is walked lazily with os.scandir,
+so memory stays bounded by the number of rows rather than path lengths or
+the size of the tree. Candidates are re-checked against the database right
+before deletion, and recently modified files are never touched, so uploads
+in progress are safe. Both names of every pending FileRename journal row
+count as referenced: a moved file keeps its old mtime, and the journal needs
+it to complete or roll back an interrupted rename.
+
+Usage:
+    python manage.py cleanup_media
+    python manage.py cleanup_media --delete
+    python manage.py cleanup_media --delete --min-age 48
+"""
+
+import hashlib
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.template.defaultfilters import filesizeformat
+
+from image_upload.models import FileRename
+
+BATCH_SIZE = 2000
+
+
+def path_key(name):
+    """Compact, fixed-size key for a storage path."""
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def file_fields():
+    """Yield (model, field name) for every concrete file field in the project."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field.name
+
+
+def referenced_names(model, field_name):
+    queryset = model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+    return queryset.values_list('pk', field_name).iterator(chunk_size=BATCH_SIZE)
+
+
+def journal_names(names=None):
+    """Old and new names of pending file renames (only those in `names` if given)."""
+    renames = FileRename.objects.all()
+    if names is not None:
+        renames = renames.filter(models.Q(old_name__in=names) | models.Q(new_name__in=names))
+    for old_name, new_name in renames.values_list('old_name', 'new_name').iterator(chunk_size=BATCH_SIZE):
+        yield old_name
+        yield new_name
+
+
+def walk_files(root):
+    """Yield (relative path, DirEntry) for every regular file below root, depth first."""
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield os.path.relpath(entry.path, root).replace(os.sep, '/'), entry
+
+
+class Command(BaseCommand):
+    help = 'Report and delete media files not referenced by the database, and rows whose file is missing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Delete orphaned files (default is a dry run)',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=float,
+            default=24,
+            help='Only treat files older than this many hours as orphans (default 24)',
+        )
+
+    def handle(self, *args, **options):
+        root = str(settings.MEDIA_ROOT)
+        if not os.path.isdir(root):
+            raise CommandError(f'MEDIA_ROOT "{root}" does not exist')
+        fields = list(file_fields())
+        cutoff = time.time() - options['min_age'] * 3600
+
+        referenced = set()
+        for model, field_name in fields:
+            for _, name in referenced_names(model, field_name):
+                referenced.add(path_key(name))
+        self.stdout.write(f'Loaded {len(referenced)} referenced path(s) from {len(fields)} file field(s)')
+        # Kept apart from `referenced` so they are not reported as missing
+        journaled = {path_key(name) for name in journal_names()}
+
+        orphans = orphan_bytes = deleted = skipped_recent = 0
+        candidates = []
+        for name, entry in walk_files(root):
+            key = path_key(name)
+            if key in referenced:
+                # Whatever is left in the set afterwards is missing from disk
+                referenced.discard(key)
+                continue
+            if key in journaled:
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                skipped_recent += 1
+                continue
+            orphans += 1
+            orphan_bytes += stat.st_size
+            self.stdout.write(f'orphan   {filesizeformat(stat.st_size):>10}  {name}')
+            if options['delete']:
+                candidates.append((name, entry.path))
+                if len(candidates) >= BATCH_SIZE:
+                    deleted += self.delete_unreferenced(candidates, fields)
+                    candidates = []
+        if candidates:
+            deleted += self.delete_unreferenced(candidates, fields)
+
+        missing = 0
+        if referenced:
+            for model, field_name in fields:
+                for pk, name in referenced_names(model, field_name):
+                    if path_key(name) in referenced:
+                        missing += 1
+                        self.stdout.write(f'missing  {model._meta.label}#{pk}.{field_name}  {name}')
+
+        self.stdout.write('')
+        self.stdout.write(f'Orphaned files: {orphans} ({filesizeformat(orphan_bytes)})')
+        self.stdout.write(f'Missing files: {missing}')
+        if skipped_recent:
+            self.stdout.write(f'Skipped {skipped_recent} unreferenced file(s) newer than {options["min_age"]:g} hour(s)')
+        if options['delete']:
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} orphaned file(s).'))
+        elif orphans:
+            self.stdout.write(self.style.WARNING('Dry run - use --delete to remove orphaned files.'))
+
+    def delete_unreferenced(self, candidates, fields):
+        """Delete candidate files, skipping any that became referenced since the scan started."""
+        names = [name for name, _ in candidates]
+        still_referenced = set()
+        for model, field_name in fields:
+            still_referenced.update(
+                model._default_manager.filter(**{f'{field_name}__in': names}).values_list(field_name, flat=True)
+            )
+        still_referenced.update(journal_names(names))
+
+        deleted = 0
+        for name, path in candidates:
+            if name in still_referenced:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            deleted += 1
+        return deleted
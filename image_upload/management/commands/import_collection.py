@@ -0,0 +1,242 @@
+"""
+Django management command to import a collection CSV directly from local
+folders, without going through the HTTP API.
+
+Reads the same CSV format as "Manual Scripts/bulk_import_standalone.py"
+(Name, Folder path, Publisher, Range, plus tag columns). Tag columns are
+mapped to tag types by the Import Mappings configured in the admin.
+Image folders are scanned and every image is decoded and validated in a
+process pool; entries, tags and images are then written in batched
+transactions. After each committed batch the last imported CSV row is saved
+to a checkpoint file, so an interrupted import continues where it stopped
+when run again.
+
+Usage:
+    python manage.py import_collection import.csv
+    python manage.py import_collection import.csv --workers 8 --batch-size 200
+    python manage.py import_collection import.csv --restart
+"""
+
+import csv
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from collection.stats import rebuild_stats
+from image_upload.folder_scan import scan_image_folder
+from image_upload.models import Entry, Image, range_slug_for
+from image_upload.naming import to_camel_case
+from image_upload.tasks import queue_upload_processing
+from ranges.summary import dirty_ranges
+from stl_collection.page_cache import COLLECTION_VERSION, TAGS_VERSION, bump_versions_on_commit
+from tags.cache import tag_cache
+from tags.usage import recount_usage
+
+REQUIRED_COLUMNS = ['Name', 'Folder path', 'Publisher', 'Range']
+
+
+def entry_key(name, publisher, range_name):
+    """Case-insensitive identity used for duplicate detection."""
+    return (name or '').strip().lower(), (publisher or '').strip().lower(), (range_name or '').strip().lower()
+
+
+class Command(BaseCommand):
+    help = 'Import entries and images from a CSV of local folders, in parallel and resumable'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the import CSV')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes used to scan and validate image folders (default: CPU count)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='CSV rows written per transaction (default 100)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file (default: <csv_file>.checkpoint)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and start from the first row',
+        )
+
+    def handle(self, *args, **options):
+        csv_path = os.path.abspath(options['csv_file'])
+        checkpoint_path = options['checkpoint'] or f'{csv_path}.checkpoint'
+        batch_size = max(options['batch_size'], 1)
+
+        tag_cache.refresh()
+        self.mapper = tag_cache.row_mapper
+        rows = self.read_rows(csv_path)
+        completed_row = 0 if options['restart'] else self.load_checkpoint(checkpoint_path, csv_path)
+        pending = [row for row in rows if row['_row_number'] > completed_row]
+        if completed_row:
+            self.stdout.write(f'Resuming after CSV row {completed_row} ({len(pending)} row(s) left)')
+        self.stdout.write(f'Importing {len(pending)} of {len(rows)} row(s) with {options["workers"]} worker(s)')
+
+        self.existing = set(
+            entry_key(*values) for values in Entry.objects.values_list('name', 'publisher', 'range').iterator()
+        )
+        self.totals = {'created': 0, 'duplicates': 0, 'errors': 0, 'images': 0}
+
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            # All folders are queued up front, so the pool keeps scanning ahead
+            # while batches are written; results come back in row order
+            scans = pool.map(scan_image_folder, [row['Folder path'].strip() for row in pending], chunksize=4)
+            batch = []
+            for row, scan in zip(pending, scans):
+                batch.append((row, scan))
+                if len(batch) == batch_size or row is pending[-1]:
+                    self.import_batch(batch)
+                    self.save_checkpoint(checkpoint_path, csv_path, row['_row_number'])
+                    batch = []
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"Created {self.totals['created']} entries with {self.totals['images']} images, "
+            f"skipped {self.totals['duplicates']} duplicate(s), {self.totals['errors']} row(s) with errors"
+        )
+        if self.totals['errors']:
+            self.stdout.write(self.style.WARNING('Import completed with some errors.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Import completed successfully!'))
+
+    def read_rows(self, csv_path):
+        if not os.path.exists(csv_path):
+            raise CommandError(f'CSV file not found: {csv_path}')
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as handle:
+            reader = csv.DictReader(handle)
+            if not reader.fieldnames:
+                raise CommandError('CSV file is empty or has no header row')
+            missing = set(REQUIRED_COLUMNS) - set(reader.fieldnames)
+            if missing:
+                raise CommandError(f'CSV is missing required columns: {", ".join(sorted(missing))}')
+            unmapped = [column for column in self.mapper.columns if column not in reader.fieldnames]
+            if unmapped:
+                self.stdout.write(self.style.WARNING(f'CSV has no column for import mapping(s): {", ".join(unmapped)}'))
+            rows = []
+            for row_number, row in enumerate(reader, start=2):
+                row['_row_number'] = row_number
+                rows.append(row)
+        return rows
+
+    def load_checkpoint(self, checkpoint_path, csv_path):
+        if not os.path.exists(checkpoint_path):
+            return 0
+        with open(checkpoint_path, 'r', encoding='utf-8') as handle:
+            checkpoint = json.load(handle)
+        if checkpoint.get('csv') != csv_path:
+            raise CommandError(f'Checkpoint {checkpoint_path} belongs to {checkpoint.get("csv")}; use --restart')
+        return checkpoint.get('completed_row', 0)
+
+    def save_checkpoint(self, checkpoint_path, csv_path, completed_row):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        temporary_path = f'{checkpoint_path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as handle:
+            json.dump({'csv': csv_path, 'completed_row': completed_row}, handle)
+        os.replace(temporary_path, checkpoint_path)
+
+    def import_batch(self, scanned_rows):
+        """Create the entries, tags and images of one batch in a single transaction."""
+        accepted = []
+        for row, (images, errors) in scanned_rows:
+            row_number = row['_row_number']
+            name = row['Name'].strip()
+            key = entry_key(name, row['Publisher'], row['Range'])
+            if not name:
+                errors = ['Name is required'] + errors
+            if not name or not images:
+                self.totals['errors'] += 1
+                self.stdout.write(self.style.ERROR(f'Row {row_number}: ' + '; '.join(errors)))
+                continue
+            if key in self.existing:
+                self.totals['duplicates'] += 1
+                self.stdout.write(f'Row {row_number}: skipped duplicate {name}')
+                continue
+            for error in errors:
+                self.stdout.write(self.style.WARNING(f'Row {row_number}: {error}'))
+            self.existing.add(key)
+            accepted.append((row, images))
+
+        if not accepted:
+            return
+
+        stored_names = []
+        try:
+            with transaction.atomic():
+                entries = Entry.objects.bulk_create([
+                    Entry(
+                        name=row['Name'].strip(),
+                        publisher=row['Publisher'].strip() or None,
+                        range=row['Range'].strip() or None,
+                        range_slug=range_slug_for(row['Range']),
+                        folder_location=row['Folder path'].strip() or None,
+                    )
+                    for row, _ in accepted
+                ])
+
+                # Tags missing from the vocabulary are created in one query per batch
+                row_tags = [self.mapper.map(row) for row, _ in accepted]
+                names_by_type = {}
+                for tag_names_by_type in row_tags:
+                    for tag_type_name, tag_names in tag_names_by_type.items():
+                        names_by_type.setdefault(tag_type_name, []).extend(tag_names)
+                tag_cache.refresh()
+                tags = tag_cache.resolve_tags(names_by_type, self.mapper.tag_types)
+
+                entry_tags = []
+                images = []
+                for entry, (row, paths), tag_names_by_type in zip(entries, accepted, row_tags):
+                    tag_ids = {tags[tag_name].id for tag_names in tag_names_by_type.values() for tag_name in tag_names}
+                    entry_tags += [Entry.tags.through(entry_id=entry.id, tag_id=tag_id) for tag_id in tag_ids]
+                    images += self.store_images(entry, paths, stored_names)
+                Entry.tags.through.objects.bulk_create(entry_tags, ignore_conflicts=True)
+                images = Image.objects.bulk_create(images)
+                for image in images:
+                    queue_upload_processing(image)
+                # bulk_create sends no signals, so recount the touched ranges and tags explicitly
+                recount_usage({entry_tag.tag_id for entry_tag in entry_tags})
+                dirty_ranges.add(entry_ids=[entry.id for entry in entries])
+                bump_versions_on_commit(COLLECTION_VERSION, TAGS_VERSION)
+                transaction.on_commit(rebuild_stats)
+        except Exception:
+            # Nothing was committed; drop the copies made for this batch
+            for storage, name in stored_names:
+                storage.delete(name)
+            raise
+
+        for entry, (row, paths) in zip(entries, accepted):
+            self.stdout.write(f'Row {row["_row_number"]}: created {entry.name} with {len(paths)} images')
+        self.totals['created'] += len(entries)
+        self.totals['images'] += len(images)
+
+    def store_images(self, entry, paths, stored_names):
+        """Copy an entry's images to storage and return unsaved Image rows (first is primary)."""
+        prefix = f'{to_camel_case(entry.publisher)}_{to_camel_case(entry.range)}_{to_camel_case(entry.name)}'
+        images = []
+        for index, path in enumerate(paths):
+            _, ext = os.path.splitext(path)
+            image = Image(
+                entry=entry,
+                name=entry.name,
+                publisher=entry.publisher,
+                range=entry.range,
+                is_primary=(index == 0),
+            )
+            with open(path, 'rb') as handle:
+                image.image.save(f'{prefix}_{uuid.uuid4().hex[:8]}{ext}', File(handle), save=False)
+            stored_names.append((image.image.storage, image.image.name))
+            images.append(image)
+        return images
@@ -0,0 +1,37 @@
+"""
+Django management command to queue archive inspection for STL files,
+e.g. archives uploaded before the content index existed.
+
+Usage:
+    python manage.py inspect_archives
+    python manage.py inspect_archives --all
+"""
+
+from django.core.management.base import BaseCommand
+from jobs.registry import enqueue
+from image_upload.models import STLFile
+
+
+class Command(BaseCommand):
+    help = 'Queue background inspection of STL archives to index their contents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-inspect archives that are already indexed',
+        )
+
+    def handle(self, *args, **options):
+        stl_files = STLFile.objects.all()
+        if not options['all']:
+            stl_files = stl_files.exclude(inspection_status=STLFile.INSPECTION_INDEXED)
+
+        queued = 0
+        for stl_file_id in stl_files.values_list('id', flat=True).iterator():
+            enqueue('image_upload.inspect_archive', stl_file_id=stl_file_id)
+            queued += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Queued {queued} archive(s) for inspection. Run "manage.py run_jobs" to process them.')
+        )
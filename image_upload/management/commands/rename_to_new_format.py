@@ -9,10 +9,10 @@ Usage:
 """
 
 import os
-import re
 from django.core.management.base import BaseCommand, CommandError
 from django.core.files.base import ContentFile
 from image_upload.models import Image
+from image_upload.naming import to_camel_case
 
 
 class Command(BaseCommand):
@@ -122,22 +122,6 @@ class Command(BaseCommand):
                 self.style.SUCCESS('All files have been successfully renamed to the new format!')
             )
 
-    def to_camel_case(self, text):
-        """Convert text to camelCase format"""
-        if not text:
-            return "unknown"
-        # Remove special characters and split by spaces/underscores/hyphens
-        words = re.split(r'[^a-zA-Z0-9]+', str(text).strip())
-        # Filter out empty strings
-        words = [word for word in words if word]
-        if not words:
-            return "unknown"
-        # First word lowercase, rest title case
-        camel_case = words[0].lower()
-        for word in words[1:]:
-            camel_case += word.capitalize()
-        return camel_case
-
     def generate_new_filename(self, image_obj):
         """Generate new filename in the format: publisher_range_name_initial.ext"""
         # Get file extension
@@ -147,9 +131,9 @@ class Command(BaseCommand):
             ext = '.jpg'  # Default extension
         
         # Create new filename using camelCase format
-        publisher = self.to_camel_case(image_obj.publisher)
-        range_name = self.to_camel_case(image_obj.range)
-        name = self.to_camel_case(image_obj.name)
+        publisher = to_camel_case(image_obj.publisher)
+        range_name = to_camel_case(image_obj.range)
+        name = to_camel_case(image_obj.name)
         
         # Create filename in format: publisher_range_name_initial.ext
         new_filename = f"{publisher}_{range_name}_{name}_initial{ext}"
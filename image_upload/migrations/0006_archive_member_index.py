@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_upload', '0005_add_hashes_and_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stlfile',
+            name='inspected_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stlfile',
+            name='inspection_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('indexed', 'Indexed'), ('unsupported', 'Unsupported format'), ('failed', 'Unreadable archive')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='stlfile',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ArchiveMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024)),
+                ('extension', models.CharField(blank=True, db_index=True, max_length=20)),
+                ('size', models.PositiveBigIntegerField()),
+                ('compressed_size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('crc', models.CharField(blank=True, max_length=8)),
+                ('stl_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='image_upload.stlfile')),
+            ],
+            options={
+                'ordering': ['stl_file', 'path'],
+                'indexes': [models.Index(fields=['stl_file', 'path'], name='archive_member_file_path_idx')],
+            },
+        ),
+    ]
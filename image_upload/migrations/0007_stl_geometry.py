@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_upload', '0006_archive_member_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivemember',
+            name='max_dimension',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivemember',
+            name='size_x',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivemember',
+            name='size_y',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivemember',
+            name='size_z',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivemember',
+            name='surface_area',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivemember',
+            name='triangle_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivemember',
+            name='volume',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='max_dimension_mm',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_upload', '0007_stl_geometry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='generated_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='previews', to='image_upload.stlfile'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='is_generated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
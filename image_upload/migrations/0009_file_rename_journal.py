@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_upload', '0008_generated_previews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileRename',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('field', models.CharField(max_length=50)),
+                ('old_name', models.CharField(max_length=1024)),
+                ('new_name', models.CharField(max_length=1024)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_renames', to='image_upload.entry')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
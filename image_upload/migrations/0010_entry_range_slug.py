@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:47
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def fill_range_slugs(apps, schema_editor):
+    Entry = apps.get_model('image_upload', 'Entry')
+    entries = list(Entry.objects.exclude(range__isnull=True).exclude(range__exact='').only('id', 'range'))
+    for entry in entries:
+        entry.range_slug = slugify(entry.range, allow_unicode=True)
+    Entry.objects.bulk_update(entries, ['range_slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_upload', '0009_file_rename_journal'),
+        ('tags', '0009_import_mapping'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='range_slug',
+            field=models.SlugField(allow_unicode=True, blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['range_slug', 'publisher', 'name'], name='entry_range_lookup'),
+        ),
+        migrations.RunPython(fill_range_slugs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_upload', '0010_entry_range_slug'),
+        ('tags', '0009_import_mapping'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['-upload_date', '-id'], name='entry_upload_order'),
+        ),
+    ]
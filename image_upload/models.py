@@ -17,18 +17,24 @@ class EntryUploadPath:
     def __init__(self, root_folder):
         self.root_folder = root_folder
 
-    def __call__(self, instance, filename):
-        entry = instance.entry
+    def directory(self, entry):
         publisher = _safe_entry_segment(getattr(entry, "publisher", None), "unknown-publisher")
         range_name = _safe_entry_segment(getattr(entry, "range", None), "unknown-range")
         name = _safe_entry_segment(getattr(entry, "name", None), "unknown-name")
+        return f"{self.root_folder}/{publisher}/{range_name}/{name}"
 
+    def __call__(self, instance, filename):
         safe_filename = get_valid_filename(filename)
         stem, ext = os.path.splitext(safe_filename)
         stem = slugify(stem) or "file"
         unique_id = uuid.uuid4().hex[:8]
 
-        return f"{self.root_folder}/{publisher}/{range_name}/{name}/{stem}_{unique_id}{ext.lower()}"
+        return f"{self.directory(instance.entry)}/{stem}_{unique_id}{ext.lower()}"
+
+
+def range_slug_for(range_name):
+    """URL and lookup key of a range name ('' for no range)."""
+    return slugify(range_name or '', allow_unicode=True)
 
 
 class Entry(models.Model):
@@ -41,6 +47,9 @@ class Entry(models.Model):
     range = models.CharField(max_length=255, blank=True, null=True)
     folder_location = models.CharField(max_length=500, blank=True, null=True)
     
+    # Normalized range for lookups and URLs, set on save (see range_slug_for)
+    range_slug = models.SlugField(max_length=255, blank=True, allow_unicode=True, editable=False)
+    
     # Metadata
     upload_date = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True, null=True)
@@ -48,17 +57,36 @@ class Entry(models.Model):
     # Many-to-many relationship with tags
     tags = models.ManyToManyField(Tag, blank=True)
     
+    # Largest bounding-box dimension over the entry's STL meshes, in mm
+    max_dimension_mm = models.FloatField(blank=True, null=True, db_index=True)
+    
     class Meta:
         ordering = ['-upload_date']
         verbose_name_plural = 'Entries'
+        indexes = [
+            models.Index(fields=['range_slug', 'publisher', 'name'], name='entry_range_lookup'),
+            # Gallery order, also walked by its cursor pagination
+            models.Index(fields=['-upload_date', '-id'], name='entry_upload_order'),
+        ]
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        self.range_slug = range_slug_for(self.range)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'range' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'range_slug'}
+        super().save(*args, **kwargs)
+    
     def get_display_image(self):
         """
         Returns the primary image, or the first uploaded image if no primary is set.
         """
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('images')
+        if prefetched is not None:
+            # Image ordering is primary first, then oldest first
+            return prefetched[0] if prefetched else None
         primary = self.images.filter(is_primary=True).first()
         if primary:
             return primary
@@ -75,6 +103,10 @@ class Image(models.Model):
     # File field for image files
     image = models.ImageField(upload_to='uploaded_images/')
     
+    # Derivatives generated in the background after upload
+    thumbnail = models.ImageField(upload_to='thumbnails/', max_length=255, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    
     # Denormalized fields for filename generation (copied from Entry)
     name = models.CharField(max_length=255)
     publisher = models.CharField(max_length=255, blank=True, null=True)
@@ -84,15 +116,39 @@ class Image(models.Model):
     is_primary = models.BooleanField(default=False)
     upload_date = models.DateTimeField(auto_now_add=True)
     
+    # Previews rendered from an STL archive rather than uploaded
+    is_generated = models.BooleanField(default=False)
+    generated_from = models.ForeignKey(
+        'STLFile', on_delete=models.SET_NULL, related_name='previews', null=True, blank=True
+    )
+    
     class Meta:
         ordering = ['-is_primary', 'upload_date']
     
     def __str__(self):
         return f"{self.entry.name} - Image {self.id}"
+    
+    @property
+    def display_url(self):
+        """Thumbnail URL once generated, otherwise the original image."""
+        if self.thumbnail:
+            return self.thumbnail.url
+        return self.image.url
 
 
 class STLFile(models.Model):
     """Represents an STL archive file associated with an Entry."""
+    INSPECTION_PENDING = 'pending'
+    INSPECTION_INDEXED = 'indexed'
+    INSPECTION_UNSUPPORTED = 'unsupported'
+    INSPECTION_FAILED = 'failed'
+    INSPECTION_CHOICES = [
+        (INSPECTION_PENDING, 'Pending'),
+        (INSPECTION_INDEXED, 'Indexed'),
+        (INSPECTION_UNSUPPORTED, 'Unsupported format'),
+        (INSPECTION_FAILED, 'Unreadable archive'),
+    ]
+
     entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name='stl_files')
     file = models.FileField(upload_to=EntryUploadPath('stlFiles'), max_length=255)
     original_name = models.CharField(max_length=255)
@@ -103,8 +159,14 @@ class STLFile(models.Model):
         blank=True,
         related_name='uploaded_stl_files'
     )
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     upload_date = models.DateTimeField(auto_now_add=True)
 
+    # Archive content index, filled in by the inspect_archive background task
+    inspection_status = models.CharField(max_length=20, choices=INSPECTION_CHOICES, default=INSPECTION_PENDING)
+    member_count = models.PositiveIntegerField(default=0)
+    inspected_at = models.DateTimeField(blank=True, null=True)
+
     class Meta:
         ordering = ['-upload_date']
 
@@ -112,6 +174,38 @@ class STLFile(models.Model):
         return f"{self.entry.name} - STL {self.original_name}"
 
 
+class ArchiveMember(models.Model):
+    """A file stored inside an STLFile archive, recorded when the archive is inspected."""
+    stl_file = models.ForeignKey(STLFile, on_delete=models.CASCADE, related_name='members')
+    path = models.CharField(max_length=1024)
+    extension = models.CharField(max_length=20, blank=True, db_index=True)
+    size = models.PositiveBigIntegerField()
+    compressed_size = models.PositiveBigIntegerField(blank=True, null=True)
+    crc = models.CharField(max_length=8, blank=True)
+
+    # Mesh statistics for .stl members (mm, mm² and mm³)
+    triangle_count = models.PositiveIntegerField(blank=True, null=True)
+    size_x = models.FloatField(blank=True, null=True)
+    size_y = models.FloatField(blank=True, null=True)
+    size_z = models.FloatField(blank=True, null=True)
+    max_dimension = models.FloatField(blank=True, null=True)
+    surface_area = models.FloatField(blank=True, null=True)
+    volume = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['stl_file', 'path']
+        indexes = [
+            models.Index(fields=['stl_file', 'path'], name='archive_member_file_path_idx'),
+        ]
+
+    def __str__(self):
+        return self.path
+
+    @property
+    def filename(self):
+        return self.path.rsplit('/', 1)[-1]
+
+
 class PrintFile(models.Model):
     """Represents a print file associated with an Entry."""
     entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name='print_files')
@@ -124,6 +218,7 @@ class PrintFile(models.Model):
         blank=True,
         related_name='uploaded_print_files'
     )
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     upload_date = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -145,6 +240,7 @@ class UserPrintImage(models.Model):
         blank=True,
         related_name='uploaded_user_prints'
     )
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     upload_date = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -152,3 +248,25 @@ class UserPrintImage(models.Model):
 
     def __str__(self):
         return f"{self.entry.name} - User Print {self.original_name}"
+
+
+class FileRename(models.Model):
+    """
+    Journal of a planned file move. Rows are written before any file is
+    touched and removed in the same transaction that stores the new names,
+    so a rename interrupted by a crash can be completed from the journal.
+    """
+    entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name='pending_renames')
+    model = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    field = models.CharField(max_length=50)
+    old_name = models.CharField(max_length=1024)
+    new_name = models.CharField(max_length=1024)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.old_name} -> {self.new_name}"
+
@@ -0,0 +1,22 @@
+"""
+Naming of stored files: entries' files are named after the camelCased
+publisher, range and entry name.
+"""
+import re
+
+
+def to_camel_case(text):
+    """Convert text to camelCase format"""
+    if not text:
+        return "unknown"
+    # Remove special characters and split by spaces/underscores/hyphens
+    words = re.split(r'[^a-zA-Z0-9]+', str(text).strip())
+    # Filter out empty strings
+    words = [word for word in words if word]
+    if not words:
+        return "unknown"
+    # First word lowercase, rest title case
+    camel_case = words[0].lower()
+    for word in words[1:]:
+        camel_case += word.capitalize()
+    return camel_case
@@ -0,0 +1,126 @@
+"""
+Renaming of stored files after an entry's name, publisher or range changes.
+
+Runs in the background worker (see tasks.rename_entry_files). Each pass:
+
+1. finishes any moves left in the FileRename journal by an interrupted run;
+2. plans the new name of every file of the entry and journals the moves;
+3. moves the files on disk;
+4. stores all new names with one bulk update per model and clears the
+   journal in the same transaction.
+
+Moving is idempotent (a journalled file found at its new name counts as
+moved), so re-running after a crash at any step converges.
+"""
+import os
+import uuid
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import transaction
+
+from stl_collection.page_cache import COLLECTION_VERSION, bump_versions_on_commit, entry_version
+from .models import EntryUploadPath, FileRename, Image, PrintFile, STLFile, UserPrintImage
+from .naming import to_camel_case
+
+# File fields renamed with the entry
+RENAMED_FIELDS = [
+    (Image, 'image'),
+    (STLFile, 'file'),
+    (PrintFile, 'file'),
+    (UserPrintImage, 'image'),
+]
+
+
+def _camel_case_prefix(entry):
+    return f'{to_camel_case(entry.publisher)}_{to_camel_case(entry.range)}_{to_camel_case(entry.name)}_'
+
+
+def target_name(entry, instance, field_name):
+    """New storage name for a file of `entry`, or None if it is already named for it."""
+    name = getattr(instance, field_name).name
+    directory, filename = os.path.split(name)
+    upload_to = instance._meta.get_field(field_name).upload_to
+
+    if isinstance(upload_to, EntryUploadPath):
+        # Entry metadata lives in the folders; the filename stays
+        new_name = f'{upload_to.directory(entry)}/{filename}'
+        return new_name if new_name != name else None
+
+    # Flat uploads are named publisher_range_name_<id>.ext in their current folder
+    prefix = _camel_case_prefix(entry)
+    if filename.startswith(prefix):
+        return None
+    _, ext = os.path.splitext(filename)
+    return '/'.join(filter(None, [directory, f'{prefix}{uuid.uuid4().hex[:8]}{ext}']))
+
+
+def plan_renames(entry):
+    """Journal the moves needed to bring every file of `entry` in line with its metadata."""
+    journal = []
+    for model, field_name in RENAMED_FIELDS:
+        for instance in model.objects.filter(entry=entry).exclude(**{field_name: ''}):
+            new_name = target_name(entry, instance, field_name)
+            if new_name:
+                journal.append(FileRename(
+                    entry=entry,
+                    model=model._meta.label,
+                    object_id=instance.pk,
+                    field=field_name,
+                    old_name=getattr(instance, field_name).name,
+                    new_name=new_name,
+                ))
+    FileRename.objects.bulk_create(journal)
+
+
+def _move(storage, old_name, new_name):
+    """Move a file between storage names; True if it is now at new_name."""
+    old_path, new_path = storage.path(old_name), storage.path(new_name)
+    if os.path.exists(old_path):
+        if os.path.exists(new_path):
+            return False
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        os.rename(old_path, new_path)
+        return True
+    # Already moved by an earlier, interrupted run
+    return os.path.exists(new_path)
+
+
+def apply_renames(renames):
+    """Move journalled files and store their new names. Returns (moved, failed) counts."""
+    moved = defaultdict(list)
+    failed = []
+    for rename in renames:
+        model = apps.get_model(rename.model)
+        storage = model._meta.get_field(rename.field).storage
+        try:
+            ok = _move(storage, rename.old_name, rename.new_name)
+        except OSError:
+            ok = False
+        (moved[(model, rename.field)] if ok else failed).append(rename)
+
+    with transaction.atomic():
+        for (model, field_name), group in moved.items():
+            instances = []
+            for rename in group:
+                instance = model(pk=rename.object_id)
+                setattr(instance, field_name, rename.new_name)
+                instances.append(instance)
+            model.objects.bulk_update(instances, [field_name])
+        # bulk_update sends no signals; cached pages still link the old names
+        entry_ids = {rename.entry_id for group in moved.values() for rename in group}
+        if entry_ids:
+            bump_versions_on_commit(COLLECTION_VERSION, *(entry_version(entry_id) for entry_id in entry_ids))
+        # Failed moves keep their old name, which still points at the file
+        FileRename.objects.filter(id__in=[rename.id for rename in renames]).delete()
+
+    return sum(len(group) for group in moved.values()), len(failed)
+
+
+def rename_entry_files(entry):
+    """Complete interrupted renames of `entry`, then rename its files for its current metadata."""
+    # Plans are made from the stored names, so unfinished moves go first
+    recovered, _ = apply_renames(list(FileRename.objects.filter(entry=entry)))
+    plan_renames(entry)
+    moved, failed = apply_renames(list(FileRename.objects.filter(entry=entry)))
+    return {'recovered': recovered, 'renamed': moved, 'failed': failed}
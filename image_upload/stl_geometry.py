@@ -0,0 +1,105 @@
+"""
+Geometry statistics for STL meshes.
+
+Binary STL is read through a NumPy structured dtype over the raw bytes
+(np.frombuffer / np.memmap), so no per-triangle Python work or copy of the
+file is needed. ASCII STL falls back to a regex scan of the vertex lines.
+Units are taken to be millimetres, the de-facto convention for STL.
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+
+BINARY_HEADER_SIZE = 80
+BINARY_TRIANGLE_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attributes', '<u2'),
+])
+
+ASCII_VERTEX_PATTERN = re.compile(
+    rb'vertex\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)'
+)
+
+MeshStats = namedtuple('MeshStats', ['triangle_count', 'size_x', 'size_y', 'size_z', 'surface_area', 'volume'])
+
+
+class GeometryError(Exception):
+    """The data is not a readable STL mesh."""
+
+
+def _binary_triangle_count(buffer):
+    """Triangle count from a binary header, or None if the size does not fit one."""
+    if len(buffer) < BINARY_HEADER_SIZE + 4:
+        return None
+    count = int(np.frombuffer(buffer, dtype='<u4', count=1, offset=BINARY_HEADER_SIZE)[0])
+    if BINARY_HEADER_SIZE + 4 + count * BINARY_TRIANGLE_DTYPE.itemsize > len(buffer):
+        return None
+    return count
+
+
+def load_triangles(data):
+    """
+    Return an (n, 3, 3) array of triangle vertices from STL bytes.
+    For binary STL this is a view into `data` (bytes, memoryview or memmap).
+    """
+    buffer = memoryview(data).cast('B')
+    count = _binary_triangle_count(buffer)
+
+    # Many binary exporters also start their header with "solid", so an exact
+    # size match wins over the ASCII keyword.
+    exact_binary = count is not None and (
+        len(buffer) == BINARY_HEADER_SIZE + 4 + count * BINARY_TRIANGLE_DTYPE.itemsize
+    )
+    if not exact_binary and bytes(buffer[:5]).lower() == b'solid':
+        vertices = ASCII_VERTEX_PATTERN.findall(buffer)
+        if vertices:
+            if len(vertices) % 3:
+                raise GeometryError('ASCII STL has an incomplete facet')
+            return np.array(vertices, dtype=np.float64).reshape(-1, 3, 3)
+
+    if count is None:
+        raise GeometryError('Not an STL file')
+    records = np.frombuffer(buffer, dtype=BINARY_TRIANGLE_DTYPE, count=count, offset=BINARY_HEADER_SIZE + 4)
+    return records['vertices']
+
+
+def mesh_stats(triangles):
+    """Triangle count, bounding box size, surface area and enclosed volume of a mesh."""
+    triangles = np.asarray(triangles)
+    finite = np.isfinite(triangles).all(axis=(1, 2))
+    if not finite.all():
+        triangles = triangles[finite]
+    if not len(triangles):
+        return MeshStats(0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    # Work per coordinate: contiguous 1-D float64 columns are much faster to
+    # reduce than strided (n, 3) rows, and float64 keeps the volume sum exact.
+    x, y, z = (triangles[:, :, axis].astype(np.float64) for axis in range(3))
+
+    # Edge vectors from the first vertex and their cross product
+    ux, uy, uz = x[:, 1] - x[:, 0], y[:, 1] - y[:, 0], z[:, 1] - z[:, 0]
+    vx, vy, vz = x[:, 2] - x[:, 0], y[:, 2] - y[:, 0], z[:, 2] - z[:, 0]
+    cx = uy * vz - uz * vy
+    cy = uz * vx - ux * vz
+    cz = ux * vy - uy * vx
+
+    surface_area = 0.5 * np.sqrt(cx * cx + cy * cy + cz * cz).sum()
+    # Sum of signed tetrahedra against the origin, a . (b x c) = a . ((b - a) x (c - a));
+    # exact for closed meshes
+    volume = abs((x[:, 0] * cx + y[:, 0] * cy + z[:, 0] * cz).sum()) / 6.0
+
+    return MeshStats(
+        int(len(triangles)),
+        float(x.max() - x.min()),
+        float(y.max() - y.min()),
+        float(z.max() - z.min()),
+        float(surface_area),
+        float(volume),
+    )
+
+
+def stl_stats(data):
+    """Parse STL bytes and return their MeshStats."""
+    return mesh_stats(load_triangles(data))
@@ -0,0 +1,147 @@
+"""
+CPU-only preview rendering of STL meshes.
+
+A small NumPy rasterizer: triangles are projected with a fixed isometric-style
+camera, flat shaded from their face normal and drawn through a z-buffer.
+Triangles are grouped by screen-space size so each group can be rasterized
+as one vectorized block of candidate pixels, in chunks of bounded memory.
+"""
+import time
+
+import numpy as np
+from PIL import Image as PILImage
+
+DEFAULT_SIZE = 512
+DEFAULT_MAX_TRIANGLES = 250_000
+MAX_CHUNK_PIXELS = 2_000_000  # candidate pixels evaluated at once
+
+BACKGROUND = (248, 249, 250)
+BASE_COLOR = np.array([120, 150, 190], dtype=np.float32)
+CAMERA_DIRECTION = np.array([1.0, -1.0, 0.8])  # front-right, above (STL is Z-up)
+LIGHT_DIRECTION = np.array([-0.4, 0.6, -1.0])  # in camera space, from the viewer's upper left
+
+
+class RenderTimeout(Exception):
+    """Rendering did not finish before its deadline."""
+
+
+def _camera_basis():
+    forward = -CAMERA_DIRECTION / np.linalg.norm(CAMERA_DIRECTION)
+    right = np.cross(forward, [0.0, 0.0, 1.0])
+    right /= np.linalg.norm(right)
+    up = np.cross(right, forward)
+    return np.stack([right, up, forward])
+
+
+def decimate(triangles, max_triangles):
+    """Keep the `max_triangles` largest triangles; small ones barely change a preview."""
+    if len(triangles) <= max_triangles:
+        return triangles
+    cross = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    squared_areas = np.einsum('ij,ij->i', cross, cross)
+    keep = np.argpartition(squared_areas, -max_triangles)[-max_triangles:]
+    return triangles[keep]
+
+
+def render_preview(triangles, size=DEFAULT_SIZE, max_triangles=DEFAULT_MAX_TRIANGLES, deadline=None):
+    """
+    Render an (n, 3, 3) triangle array to a size x size PIL image.
+    `deadline` is a time.monotonic() value after which RenderTimeout is raised.
+    """
+    # Filter and decimate in the source dtype; only the kept triangles are widened
+    triangles = np.asarray(triangles)
+    finite = np.isfinite(triangles).all(axis=(1, 2))
+    if not finite.all():
+        triangles = triangles[finite]
+    triangles = decimate(triangles, max_triangles).astype(np.float64)
+
+    canvas = np.empty((size * size, 3), dtype=np.uint8)
+    canvas[:] = BACKGROUND
+    if not len(triangles):
+        return PILImage.fromarray(canvas.reshape(size, size, 3))
+
+    # Camera space: x right, y up, z away from the viewer
+    view = triangles @ _camera_basis().T
+
+    # Flat shading, two-sided so inconsistent winding still lights up
+    normals = np.cross(view[:, 1] - view[:, 0], view[:, 2] - view[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    light = LIGHT_DIRECTION / np.linalg.norm(LIGHT_DIRECTION)
+    intensity = 0.3 + 0.7 * np.abs(normals @ light) / lengths
+
+    # Fit the projected mesh into the image with a small margin
+    points = view[:, :, :2].reshape(-1, 2)
+    low, high = points.min(axis=0), points.max(axis=0)
+    extent = max(high[0] - low[0], high[1] - low[1]) or 1.0
+    scale = size * 0.9 / extent
+    offset = (size - (high - low) * scale) / 2
+    screen_x = (view[:, :, 0] - low[0]) * scale + offset[0]
+    screen_y = size - ((view[:, :, 1] - low[1]) * scale + offset[1])  # image rows grow downwards
+    depth = view[:, :, 2]
+
+    shade_index = _rasterize(screen_x, screen_y, depth, size, deadline)
+    covered = shade_index >= 0
+    colors = np.clip(BASE_COLOR * intensity[:, None], 0, 255).astype(np.uint8)
+    canvas[covered] = colors[shade_index[covered]]
+    return PILImage.fromarray(canvas.reshape(size, size, 3))
+
+
+def _rasterize(xs, ys, depth, size, deadline):
+    """Return, per pixel, the index of the nearest covering triangle (or -1)."""
+    zbuffer = np.full(size * size, np.inf)
+    owner = np.full(size * size, -1, dtype=np.int64)
+
+    x_min = np.clip(np.floor(xs.min(axis=1)), 0, size - 1).astype(np.int64)
+    y_min = np.clip(np.floor(ys.min(axis=1)), 0, size - 1).astype(np.int64)
+    span = np.maximum(
+        np.ceil(xs.max(axis=1)) - x_min,
+        np.ceil(ys.max(axis=1)) - y_min,
+    ).clip(1, size).astype(np.int64)
+
+    # Double-area of each triangle; degenerate (zero-area) ones cover nothing
+    area = (xs[:, 1] - xs[:, 0]) * (ys[:, 2] - ys[:, 0]) - (ys[:, 1] - ys[:, 0]) * (xs[:, 2] - xs[:, 0])
+    visible = area != 0
+
+    # Bucket by power-of-two bounding box span so every block is (m, k, k)
+    bucket = np.ceil(np.log2(span)).astype(np.int64)
+    for level in np.unique(bucket[visible]):
+        window = min(int(2 ** level), size)
+        indices = np.nonzero(visible & (bucket == level))[0]
+        chunk = max(1, MAX_CHUNK_PIXELS // (window * window))
+        for start in range(0, len(indices), chunk):
+            if deadline is not None and time.monotonic() > deadline:
+                raise RenderTimeout('Preview rendering exceeded its time budget')
+            _rasterize_block(indices[start:start + chunk], window, xs, ys, depth, area,
+                             x_min, y_min, size, zbuffer, owner)
+    return owner
+
+
+def _rasterize_block(indices, window, xs, ys, depth, area, x_min, y_min, size, zbuffer, owner):
+    offsets = np.arange(window)
+    px = x_min[indices, None, None] + offsets[None, None, :]
+    py = y_min[indices, None, None] + offsets[None, :, None]
+    cx = px + 0.5
+    cy = py + 0.5
+
+    x0, x1, x2 = (xs[indices, vertex, None, None] for vertex in range(3))
+    y0, y1, y2 = (ys[indices, vertex, None, None] for vertex in range(3))
+
+    # Edge functions give barycentric weights scaled by the double-area
+    w0 = (x2 - x1) * (cy - y1) - (y2 - y1) * (cx - x1)
+    w1 = (x0 - x2) * (cy - y2) - (y0 - y2) * (cx - x2)
+    w2 = (x1 - x0) * (cy - y0) - (y1 - y0) * (cx - x0)
+    sign = np.sign(area[indices])[:, None, None]
+    inside = (w0 * sign >= 0) & (w1 * sign >= 0) & (w2 * sign >= 0) & (px < size) & (py < size)
+
+    block_area = area[indices][:, None, None]
+    z = (w0 * depth[indices, 0, None, None] + w1 * depth[indices, 1, None, None]
+         + w2 * depth[indices, 2, None, None]) / block_area
+
+    pixel = (py * size + px)[inside]
+    z = z[inside]
+    triangle = np.broadcast_to(indices[:, None, None], inside.shape)[inside]
+
+    np.minimum.at(zbuffer, pixel, z)
+    nearest = z <= zbuffer[pixel]
+    owner[pixel[nearest]] = triangle[nearest]
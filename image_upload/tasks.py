@@ -0,0 +1,293 @@
+"""
+Background tasks for uploaded files, run by the jobs worker.
+
+Upload views only store the file and its row; derivatives and hashes are
+produced here so large submissions return as soon as the bytes are saved.
+"""
+import hashlib
+import io
+import os
+import time
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image as PILImage, ImageOps
+
+from jobs.registry import enqueue, task
+from stl_collection.page_cache import COLLECTION_VERSION, bump_versions_on_commit, entry_version
+from .archives import ArchiveError, get_reader
+from .models import ArchiveMember, Entry, Image, PrintFile, STLFile, UserPrintImage
+from .naming import to_camel_case
+from .renames import rename_entry_files as rename_files_for_entry
+from .stl_geometry import GeometryError, load_triangles, stl_stats
+from .stl_render import RenderTimeout, render_preview
+
+THUMBNAIL_SIZE = (480, 480)
+HASH_CHUNK_SIZE = 1024 * 1024
+MEMBER_BATCH_SIZE = 1000
+GEOMETRY_FIELDS = ['triangle_count', 'size_x', 'size_y', 'size_z', 'max_dimension', 'surface_area', 'volume']
+
+# Field holding the uploaded file for each model
+FILE_FIELDS = {
+    Image: 'image',
+    STLFile: 'file',
+    PrintFile: 'file',
+    UserPrintImage: 'image',
+}
+
+
+def queue_upload_processing(instance):
+    """Queue background processing for a newly uploaded file. Returns the job ids."""
+    jobs = []
+    if isinstance(instance, Image):
+        jobs.append(enqueue('image_upload.generate_thumbnail', image_id=instance.pk))
+    elif isinstance(instance, STLFile):
+        jobs.append(enqueue('image_upload.inspect_archive', stl_file_id=instance.pk))
+    jobs.append(enqueue('image_upload.hash_file', model=instance._meta.label, pk=instance.pk))
+    return [job.id for job in jobs]
+
+
+@task('image_upload.generate_thumbnail')
+def generate_thumbnail(image_id):
+    """Create a downscaled JPEG thumbnail for an Image."""
+    image = Image.objects.filter(id=image_id).first()
+    if image is None or not image.image:
+        return {'skipped': True}
+
+    with image.image.open('rb') as source, PILImage.open(source) as picture:
+        thumbnail = ImageOps.exif_transpose(picture)
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        if thumbnail.mode not in ('RGB', 'L'):
+            thumbnail = thumbnail.convert('RGB')
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, format='JPEG', quality=85, optimize=True)
+
+    previous = image.thumbnail.name if image.thumbnail else None
+    stem, _ = os.path.splitext(os.path.basename(image.image.name))
+    image.thumbnail.save(f'{stem}_thumb.jpg', ContentFile(buffer.getvalue()), save=False)
+    Image.objects.filter(id=image_id).update(thumbnail=image.thumbnail.name)
+    # update() sends no signals; cached pages may still link the old thumbnail
+    bump_versions_on_commit(COLLECTION_VERSION, entry_version(image.entry_id))
+    if previous and previous != image.thumbnail.name:
+        image.thumbnail.storage.delete(previous)
+
+    return {'thumbnail': image.thumbnail.name}
+
+
+@task('image_upload.hash_file')
+def hash_file(model, pk):
+    """Store the SHA-256 of an uploaded file, read in chunks."""
+    model_class = apps.get_model(model)
+    instance = model_class.objects.filter(pk=pk).first()
+    if instance is None:
+        return {'skipped': True}
+
+    fieldfile = getattr(instance, FILE_FIELDS[model_class])
+    digest = hashlib.sha256()
+    with fieldfile.open('rb') as handle:
+        for chunk in handle.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+
+    model_class.objects.filter(pk=pk).update(sha256=digest.hexdigest())
+    return {'sha256': digest.hexdigest()}
+
+
+@task('image_upload.inspect_archive')
+def inspect_archive(stl_file_id):
+    """Record the member list (path, size, CRC, extension) of an STL archive."""
+    stl_file = STLFile.objects.filter(id=stl_file_id).first()
+    if stl_file is None:
+        return {'skipped': True}
+
+    reader = get_reader(stl_file.original_name or stl_file.file.name)
+    if reader is None:
+        STLFile.objects.filter(id=stl_file_id).update(
+            inspection_status=STLFile.INSPECTION_UNSUPPORTED,
+            inspected_at=timezone.now(),
+        )
+        return {'status': STLFile.INSPECTION_UNSUPPORTED}
+
+    try:
+        with stl_file.file.open('rb') as handle:
+            members = [
+                ArchiveMember(
+                    stl_file_id=stl_file_id,
+                    path=info.path[:1024],
+                    extension=os.path.splitext(info.path)[1].lower()[:20],
+                    size=info.size,
+                    compressed_size=info.compressed_size,
+                    crc=info.crc,
+                )
+                for info in reader.list_members(handle)
+            ]
+    except ArchiveError as exc:
+        # A corrupt archive will not get better on retry
+        STLFile.objects.filter(id=stl_file_id).update(
+            inspection_status=STLFile.INSPECTION_FAILED,
+            inspected_at=timezone.now(),
+        )
+        return {'status': STLFile.INSPECTION_FAILED, 'error': str(exc)}
+
+    with transaction.atomic():
+        ArchiveMember.objects.filter(stl_file_id=stl_file_id).delete()
+        ArchiveMember.objects.bulk_create(members, batch_size=MEMBER_BATCH_SIZE)
+        STLFile.objects.filter(id=stl_file_id).update(
+            inspection_status=STLFile.INSPECTION_INDEXED,
+            member_count=len(members),
+            inspected_at=timezone.now(),
+        )
+        if any(member.extension == '.stl' for member in members):
+            enqueue('image_upload.analyze_archive_geometry', stl_file_id=stl_file_id)
+        # The gallery search matches archive members
+        bump_versions_on_commit(COLLECTION_VERSION, entry_version(stl_file.entry_id))
+    return {'status': STLFile.INSPECTION_INDEXED, 'members': len(members)}
+
+
+def _local_path(fieldfile):
+    try:
+        return fieldfile.path
+    except NotImplementedError:
+        return None
+
+
+@task('image_upload.analyze_archive_geometry')
+def analyze_archive_geometry(stl_file_id):
+    """Compute mesh statistics for every .stl member of an indexed archive."""
+    stl_file = STLFile.objects.select_related('entry').filter(id=stl_file_id).first()
+    if stl_file is None:
+        return {'skipped': True}
+    reader = get_reader(stl_file.original_name or stl_file.file.name)
+    if reader is None:
+        return {'skipped': True}
+
+    max_member_size = getattr(settings, 'STL_ANALYSIS_MAX_MEMBER_SIZE', None)
+    members = {
+        member.path: member
+        for member in ArchiveMember.objects.filter(stl_file_id=stl_file_id, extension='.stl')
+        if not max_member_size or member.size <= max_member_size
+    }
+
+    analyzed = []
+    with stl_file.file.open('rb') as handle:
+        try:
+            for path, data in reader.read_members(handle, list(members), _local_path(stl_file.file)):
+                try:
+                    stats = stl_stats(data)
+                except GeometryError:
+                    continue
+                member = members[path]
+                member.triangle_count = stats.triangle_count
+                member.size_x, member.size_y, member.size_z = stats.size_x, stats.size_y, stats.size_z
+                member.max_dimension = max(stats.size_x, stats.size_y, stats.size_z)
+                member.surface_area = stats.surface_area
+                member.volume = stats.volume
+                analyzed.append(member)
+        except ArchiveError as exc:
+            return {'error': str(exc)}
+
+    with transaction.atomic():
+        ArchiveMember.objects.bulk_update(analyzed, GEOMETRY_FIELDS, batch_size=MEMBER_BATCH_SIZE)
+        largest = update_entry_size(stl_file.entry_id)
+        bump_versions_on_commit(COLLECTION_VERSION, entry_version(stl_file.entry_id))
+        if analyzed:
+            enqueue('image_upload.render_stl_preview', stl_file_id=stl_file_id)
+    return {'analyzed': len(analyzed), 'max_dimension_mm': largest}
+
+
+def update_entry_size(entry_id):
+    """Set Entry.max_dimension_mm to the largest analyzed member of its archives and return it."""
+    largest = ArchiveMember.objects.filter(
+        stl_file__entry_id=entry_id
+    ).aggregate(largest=Max('max_dimension'))['largest']
+    Entry.objects.filter(id=entry_id).update(max_dimension_mm=largest)
+    return largest
+
+
+def stl_file_deleted(sender, instance, **kwargs):
+    """post_delete receiver for STLFile: its members no longer count towards the entry size."""
+    update_entry_size(instance.entry_id)
+
+
+@task(
+    'image_upload.render_stl_preview',
+    max_attempts=1,
+    time_limit=getattr(settings, 'STL_PREVIEW_TIME_LIMIT', 120),
+    memory_limit=getattr(settings, 'STL_PREVIEW_MEMORY_LIMIT', None),
+)
+def render_stl_preview(stl_file_id):
+    """Render the largest STL in an archive and attach it to the entry as a generated image."""
+    stl_file = STLFile.objects.select_related('entry').filter(id=stl_file_id).first()
+    if stl_file is None:
+        return {'skipped': True}
+    reader = get_reader(stl_file.original_name or stl_file.file.name)
+    member = (
+        ArchiveMember.objects
+        .filter(stl_file_id=stl_file_id, extension='.stl', triangle_count__gt=0)
+        .order_by('-size')
+        .first()
+    )
+    if reader is None or member is None:
+        return {'skipped': True}
+
+    # Stop a little before the worker's hard limit so the job can report why
+    time_limit = getattr(settings, 'STL_PREVIEW_TIME_LIMIT', 120)
+    deadline = time.monotonic() + time_limit * 0.9
+    picture = None
+    try:
+        with stl_file.file.open('rb') as handle:
+            for _, data in reader.read_members(handle, [member.path], _local_path(stl_file.file)):
+                picture = render_preview(
+                    load_triangles(data),
+                    size=getattr(settings, 'STL_PREVIEW_SIZE', 512),
+                    deadline=deadline,
+                )
+    except (ArchiveError, GeometryError, RenderTimeout) as exc:
+        # None of these get better on retry
+        return {'error': str(exc)}
+    if picture is None:
+        return {'skipped': True}
+
+    buffer = io.BytesIO()
+    picture.save(buffer, format='PNG', optimize=True)
+
+    entry = stl_file.entry
+    filename = '_'.join([
+        to_camel_case(entry.publisher),
+        to_camel_case(entry.range),
+        to_camel_case(entry.name),
+        'render',
+        uuid.uuid4().hex[:8],
+    ]) + '.png'
+    image = Image(
+        entry=entry,
+        name=entry.name,
+        publisher=entry.publisher,
+        range=entry.range,
+        is_primary=False,
+        is_generated=True,
+        generated_from=stl_file,
+    )
+    image.image.save(filename, ContentFile(buffer.getvalue()), save=False)
+
+    with transaction.atomic():
+        # Files of the replaced previews are removed after commit
+        Image.objects.filter(generated_from=stl_file, is_generated=True).delete()
+        image.save()
+
+    enqueue('image_upload.generate_thumbnail', image_id=image.id)
+    return {'image_id': image.id, 'member': member.path, 'triangles': member.triangle_count}
+
+
+@task('image_upload.rename_entry_files')
+def rename_entry_files(entry_id):
+    """Rename an entry's stored files after its name, publisher or range changed."""
+    entry = Entry.objects.filter(id=entry_id).first()
+    if entry is None:
+        return {'skipped': True}
+    return rename_files_for_entry(entry)
+
@@ -1,10 +1,70 @@
+import base64
+import io
+import json
+import os
+import shutil
 import tempfile
+import zipfile
+from unittest import mock
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from .models import Entry, STLFile
+import numpy as np
+from jobs.worker import run_pending_jobs
+from PIL import Image as PILImage
+from tags.cache import tag_cache
+from tags.models import Tag, TagType
+
+from .downloads import parse_range
+from .management.commands.cleanup_media import Command as CleanupMediaCommand
+from .file_cleanup import deleter
+from .folder_scan import scan_image_folder
+from .models import ArchiveMember, Entry, FileRename, Image, PrintFile, STLFile, UserPrintImage
+from .stl_geometry import BINARY_TRIANGLE_DTYPE, stl_stats
+from .stl_render import render_preview
+from .tasks import inspect_archive, rename_entry_files
+
+
+def make_zip(members):
+	buffer = io.BytesIO()
+	with zipfile.ZipFile(buffer, 'w') as archive:
+		for name, data in members.items():
+			archive.writestr(name, data)
+	return buffer.getvalue()
+
+
+def make_box_stl(size_x, size_y, size_z, binary=True):
+	corners = np.array([
+		[0, 0, 0], [size_x, 0, 0], [size_x, size_y, 0], [0, size_y, 0],
+		[0, 0, size_z], [size_x, 0, size_z], [size_x, size_y, size_z], [0, size_y, size_z],
+	], dtype=np.float32)
+	faces = [
+		(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7), (0, 1, 5), (0, 5, 4),
+		(1, 2, 6), (1, 6, 5), (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7),
+	]
+	triangles = corners[np.array(faces)]
+	if not binary:
+		lines = [b'solid box']
+		for triangle in triangles:
+			lines += [b'facet normal 0 0 0', b'outer loop']
+			lines += [b'vertex %f %f %f' % tuple(vertex) for vertex in triangle]
+			lines += [b'endloop', b'endfacet']
+		return b'\n'.join(lines + [b'endsolid box'])
+	records = np.zeros(len(triangles), dtype=BINARY_TRIANGLE_DTYPE)
+	records['vertices'] = triangles
+	return b'solid exported as binary'.ljust(80) + np.uint32(len(triangles)).tobytes() + records.tobytes()
+
+
+def make_jpeg(size=(800, 600)):
+	buffer = io.BytesIO()
+	PILImage.new('RGB', size, (120, 30, 200)).save(buffer, format='JPEG')
+	return buffer.getvalue()
 
 
 @override_settings(MEDIA_ROOT=tempfile.gettempdir())
@@ -40,3 +100,578 @@ class STLFileTests(TestCase):
 
 		response = self.client.post(url, {'stl_files': upload})
 		self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.gettempdir())
+class UploadProcessingTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(
+			username='staff',
+			password='password123',
+			is_staff=True
+		)
+		self.entry = Entry.objects.create(name='Queued Model', publisher='Pub', range='Range')
+		self.client.login(username='staff', password='password123')
+
+	def test_added_images_are_processed_in_background(self):
+		upload = SimpleUploadedFile('photo.jpg', make_jpeg(), content_type='image/jpeg')
+		url = reverse('image_upload:add_images', args=[self.entry.id])
+
+		response = self.client.post(url, {'images': upload})
+		self.assertEqual(response.status_code, 200)
+		added = response.json()['images'][0]
+		self.assertEqual(len(added['job_ids']), 2)
+
+		image = Image.objects.get(id=added['id'])
+		self.assertFalse(image.thumbnail)
+		self.assertEqual(image.sha256, '')
+
+		run_pending_jobs()
+		image.refresh_from_db()
+		self.assertTrue(image.thumbnail.name.endswith('_thumb.jpg'))
+		self.assertEqual(len(image.sha256), 64)
+
+		status = self.client.get(reverse('jobs:status'), {'ids': ','.join(map(str, added['job_ids']))})
+		self.assertEqual({job['status'] for job in status.json()['jobs']}, {'succeeded'})
+
+
+@override_settings(MEDIA_ROOT=tempfile.gettempdir())
+class ArchiveIndexTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username='tester', password='password123')
+		self.entry = Entry.objects.create(name='Archived Model')
+
+	def create_stl_file(self, name, content):
+		return STLFile.objects.create(
+			entry=self.entry,
+			file=SimpleUploadedFile(name, content),
+			original_name=name,
+			uploaded_by=self.user
+		)
+
+	def test_zip_members_are_indexed_and_searchable(self):
+		stl_file = self.create_stl_file('parts.zip', make_zip({
+			'Hero/hero_body.stl': b'solid body',
+			'Hero/hero_sword.STL': b'solid sword',
+			'readme.txt': b'hello',
+		}))
+		result = inspect_archive(stl_file.id)
+		self.assertEqual(result['members'], 3)
+
+		stl_file.refresh_from_db()
+		self.assertEqual(stl_file.inspection_status, STLFile.INSPECTION_INDEXED)
+		sword = ArchiveMember.objects.get(path='Hero/hero_sword.STL')
+		self.assertEqual(sword.extension, '.stl')
+		self.assertEqual(sword.size, len(b'solid sword'))
+		self.assertEqual(len(sword.crc), 8)
+
+		self.client.login(username='tester', password='password123')
+		response = self.client.get(reverse('collection:gallery'), {'search': 'hero_sword'})
+		self.assertEqual(list(response.context['entries']), [self.entry])
+
+		response = self.client.get(reverse('image_details:detail', args=[self.entry.id]))
+		self.assertContains(response, 'Hero/hero_sword.STL')
+
+	def test_corrupt_archive_is_marked_failed(self):
+		stl_file = self.create_stl_file('broken.zip', b'not a zip')
+		inspect_archive(stl_file.id)
+		stl_file.refresh_from_db()
+		self.assertEqual(stl_file.inspection_status, STLFile.INSPECTION_FAILED)
+
+
+class STLGeometryTests(TestCase):
+	def test_binary_and_ascii_stats_match(self):
+		for binary in (True, False):
+			stats = stl_stats(make_box_stl(10, 20, 30, binary=binary))
+			self.assertEqual(stats.triangle_count, 12)
+			self.assertEqual((stats.size_x, stats.size_y, stats.size_z), (10, 20, 30))
+			self.assertAlmostEqual(stats.surface_area, 2200)
+			self.assertAlmostEqual(stats.volume, 6000)
+
+
+@override_settings(MEDIA_ROOT=tempfile.gettempdir(), JOBS_ISOLATE_LIMITED_TASKS=False)
+class ArchiveGeometryTests(TestCase):
+	def test_geometry_is_stored_and_filterable(self):
+		user = get_user_model().objects.create_user(username='tester', password='password123')
+		small = Entry.objects.create(name='Small')
+		large = Entry.objects.create(name='Large')
+		for entry, size in ((small, 25), (large, 120)):
+			buffer = io.BytesIO()
+			with zipfile.ZipFile(buffer, 'w') as archive:
+				# Stored members are memory-mapped, deflated ones are inflated
+				archive.writestr('box.stl', make_box_stl(size, 10, 10), compress_type=zipfile.ZIP_STORED)
+				archive.writestr('base.stl', make_box_stl(10, 10, 5), compress_type=zipfile.ZIP_DEFLATED)
+			stl_file = STLFile.objects.create(
+				entry=entry,
+				file=SimpleUploadedFile('models.zip', buffer.getvalue()),
+				original_name='models.zip'
+			)
+			inspect_archive(stl_file.id)
+		run_pending_jobs()
+
+		large.refresh_from_db()
+		self.assertAlmostEqual(large.max_dimension_mm, 120)
+		base = ArchiveMember.objects.get(stl_file__entry=large, path='base.stl')
+		self.assertEqual(base.triangle_count, 12)
+		self.assertAlmostEqual(base.volume, 500)
+
+		# The largest member is rendered into a generated, non-primary image
+		preview = large.images.get(is_generated=True)
+		self.assertFalse(preview.is_primary)
+		self.assertEqual(preview.generated_from.entry, large)
+		self.assertTrue(preview.thumbnail)
+
+		self.client.login(username='tester', password='password123')
+		response = self.client.get(reverse('collection:gallery'), {'max_size': '50'})
+		self.assertEqual(list(response.context['entries']), [small])
+
+		# Removing the archive removes its members from the entry size
+		large.stl_files.get().delete()
+		large.refresh_from_db()
+		self.assertIsNone(large.max_dimension_mm)
+
+
+class STLRenderTests(TestCase):
+	def test_render_draws_shaded_mesh_on_background(self):
+		triangles = np.frombuffer(make_box_stl(10, 20, 30)[84:], dtype=BINARY_TRIANGLE_DTYPE)['vertices']
+		picture = np.asarray(render_preview(triangles, size=64))
+		self.assertEqual(picture.shape, (64, 64, 3))
+		self.assertEqual(tuple(picture[0, 0]), (248, 249, 250))
+		self.assertNotEqual(tuple(picture[32, 32]), (248, 249, 250))
+		# Flat shading gives the visible faces different tones
+		self.assertGreaterEqual(len({tuple(pixel) for pixel in picture.reshape(-1, 3)}), 3)
+
+	def test_large_meshes_are_decimated(self):
+		triangles = np.random.default_rng(0).random((5000, 3, 3), dtype=np.float32)
+		picture = render_preview(triangles, size=32, max_triangles=100)
+		self.assertEqual(picture.size, (32, 32))
+
+
+@override_settings(MEDIA_ROOT=tempfile.gettempdir())
+class DownloadTests(TestCase):
+	def setUp(self):
+		get_user_model().objects.create_user(username='tester', password='password123')
+		self.client.login(username='tester', password='password123')
+		entry = Entry.objects.create(name='Dragon')
+		self.stl_file = STLFile.objects.create(
+			entry=entry,
+			file=SimpleUploadedFile('dragon.zip', b'0123456789'),
+			original_name='dragon.zip'
+		)
+		self.url = reverse('image_upload:download_stl_file', args=[entry.id, self.stl_file.id])
+
+	def test_range_requests_return_partial_content(self):
+		response = self.client.get(self.url)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response['Accept-Ranges'], 'bytes')
+		self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+		response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+		self.assertEqual(response.status_code, 206)
+		self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+		self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+		response = self.client.get(self.url, HTTP_RANGE='bytes=-3', HTTP_IF_RANGE=response['ETag'])
+		self.assertEqual(b''.join(response.streaming_content), b'789')
+
+		response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+		self.assertEqual(response.status_code, 416)
+		self.assertEqual(response['Content-Range'], 'bytes */10')
+
+	def test_suffix_range_of_empty_file_is_unsatisfiable(self):
+		self.assertFalse(parse_range('bytes=0-', 0))
+		self.assertFalse(parse_range('bytes=-5', 0))
+		self.assertEqual(parse_range('bytes=-5', 3), (0, 2))
+
+	def test_stale_if_range_returns_whole_file(self):
+		response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+	@override_settings(FILE_DOWNLOAD_BACKEND='nginx', FILE_DOWNLOAD_INTERNAL_PREFIX='/protected-media/')
+	def test_nginx_backend_offloads_transfer(self):
+		response = self.client.get(self.url)
+		self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.stl_file.file.name)
+		self.assertIn('dragon.zip', response['Content-Disposition'])
+		self.assertEqual(response.content, b'')
+
+	def test_entry_bundle_streams_valid_zip(self):
+		entry = self.stl_file.entry
+		entry.images.create(image=SimpleUploadedFile('box.jpg', make_jpeg()), name=entry.name)
+		STLFile.objects.create(entry=entry, file=SimpleUploadedFile('other.zip', b'abc'), original_name='dragon.zip')
+		response = self.client.get(reverse('image_upload:download_entry_bundle', args=[entry.id]))
+		body = b''.join(response.streaming_content)
+		self.assertEqual(int(response['Content-Length']), len(body))
+		with zipfile.ZipFile(io.BytesIO(body)) as archive:
+			self.assertIsNone(archive.testzip())
+			names = archive.namelist()
+			self.assertIn('STL Files/dragon.zip', names)
+			self.assertIn('STL Files/dragon (2).zip', names)
+			self.assertEqual(
+				{archive.read('STL Files/dragon.zip'), archive.read('STL Files/dragon (2).zip')},
+				{b'0123456789', b'abc'}
+			)
+			self.assertTrue(any(name.startswith('Images/') for name in names))
+
+
+class CleanupMediaTests(TestCase):
+	def test_reports_and_deletes_orphans_only(self):
+		media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media_root)
+		with override_settings(MEDIA_ROOT=media_root):
+			entry = Entry.objects.create(name='Dragon')
+			kept = STLFile.objects.create(
+				entry=entry,
+				file=SimpleUploadedFile('dragon.zip', b'data'),
+				original_name='dragon.zip'
+			)
+			missing = PrintFile.objects.create(
+				entry=entry,
+				file=SimpleUploadedFile('gone.3mf', b'data'),
+				original_name='gone.3mf'
+			)
+			os.remove(missing.file.path)
+			os.makedirs(os.path.join(media_root, 'stl_files', 'old'))
+			stray = os.path.join(media_root, 'stl_files', 'old', 'stray.zip')
+			with open(stray, 'wb') as handle:
+				handle.write(b'x' * 2048)
+
+			output = io.StringIO()
+			call_command('cleanup_media', '--min-age', '0', stdout=output)
+			self.assertIn('stl_files/old/stray.zip', output.getvalue())
+			self.assertIn(missing.file.name, output.getvalue())
+			self.assertTrue(os.path.exists(stray))
+
+			call_command('cleanup_media', '--delete', '--min-age', '0', stdout=io.StringIO())
+			self.assertFalse(os.path.exists(stray))
+			self.assertTrue(os.path.exists(kept.file.path))
+
+	def test_files_in_the_rename_journal_are_kept(self):
+		media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, media_root)
+		with override_settings(MEDIA_ROOT=media_root):
+			entry = Entry.objects.create(name='Dragon')
+			stl_file = STLFile.objects.create(
+				entry=entry,
+				file=SimpleUploadedFile('dragon.zip', b'data'),
+				original_name='dragon.zip'
+			)
+			# Moved on disk by a rename that has not committed its new name yet
+			new_name = os.path.dirname(stl_file.file.name) + '/renamed_dragon.zip'
+			os.rename(stl_file.file.path, os.path.join(media_root, new_name))
+			FileRename.objects.create(
+				entry=entry, model='image_upload.STLFile', object_id=stl_file.id,
+				field='file', old_name=stl_file.file.name, new_name=new_name
+			)
+
+			output = io.StringIO()
+			call_command('cleanup_media', '--delete', '--min-age', '0', stdout=output)
+			self.assertNotIn(new_name, output.getvalue())
+			self.assertTrue(os.path.exists(os.path.join(media_root, new_name)))
+
+			# The re-check before deleting sees the journal too
+			candidate = [(new_name, os.path.join(media_root, new_name))]
+			self.assertEqual(CleanupMediaCommand().delete_unreferenced(candidate, []), 0)
+			self.assertTrue(os.path.exists(os.path.join(media_root, new_name)))
+
+
+class FileCleanupTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root)
+
+	def test_files_are_deleted_only_after_commit(self):
+		with override_settings(MEDIA_ROOT=self.media_root):
+			entry = Entry.objects.create(name='Dragon')
+			stl_file = STLFile.objects.create(
+				entry=entry,
+				file=SimpleUploadedFile('dragon.zip', b'data'),
+				original_name='dragon.zip'
+			)
+			image = entry.images.create(image=SimpleUploadedFile('box.jpg', make_jpeg()), name=entry.name)
+			paths = [stl_file.file.path, image.image.path]
+
+			with self.captureOnCommitCallbacks() as callbacks:
+				entry.delete()
+			self.assertTrue(all(os.path.exists(path) for path in paths))
+
+			for callback in callbacks:
+				callback()
+			deleter.flush()
+			self.assertFalse(any(os.path.exists(path) for path in paths))
+
+	def test_rolled_back_delete_keeps_files(self):
+		with override_settings(MEDIA_ROOT=self.media_root):
+			entry = Entry.objects.create(name='Dragon')
+			stl_file = STLFile.objects.create(
+				entry=entry,
+				file=SimpleUploadedFile('dragon.zip', b'data'),
+				original_name='dragon.zip'
+			)
+			with self.captureOnCommitCallbacks(execute=True) as callbacks:
+				try:
+					with transaction.atomic():
+						entry.delete()
+						raise RuntimeError('abort')
+				except RuntimeError:
+					pass
+			self.assertEqual(callbacks, [])
+			self.assertTrue(os.path.exists(stl_file.file.path))
+
+
+class RenameEntryFilesTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root)
+		settings_override = override_settings(MEDIA_ROOT=self.media_root)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+		self.entry = Entry.objects.create(name='Old Dragon', publisher='Forge', range='Beasts')
+		self.stl_file = STLFile.objects.create(
+			entry=self.entry,
+			file=SimpleUploadedFile('dragon.zip', b'data'),
+			original_name='dragon.zip'
+		)
+		self.image = self.entry.images.create(
+			image=SimpleUploadedFile('forge_beasts_oldDragon_1234abcd.jpg', make_jpeg()),
+			name=self.entry.name
+		)
+
+	def test_files_follow_entry_metadata(self):
+		Entry.objects.filter(id=self.entry.id).update(name='New Dragon')
+		self.entry.refresh_from_db()
+		result = rename_entry_files(self.entry.id)
+		self.assertEqual(result['renamed'], 2)
+
+		self.stl_file.refresh_from_db()
+		self.image.refresh_from_db()
+		self.assertTrue(self.stl_file.file.name.startswith('stlFiles/forge/beasts/new-dragon/'))
+		self.assertTrue(self.image.image.name.startswith('uploaded_images/forge_beasts_newDragon_'))
+		self.assertTrue(os.path.exists(self.stl_file.file.path))
+		self.assertTrue(os.path.exists(self.image.image.path))
+		self.assertFalse(FileRename.objects.exists())
+
+	def test_cached_detail_page_links_the_renamed_files(self):
+		cache.clear()
+		get_user_model().objects.create_user(username='tester', password='password123')
+		self.client.login(username='tester', password='password123')
+		url = reverse('image_details:detail', args=[self.entry.id])
+		old_name = self.image.image.name
+		self.assertContains(self.client.get(url), old_name)
+
+		Entry.objects.filter(id=self.entry.id).update(name='New Dragon')
+		with self.captureOnCommitCallbacks(execute=True):
+			rename_entry_files(self.entry.id)
+		self.image.refresh_from_db()
+		response = self.client.get(url)
+		self.assertContains(response, self.image.image.name)
+		self.assertNotContains(response, old_name)
+
+	def test_interrupted_rename_is_completed_from_journal(self):
+		old_name = self.stl_file.file.name
+		new_name = 'stlFiles/elsewhere/' + os.path.basename(old_name)
+		FileRename.objects.create(
+			entry=self.entry, model='image_upload.STLFile', object_id=self.stl_file.id,
+			field='file', old_name=old_name, new_name=new_name
+		)
+		# The crash happened after the move but before the database update
+		os.makedirs(os.path.join(self.media_root, 'stlFiles', 'elsewhere'))
+		os.rename(self.stl_file.file.path, os.path.join(self.media_root, new_name))
+
+		result = rename_entry_files(self.entry.id)
+		self.assertEqual(result['recovered'], 1)
+		self.stl_file.refresh_from_db()
+		# Recovered, then moved back in line with the entry's metadata
+		self.assertTrue(self.stl_file.file.name.startswith('stlFiles/forge/beasts/old-dragon/'))
+		self.assertTrue(os.path.exists(self.stl_file.file.path))
+
+
+class ImportCollectionTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.source = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root)
+		self.addCleanup(shutil.rmtree, self.source)
+		settings_override = override_settings(MEDIA_ROOT=self.media_root)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+	def write_folder(self, name, files):
+		folder = os.path.join(self.source, name)
+		os.makedirs(folder)
+		for filename, data in files.items():
+			with open(os.path.join(folder, filename), 'wb') as handle:
+				handle.write(data)
+		return folder
+
+	def write_csv(self, rows):
+		path = os.path.join(self.source, 'import.csv')
+		with open(path, 'w', encoding='utf-8') as handle:
+			handle.write('Name,Folder path,Publisher,Range,Faction Tag,Army Role,GW Alternative\n')
+			for row in rows:
+				handle.write(','.join(row) + '\n')
+		return path
+
+	def test_unreadable_folder_is_reported_not_raised(self):
+		folder = self.write_folder('locked', {'a.jpg': make_jpeg()})
+		with mock.patch('image_upload.folder_scan.os.scandir', side_effect=PermissionError(13, 'Permission denied')):
+			images, errors = scan_image_folder(folder)
+		self.assertEqual(images, [])
+		self.assertEqual(len(errors), 1)
+		self.assertIn(f'Cannot read folder {folder}', errors[0])
+
+	def test_import_creates_entries_and_resumes_from_checkpoint(self):
+		dragon = self.write_folder('dragon', {'b.jpg': make_jpeg(), 'a.jpg': make_jpeg(), 'broken.jpg': b'nope'})
+		knight = self.write_folder('knight', {'k.png': make_jpeg()})
+		empty = self.write_folder('empty', {'notes.txt': b''})
+		csv_path = self.write_csv([
+			['Dragon', dragon, 'Forge', 'Beasts', 'Chaos', 'Monster', 'Drake;Wyrm'],
+			['Knight', knight, 'Forge', 'Heroes', '', '', ''],
+			['Nothing', empty, 'Forge', 'Beasts', '', '', ''],
+		])
+
+		output = io.StringIO()
+		call_command('import_collection', csv_path, '--workers', '2', '--batch-size', '2', stdout=output)
+		entry = Entry.objects.get(name='Dragon')
+		self.assertEqual(entry.images.count(), 2)
+		self.assertTrue(entry.images.get(is_primary=True).image.name.startswith('uploaded_images/forge_beasts_dragon_'))
+		self.assertEqual(
+			set(entry.tags.values_list('name', flat=True)),
+			{'Forge', 'Chaos', 'Monster', 'Drake', 'Wyrm'}
+		)
+		self.assertTrue(Entry.objects.filter(name='Knight').exists())
+		self.assertFalse(Entry.objects.filter(name='Nothing').exists())
+		self.assertIn('Unreadable image broken.jpg', output.getvalue())
+
+		# Everything is checkpointed, so a second run has nothing left to do
+		output = io.StringIO()
+		call_command('import_collection', csv_path, stdout=output)
+		self.assertIn('Importing 0 of 3 row(s)', output.getvalue())
+
+		# Without the checkpoint, existing entries are recognised as duplicates
+		call_command('import_collection', csv_path, '--restart', stdout=io.StringIO())
+		self.assertEqual(Entry.objects.count(), 2)
+
+
+class ImportApiTests(TestCase):
+	def setUp(self):
+		tag_cache.invalidate()
+		self.addCleanup(tag_cache.invalidate)
+		get_user_model().objects.create_user('importer', password='secret', is_staff=True)
+		self.auth = 'Basic ' + base64.b64encode(b'importer:secret').decode()
+
+	def create_entry(self, name, tags):
+		return self.client.post(
+			reverse('image_upload:api_create_entry'),
+			data=json.dumps({'name': name, 'publisher': 'Forge', 'range': 'Beasts', 'tags': tags}),
+			content_type='application/json',
+			HTTP_AUTHORIZATION=self.auth,
+		)
+
+	def test_tagging_uses_a_constant_number_of_queries(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			response = self.create_entry('Dragon', {'Publisher': ['Forge'], 'Faction Tag': ['Chaos']})
+		self.assertEqual(response.status_code, 201)
+
+		# Auth, duplicate check, savepoint, entry, collection stats, vocabulary
+		# version, tag insert, tag read-back, version bump and read-back, tag
+		# links, usage counts, release - however many tags
+		tags = {
+			'Publisher': ['Forge'],
+			'Faction Tag': ['Chaos'],
+			'Army Role': ['Monster'],
+			'GW Alternative': ['Drake', 'Wyrm', 'Hydra'],
+		}
+		with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(13):
+			response = self.create_entry('Wyvern', tags)
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(response.json()['tags_assigned'], 6)
+		entry = Entry.objects.get(name='Wyvern')
+		self.assertEqual(
+			set(entry.tags.values_list('name', flat=True)),
+			{'Forge', 'Chaos', 'Monster', 'Drake', 'Wyrm', 'Hydra'}
+		)
+		self.assertEqual(Tag.objects.get(name='Hydra').tag_type.name, 'GW Alternative')
+		self.assertEqual(Tag.objects.get(name='Forge').usage_count, 2)
+
+		# Known tags only: no tag queries besides the version check
+		with self.assertNumQueries(9):
+			response = self.create_entry('Hydra', tags)
+		self.assertEqual(response.status_code, 201)
+
+	def test_raw_row_values_are_mapped_to_tags(self):
+		response = self.client.post(
+			reverse('image_upload:api_create_entry'),
+			data=json.dumps({
+				'name': 'Dragon',
+				'row': {'Publisher': 'Forge', 'GW Alternative': 'Drake;Wyrm', 'Unmapped': 'Ignored'},
+			}),
+			content_type='application/json',
+			HTTP_AUTHORIZATION=self.auth,
+		)
+		self.assertEqual(response.status_code, 201)
+		entry = Entry.objects.get(name='Dragon')
+		self.assertEqual(set(entry.tags.values_list('name', flat=True)), {'Forge', 'Drake', 'Wyrm'})
+
+		response = self.client.get(reverse('image_upload:api_import_mappings'), HTTP_AUTHORIZATION=self.auth)
+		mappings = {mapping['column']: mapping for mapping in response.json()['mappings']}
+		self.assertEqual(mappings['GW Alternative']['delimiter'], ';')
+
+	def test_get_tags_revalidates_with_etag(self):
+		url = reverse('image_upload:api_get_tags')
+		untyped = Tag.objects.create(name='Loose')
+		Tag.objects.create(name='Forge', tag_type=TagType.objects.get(name='Publisher'))
+
+		response = self.client.get(url, HTTP_AUTHORIZATION=self.auth)
+		self.assertEqual(response.status_code, 200)
+		data = response.json()
+		self.assertEqual(data['tags']['Publisher'], ['Forge'])
+		self.assertEqual(data['tags']['Army Role'], [])
+		self.assertEqual(data['untyped'], ['Loose'])
+		etag = response['ETag']
+		self.assertFalse(etag.startswith('W/'))
+
+		with self.assertNumQueries(2):
+			response = self.client.get(url, HTTP_AUTHORIZATION=self.auth, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 304)
+
+		untyped.delete()
+		response = self.client.get(url, HTTP_AUTHORIZATION=self.auth, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response['ETag'], etag)
+		self.assertEqual(response.json()['untyped'], [])
+
+
+class AdminChangelistQueryTests(TestCase):
+	models = ['entry', 'image', 'stlfile', 'printfile', 'userprintimage', 'filerename']
+
+	def setUp(self):
+		self.user = get_user_model().objects.create_superuser('admin', password='secret')
+		self.client.force_login(self.user)
+		self.tags = [Tag.objects.create(name=f'Tag {number}') for number in range(3)]
+
+	def add_rows(self, count):
+		for _ in range(count):
+			number = Entry.objects.count()
+			entry = Entry.objects.create(name=f'Entry {number}', publisher=f'Publisher {number}', range='Range')
+			entry.tags.add(*self.tags)
+			Image.objects.create(entry=entry, image=f'uploaded_images/entry_{number}.jpg')
+			for model, field in ((STLFile, 'file'), (PrintFile, 'file'), (UserPrintImage, 'image')):
+				model.objects.create(entry=entry, original_name=f'entry_{number}', uploaded_by=self.user, **{field: f'files/entry_{number}'})
+			FileRename.objects.create(entry=entry, model='image', object_id=number, field='image', old_name='a', new_name='b')
+
+	def changelist_queries(self):
+		counts = {}
+		for model in self.models:
+			with CaptureQueriesContext(connection) as queries:
+				response = self.client.get(reverse(f'admin:image_upload_{model}_changelist'))
+			self.assertEqual(response.status_code, 200)
+			counts[model] = len(queries)
+		return counts
+
+	def test_query_count_does_not_grow_with_rows(self):
+		self.add_rows(2)
+		queries = self.changelist_queries()
+		self.add_rows(5)
+		self.assertEqual(self.changelist_queries(), queries)
@@ -17,11 +17,13 @@ urlpatterns = [
     path('entry/<int:entry_id>/print/<int:file_id>/download/', views.download_print_file, name='download_print_file'),
     path('entry/<int:entry_id>/add-user-prints/', views.add_user_prints, name='add_user_prints'),
     path('entry/<int:entry_id>/user-print/<int:image_id>/delete/', views.delete_user_print, name='delete_user_print'),
+    path('entry/<int:entry_id>/download/', views.download_entry_bundle, name='download_entry_bundle'),
     
     # API endpoints for bulk import
     path('api/health/', api_views.api_health, name='api_health'),
     path('api/check-duplicate/', api_views.api_check_duplicate, name='api_check_duplicate'),
     path('api/get-tags/', api_views.api_get_tags, name='api_get_tags'),
+    path('api/import-mappings/', api_views.api_import_mappings, name='api_import_mappings'),
     path('api/create-entry/', api_views.api_create_entry, name='api_create_entry'),
     path('api/upload-image/', api_views.api_upload_image, name='api_upload_image'),
 ]
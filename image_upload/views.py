@@ -2,10 +2,11 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.files.base import ContentFile
 from django.core.exceptions import ValidationError
-from django.http import FileResponse, JsonResponse
+from django.http import JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_POST
+from .downloads import bundle_response, serve_file
 from .forms import (
     EntryUploadForm,
     ALLOWED_PRINT_EXTENSIONS,
@@ -15,27 +16,12 @@ from .forms import (
     validate_file_size,
 )
 from .models import Entry, Image, PrintFile, STLFile, UserPrintImage
+from .naming import to_camel_case
+from .tasks import queue_upload_processing
 from tags.models import TagType
 import os
-import re
 import uuid
 
-def to_camel_case(text):
-    """Convert text to camelCase format"""
-    if not text:
-        return "unknown"
-    # Remove special characters and split by spaces/underscores/hyphens
-    words = re.split(r'[^a-zA-Z0-9]+', str(text).strip())
-    # Filter out empty strings
-    words = [word for word in words if word]
-    if not words:
-        return "unknown"
-    # First word lowercase, rest title case
-    camel_case = words[0].lower()
-    for word in words[1:]:
-        camel_case += word.capitalize()
-    return camel_case
-
 
 def validate_uploaded_files(uploaded_files, allowed_extensions):
     for uploaded_file in uploaded_files:
@@ -67,6 +53,8 @@ def upload_image(request):
                 messages.error(request, 'Please select at least one image file.')
                 return redirect('image_upload:upload')
             
+            job_ids = []
+            
             # Process each uploaded file
             for index, uploaded_file in enumerate(uploaded_files):
                 # Get file extension
@@ -90,22 +78,23 @@ def upload_image(request):
                     is_primary=(index == 0)  # First image is primary
                 )
                 
-                # Read the file content and save with new name
-                file_content = uploaded_file.read()
-                image.image.save(new_filename, ContentFile(file_content), save=False)
+                # Stream the upload to storage under the new name
+                image.image.save(new_filename, uploaded_file, save=False)
                 
-                # Save to database
+                # Save to database; thumbnail and hash are generated in the background
                 image.save()
+                job_ids.extend(queue_upload_processing(image))
 
             # Process STL archive files (optional)
             if stl_files:
                 for stl_file in stl_files:
-                    STLFile.objects.create(
+                    stl = STLFile.objects.create(
                         entry=entry,
                         file=stl_file,
                         original_name=stl_file.name,
                         uploaded_by=request.user
                     )
+                    job_ids.extend(queue_upload_processing(stl))
             
             file_count = len(uploaded_files)
             stl_count = len(stl_files)
@@ -114,6 +103,15 @@ def upload_image(request):
                 request,
                 f'Successfully uploaded "{entry.name}" with {file_count} image{"s" if file_count > 1 else ""}{stl_message}!'
             )
+            
+            # AJAX uploads get the background job ids so the UI can poll them
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return JsonResponse({
+                    'success': True,
+                    'entry_id': entry.id,
+                    'job_ids': job_ids,
+                    'redirect_url': reverse('image_upload:upload'),
+                })
             return redirect('image_upload:upload')
     else:
         form = EntryUploadForm()
@@ -178,9 +176,8 @@ def add_images_to_entry(request, entry_id):
             is_primary=False  # Additional images are not primary by default
         )
         
-        # Read the file content and save with new name
-        file_content = uploaded_file.read()
-        image.image.save(new_filename, ContentFile(file_content), save=False)
+        # Stream the upload to storage under the new name
+        image.image.save(new_filename, uploaded_file, save=False)
         
         # Save to database
         image.save()
@@ -188,7 +185,8 @@ def add_images_to_entry(request, entry_id):
         added_images.append({
             'id': image.id,
             'url': image.image.url,
-            'is_primary': image.is_primary
+            'is_primary': image.is_primary,
+            'job_ids': queue_upload_processing(image)
         })
     
     return JsonResponse({
@@ -247,9 +245,7 @@ def delete_image(request, entry_id, image_id):
     
     was_primary = image.is_primary
     
-    # Delete the image file and database record
-    if image.image:
-        image.image.delete()
+    # Delete the database record; the file is removed once the delete commits
     image.delete()
     
     # If we deleted the primary image, auto-promote the next oldest
@@ -307,7 +303,8 @@ def add_stl_files(request, entry_id):
             'name': stl_file.original_name,
             'url': stl_file.file.url,
             'size': stl_file.file.size,
-            'uploaded': stl_file.upload_date.isoformat()
+            'uploaded': stl_file.upload_date.isoformat(),
+            'job_ids': queue_upload_processing(stl_file)
         })
 
     return JsonResponse({'success': True, 'files': added_files})
@@ -341,7 +338,8 @@ def add_print_files(request, entry_id):
             'name': print_file.original_name,
             'url': print_file.file.url,
             'size': print_file.file.size,
-            'uploaded': print_file.upload_date.isoformat()
+            'uploaded': print_file.upload_date.isoformat(),
+            'job_ids': queue_upload_processing(print_file)
         })
 
     return JsonResponse({'success': True, 'files': added_files})
@@ -374,7 +372,8 @@ def add_user_prints(request, entry_id):
             'id': user_print.id,
             'url': user_print.image.url,
             'name': user_print.original_name,
-            'uploaded': user_print.upload_date.isoformat()
+            'uploaded': user_print.upload_date.isoformat(),
+            'job_ids': queue_upload_processing(user_print)
         })
 
     return JsonResponse({'success': True, 'images': added_images})
@@ -384,8 +383,6 @@ def add_user_prints(request, entry_id):
 @require_POST
 def delete_stl_file(request, entry_id, file_id):
     stl_file = get_object_or_404(STLFile, id=file_id, entry_id=entry_id)
-    if stl_file.file:
-        stl_file.file.delete()
     stl_file.delete()
     return JsonResponse({'success': True, 'deleted_id': file_id})
 
@@ -394,8 +391,6 @@ def delete_stl_file(request, entry_id, file_id):
 @require_POST
 def delete_print_file(request, entry_id, file_id):
     print_file = get_object_or_404(PrintFile, id=file_id, entry_id=entry_id)
-    if print_file.file:
-        print_file.file.delete()
     print_file.delete()
     return JsonResponse({'success': True, 'deleted_id': file_id})
 
@@ -404,8 +399,6 @@ def delete_print_file(request, entry_id, file_id):
 @require_POST
 def delete_user_print(request, entry_id, image_id):
     user_print = get_object_or_404(UserPrintImage, id=image_id, entry_id=entry_id)
-    if user_print.image:
-        user_print.image.delete()
     user_print.delete()
     return JsonResponse({'success': True, 'deleted_id': image_id})
 
@@ -413,12 +406,21 @@ def delete_user_print(request, entry_id, image_id):
 @login_required
 def download_stl_file(request, entry_id, file_id):
     stl_file = get_object_or_404(STLFile, id=file_id, entry_id=entry_id)
-    response = FileResponse(stl_file.file.open('rb'), as_attachment=True, filename=stl_file.original_name)
-    return response
+    return serve_file(request, stl_file.file, stl_file.original_name)
 
 
 @login_required
 def download_print_file(request, entry_id, file_id):
     print_file = get_object_or_404(PrintFile, id=file_id, entry_id=entry_id)
-    response = FileResponse(print_file.file.open('rb'), as_attachment=True, filename=print_file.original_name)
-    return response
+    return serve_file(request, print_file.file, print_file.original_name)
+
+
+@login_required
+def download_entry_bundle(request, entry_id):
+    """Stream every file of an entry as a single zip."""
+    entry = get_object_or_404(
+        Entry.objects.prefetch_related('stl_files', 'print_files', 'images', 'user_prints'),
+        id=entry_id,
+    )
+    return bundle_response([entry], f'{to_camel_case(entry.name)}.zip')
+
@@ -0,0 +1,188 @@
+"""
+Streaming zip writer for download bundles.
+
+Members are written stored (uploads are already compressed archives and
+images), with the CRC in a data descriptor after each member, so the zip is
+produced chunk by chunk while the source files are read - nothing is
+buffered in memory or spooled to disk. Because the member sizes are known
+up front and no compression happens, the exact archive size can be computed
+before streaming, which lets the response carry a Content-Length.
+ZIP64 records are used only for members or offsets beyond 4 GiB.
+"""
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+CHUNK_SIZE = 256 * 1024
+ZIP32_LIMIT = 0xFFFFFFFF
+ZIP16_LIMIT = 0xFFFF
+
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+VERSION_DEFAULT = 20
+VERSION_ZIP64 = 45
+
+
+class ZipStreamError(Exception):
+    """A member's content did not match the size it was declared with."""
+
+
+@dataclass
+class ZipMember:
+    name: str
+    size: int
+    opener: Callable  # returns an open binary file
+    modified: datetime = None
+    offset: int = 0
+    crc: int = 0
+
+    @property
+    def encoded_name(self):
+        return self.name.encode('utf-8')
+
+    @property
+    def zip64(self):
+        return self.size >= ZIP32_LIMIT or self.offset >= ZIP32_LIMIT
+
+
+def _dos_datetime(moment):
+    moment = moment or datetime(1980, 1, 1)
+    if moment.year < 1980:
+        moment = datetime(1980, 1, 1)
+    time = (moment.hour << 11) | (moment.minute << 5) | (moment.second // 2)
+    date = ((moment.year - 1980) << 9) | (moment.month << 5) | moment.day
+    return time, date
+
+
+def _local_header(member):
+    time, date = _dos_datetime(member.modified)
+    extra = b''
+    size = member.size
+    if member.zip64:
+        extra = struct.pack('<HHQQ', 0x0001, 16, member.size, member.size)
+        size = ZIP32_LIMIT
+    return struct.pack(
+        '<IHHHHHIIIHH',
+        0x04034B50,
+        VERSION_ZIP64 if member.zip64 else VERSION_DEFAULT,
+        FLAG_DATA_DESCRIPTOR | FLAG_UTF8,
+        0,  # stored
+        time, date,
+        0,  # CRC follows in the data descriptor
+        size, size,
+        len(member.encoded_name), len(extra),
+    ) + member.encoded_name + extra
+
+
+def _data_descriptor(member):
+    if member.zip64:
+        return struct.pack('<IIQQ', 0x08074B50, member.crc, member.size, member.size)
+    return struct.pack('<IIII', 0x08074B50, member.crc, member.size, member.size)
+
+
+def _central_header(member):
+    time, date = _dos_datetime(member.modified)
+    zip64_fields = []
+    size = member.size
+    offset = member.offset
+    if member.size >= ZIP32_LIMIT:
+        zip64_fields += [member.size, member.size]
+        size = ZIP32_LIMIT
+    if member.offset >= ZIP32_LIMIT:
+        zip64_fields.append(member.offset)
+        offset = ZIP32_LIMIT
+    extra = b''
+    if zip64_fields:
+        extra = struct.pack(f'<HH{len(zip64_fields)}Q', 0x0001, 8 * len(zip64_fields), *zip64_fields)
+    version = VERSION_ZIP64 if member.zip64 else VERSION_DEFAULT
+    return struct.pack(
+        '<IHHHHHHIIIHHHHHII',
+        0x02014B50,
+        (3 << 8) | version,  # made by Unix, so the permissions below apply
+        version,
+        FLAG_DATA_DESCRIPTOR | FLAG_UTF8,
+        0,
+        time, date,
+        member.crc,
+        size, size,
+        len(member.encoded_name), len(extra), 0,
+        0, 0,
+        0o100644 << 16,
+        offset,
+    ) + member.encoded_name + extra
+
+
+def _end_records(count, directory_offset, directory_size):
+    records = b''
+    if count >= ZIP16_LIMIT or directory_offset >= ZIP32_LIMIT or directory_size >= ZIP32_LIMIT:
+        zip64_end_offset = directory_offset + directory_size
+        records += struct.pack(
+            '<IQHHIIQQQQ',
+            0x06064B50, 44, VERSION_ZIP64, VERSION_ZIP64, 0, 0,
+            count, count, directory_size, directory_offset,
+        )
+        records += struct.pack('<IIQI', 0x07064B50, 0, zip64_end_offset, 1)
+        count = min(count, ZIP16_LIMIT)
+        directory_offset = min(directory_offset, ZIP32_LIMIT)
+        directory_size = min(directory_size, ZIP32_LIMIT)
+    return records + struct.pack(
+        '<IHHHHIIH', 0x06054B50, 0, 0, count, count, directory_size, directory_offset, 0,
+    )
+
+
+class ZipStream:
+    """Iterable zip archive assembled from members added with add()."""
+
+    def __init__(self):
+        self.members = []
+        self._names = set()
+
+    def add(self, name, size, opener, modified=None):
+        """Add a member; duplicate names get a numbered suffix."""
+        unique = name
+        counter = 1
+        while unique in self._names:
+            counter += 1
+            stem, dot, extension = name.rpartition('.')
+            unique = f'{stem} ({counter}).{extension}' if dot and stem else f'{name} ({counter})'
+        self._names.add(unique)
+        self.members.append(ZipMember(unique, size, opener, modified))
+
+    def _layout(self):
+        """Assign member offsets; returns (central directory offset, size)."""
+        offset = 0
+        for member in self.members:
+            member.offset = offset
+            offset += len(_local_header(member)) + member.size + len(_data_descriptor(member))
+        directory_size = sum(len(_central_header(member)) for member in self.members)
+        return offset, directory_size
+
+    def __len__(self):
+        directory_offset, directory_size = self._layout()
+        return directory_offset + directory_size + len(
+            _end_records(len(self.members), directory_offset, directory_size)
+        )
+
+    def __iter__(self):
+        directory_offset, directory_size = self._layout()
+        for member in self.members:
+            yield _local_header(member)
+            crc = 0
+            written = 0
+            with member.opener() as source:
+                while written < member.size:
+                    chunk = source.read(min(CHUNK_SIZE, member.size - written))
+                    if not chunk:
+                        break
+                    crc = zlib.crc32(chunk, crc)
+                    written += len(chunk)
+                    yield chunk
+            if written != member.size:
+                raise ZipStreamError(f'{member.name} is shorter than its declared {member.size} bytes')
+            member.crc = crc
+            yield _data_descriptor(member)
+        for member in self.members:
+            yield _central_header(member)
+        yield _end_records(len(self.members), directory_offset, directory_size)
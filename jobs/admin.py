@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils import timezone
+from unfold.admin import ModelAdmin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'last_error']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'finished_at', 'locked_at', 'worker', 'result', 'last_error']
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=Job.STATUS_RUNNING).update(
+            status=Job.STATUS_PENDING,
+            attempts=0,
+            run_after=timezone.now(),
+        )
+        self.message_user(request, f'{updated} job(s) queued for retry.')
+    retry_jobs.short_description = 'Retry selected jobs'
@@ -0,0 +1,64 @@
+"""
+Django management command that runs the background job worker.
+
+Usage:
+    python manage.py run_jobs
+    python manage.py run_jobs --once
+    python manage.py run_jobs --sleep 5 --max-jobs 100
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from jobs.worker import claim_next_job, default_worker_name, release_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='Exit after running this many jobs',
+        )
+
+    def handle(self, *args, **options):
+        worker_name = default_worker_name()
+        self.stdout.write(self.style.HTTP_INFO(f'Job worker {worker_name} started'))
+
+        released = release_stale_jobs()
+        if released:
+            self.stdout.write(self.style.WARNING(f'Released {released} stale job(s)'))
+
+        processed = 0
+        try:
+            while options['max_jobs'] is None or processed < options['max_jobs']:
+                job = claim_next_job(worker_name)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    release_stale_jobs()
+                    continue
+
+                job = run_job(job)
+                processed += 1
+                style = self.style.SUCCESS if job.status == job.STATUS_SUCCEEDED else self.style.ERROR
+                self.stdout.write(style(f'{job.task} #{job.id}: {job.status} (attempt {job.attempts})'))
+        except KeyboardInterrupt:
+            self.stdout.write('')
+            self.stdout.write('Worker interrupted.')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s)'))
@@ -0,0 +1,64 @@
+"""
+Task registration and enqueueing.
+
+Apps declare background tasks in their tasks.py with the @task decorator;
+those modules are imported when the jobs app is ready. Work is queued by
+task name so a Job row never references Python objects directly.
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .models import Job
+
+_registry = {}
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable
+    max_attempts: int = 3
+    time_limit: Optional[float] = None  # seconds
+    memory_limit: Optional[int] = None  # bytes of address space
+
+    @property
+    def is_limited(self):
+        return self.time_limit is not None or self.memory_limit is not None
+
+
+def task(name, max_attempts=3, time_limit=None, memory_limit=None):
+    """
+    Register a function as a background task under `name`.
+    Tasks with a time or memory limit are run in a child process of the worker.
+    """
+    def decorator(func):
+        if name in _registry and _registry[name].func is not func:
+            raise ValueError(f'Task "{name}" is already registered')
+        _registry[name] = Task(
+            name=name,
+            func=func,
+            max_attempts=max_attempts,
+            time_limit=time_limit,
+            memory_limit=memory_limit,
+        )
+        return func
+    return decorator
+
+
+def get_task(name) -> Optional[Task]:
+    return _registry.get(name)
+
+
+def enqueue(task_name, **payload):
+    """
+    Queue a registered task with JSON-serializable keyword arguments.
+    Returns the created Job.
+    """
+    registered = get_task(task_name)
+    if registered is None:
+        raise ValueError(f'Unknown task "{task_name}"')
+    return Job.objects.create(
+        task=task_name,
+        payload=payload,
+        max_attempts=registered.max_attempts,
+    )
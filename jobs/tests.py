@@ -0,0 +1,79 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .registry import enqueue, task
+from .worker import claim_next_job, release_stale_jobs, run_pending_jobs
+
+calls = []
+
+
+@task('jobs.tests.record')
+def record(value):
+    calls.append(value)
+    return {'value': value}
+
+
+@task('jobs.tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+@task('jobs.tests.sleep', max_attempts=1, time_limit=0.5)
+def sleep(seconds):
+    time.sleep(seconds)
+    return {'slept': seconds}
+
+
+@override_settings(JOBS_RETRY_DELAY=0)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_job_runs_and_stores_result(self):
+        job = enqueue('jobs.tests.record', value=7)
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, {'value': 7})
+        self.assertEqual(calls, [7])
+
+    def test_failing_job_is_retried_then_marked_failed(self):
+        job = enqueue('jobs.tests.explode')
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('RuntimeError: boom', job.last_error)
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        enqueue('jobs.tests.record', value=1)
+        self.assertIsNotNone(claim_next_job('worker-a'))
+        self.assertIsNone(claim_next_job('worker-b'))
+
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        job = enqueue('jobs.tests.record', value=1)
+        job.max_attempts = 2
+        job.save()
+        for _ in range(2):
+            claim_next_job('worker-a')
+            Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(days=1))
+            self.assertEqual(release_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('Worker stopped responding', job.last_error)
+        self.assertIsNone(claim_next_job('worker-a'))
+
+    def test_limited_task_is_killed_after_its_time_limit(self):
+        quick = enqueue('jobs.tests.sleep', seconds=0)
+        slow = enqueue('jobs.tests.sleep', seconds=30)
+        run_pending_jobs()
+        quick.refresh_from_db()
+        slow.refresh_from_db()
+        self.assertEqual(quick.result, {'slept': 0})
+        self.assertEqual(slow.status, Job.STATUS_FAILED)
+        self.assertIn('time limit', slow.last_error)
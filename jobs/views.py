@@ -0,0 +1,39 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from .models import Job
+
+MAX_STATUS_IDS = 100
+
+
+@login_required
+@require_GET
+def job_status(request):
+    """
+    Poll the status of background jobs.
+    GET /jobs/status/?ids=1,2,3
+    Returns: {"success": true, "jobs": [{"id": 1, "task": "...", "status": "pending", ...}]}
+    """
+    try:
+        job_ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'ids must be a comma-separated list of integers'}, status=400)
+
+    if len(job_ids) > MAX_STATUS_IDS:
+        return JsonResponse({'success': False, 'error': f'At most {MAX_STATUS_IDS} ids per request'}, status=400)
+
+    jobs = Job.objects.filter(id__in=job_ids).only('id', 'task', 'status', 'attempts', 'max_attempts', 'finished_at')
+    return JsonResponse({
+        'success': True,
+        'jobs': [
+            {
+                'id': job.id,
+                'task': job.task,
+                'status': job.status,
+                'attempts': job.attempts,
+                'max_attempts': job.max_attempts,
+                'finished': job.is_finished,
+            }
+            for job in jobs
+        ],
+    })
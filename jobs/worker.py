@@ -0,0 +1,176 @@
+"""
+Job execution for the database-backed queue.
+
+Jobs are claimed with a conditional UPDATE (pending -> running) so several
+workers can poll the same table without a broker or row locks. Failed jobs
+are retried with exponential backoff until max_attempts is reached.
+
+Tasks registered with a time or memory limit run in a forked child process:
+the worker kills it when the time budget runs out, and the memory budget is
+applied to the child's address space, so one huge input cannot stall or
+exhaust the worker that runs everything else.
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: base, 2x base, 4x base..."""
+    base = getattr(settings, 'JOBS_RETRY_DELAY', 30)
+    return base * (2 ** max(attempts - 1, 0))
+
+
+def release_stale_jobs():
+    """
+    Return jobs whose worker died mid-run to the pending state, or mark them
+    failed if they have used up their attempts (a job that keeps killing its
+    worker would otherwise be requeued forever). Returns the number released.
+    """
+    lock_timeout = getattr(settings, 'JOBS_LOCK_TIMEOUT', 3600)
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=now - timedelta(seconds=lock_timeout))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED,
+        last_error='Worker stopped responding on the last attempt',
+        finished_at=now,
+        locked_at=None,
+        worker='',
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.STATUS_PENDING,
+        locked_at=None,
+        worker='',
+    )
+    return failed + requeued
+
+
+def claim_next_job(worker_name=None):
+    """Atomically take the next due pending job, or return None."""
+    worker_name = worker_name or default_worker_name()
+    now = timezone.now()
+    candidates = (
+        Job.objects
+        .filter(status=Job.STATUS_PENDING, run_after__lte=now)
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = Job.objects.filter(id=job_id, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING,
+            locked_at=now,
+            worker=worker_name,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+class TaskLimitExceeded(Exception):
+    """An isolated task ran out of time or was killed."""
+
+
+class IsolatedTaskError(Exception):
+    """An isolated task raised; the message carries the child's traceback."""
+
+
+def _run_in_child(registered, payload, sender):
+    if registered.memory_limit is not None:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (registered.memory_limit, registered.memory_limit))
+    try:
+        sender.send(('ok', registered.func(**payload)))
+    except BaseException:
+        sender.send(('error', traceback.format_exc()))
+    finally:
+        connections.close_all()
+        sender.close()
+
+
+def run_isolated(registered, payload):
+    """Run a limited task in a forked child process and return its result."""
+    # The child must not share the parent's database sockets
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_in_child, args=(registered, payload, sender), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(registered.time_limit):
+            process.kill()
+            raise TaskLimitExceeded(f'Task "{registered.name}" exceeded its {registered.time_limit}s time limit')
+        try:
+            outcome, value = receiver.recv()
+        except EOFError:
+            process.join()
+            raise TaskLimitExceeded(
+                f'Task "{registered.name}" died with exit code {process.exitcode}'
+            ) from None
+    finally:
+        receiver.close()
+        process.join()
+
+    if outcome == 'error':
+        raise IsolatedTaskError(value)
+    return value
+
+
+def run_job(job):
+    """Execute a claimed job and record its outcome."""
+    registered = get_task(job.task)
+    try:
+        if registered is None:
+            raise LookupError(f'Unknown task "{job.task}"')
+        if registered.is_limited and getattr(settings, 'JOBS_ISOLATE_LIMITED_TASKS', True):
+            result = run_isolated(registered, job.payload)
+        else:
+            result = registered.func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.STATUS_PENDING
+            job.run_after = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = Job.STATUS_FAILED
+            job.finished_at = timezone.now()
+        logger.warning('Job %s (%s) failed on attempt %s', job.id, job.task, job.attempts)
+    else:
+        job.status = Job.STATUS_SUCCEEDED
+        job.result = result
+        job.last_error = ''
+        job.finished_at = timezone.now()
+
+    job.locked_at = None
+    job.save(update_fields=['status', 'result', 'last_error', 'run_after', 'locked_at', 'finished_at'])
+    return job
+
+
+def run_pending_jobs(max_jobs=None, worker_name=None):
+    """Run due jobs until the queue is empty (or max_jobs ran). Returns the count."""
+    count = 0
+    while max_jobs is None or count < max_jobs:
+        job = claim_next_job(worker_name)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
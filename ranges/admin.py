@@ -1,3 +1,19 @@
 from django.contrib import admin
+from unfold.admin import ModelAdmin
 
-# Register your models here.
+from .models import RangeSummary
+
+
+@admin.register(RangeSummary)
+class RangeSummaryAdmin(ModelAdmin):
+    list_display = ['range_name', 'publisher_name', 'entry_count', 'image_count', 'file_count', 'updated_at']
+    search_fields = ['range_name', 'publisher_name']
+    ordering = ['range_key', 'publisher_key']
+    readonly_fields = [
+        'range_key', 'publisher_key', 'range_name', 'publisher_name',
+        'entry_count', 'image_count', 'file_count', 'representative_image', 'updated_at',
+    ]
+
+    def has_add_permission(self, request):
+        # Rows are maintained from the entries; see rebuild_range_summaries
+        return False
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RangesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ranges'
+
+    def ready(self):
+        # Range summaries follow entry, image and file changes
+        from .summary import connect_summary_signals
+        connect_summary_signals()
@@ -0,0 +1,22 @@
+"""
+Django management command to recompute the RangeSummary table from entries,
+images and files.
+
+Summaries are kept up to date by signals; run this after bulk changes that
+bypass them (queryset updates, raw SQL, restores) or to verify the table.
+
+Usage:
+    python manage.py rebuild_range_summaries
+"""
+
+from django.core.management.base import BaseCommand
+
+from ranges.summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the range summary table'
+
+    def handle(self, *args, **options):
+        count = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} range summar{"y" if count == 1 else "ies"}.'))
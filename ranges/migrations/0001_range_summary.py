@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('image_upload', '0009_file_rename_journal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RangeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('range_key', models.CharField(max_length=255)),
+                ('publisher_key', models.CharField(blank=True, max_length=255)),
+                ('range_name', models.CharField(max_length=255)),
+                ('publisher_name', models.CharField(blank=True, max_length=255)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('image_count', models.PositiveIntegerField(default=0)),
+                ('file_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('representative_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='image_upload.image')),
+            ],
+            options={
+                'verbose_name': 'Range Summary',
+                'verbose_name_plural': 'Range Summaries',
+                'ordering': ['range_key', 'publisher_key'],
+                'constraints': [models.UniqueConstraint(fields=('range_key', 'publisher_key'), name='unique_range_summary')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def rekey_by_range_slug(apps, schema_editor):
+    """Summaries were keyed by the lower-cased range name; key them by its slug."""
+    RangeSummary = apps.get_model('ranges', 'RangeSummary')
+    merged = {}
+    for summary in RangeSummary.objects.order_by('-entry_count', 'id'):
+        key = (slugify(summary.range_name, allow_unicode=True), summary.publisher_key)
+        if not key[0]:
+            continue
+        target = merged.get(key)
+        if target is None:
+            summary.range_key = key[0]
+            merged[key] = summary
+            continue
+        # Names that only differed in punctuation now share a key
+        target.entry_count += summary.entry_count
+        target.image_count += summary.image_count
+        target.file_count += summary.file_count
+        target.representative_image_id = target.representative_image_id or summary.representative_image_id
+    RangeSummary.objects.exclude(id__in=[summary.id for summary in merged.values()]).delete()
+    for summary in merged.values():
+        # Through a temporary key, so a rename never hits another row's old key
+        RangeSummary.objects.filter(id=summary.id).update(range_key=f'{summary.id}~')
+    for summary in merged.values():
+        summary.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ranges', '0001_range_summary'),
+        ('image_upload', '0010_entry_range_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_by_range_slug, migrations.RunPython.noop),
+    ]
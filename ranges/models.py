@@ -1,3 +1,36 @@
 from django.db import models
 
-# Create your models here.
+from image_upload.models import Image
+
+
+class RangeSummary(models.Model):
+    """
+    Entry, image and file counts for one (range, publisher) pair.
+
+    Maintained from Entry, Image, STLFile and PrintFile changes by the
+    receivers in ranges.summary; rebuild with `manage.py rebuild_range_summaries`.
+    Keys are the range slug (Entry.range_slug) and the trimmed, lower-cased
+    publisher ('' for no publisher).
+    """
+    range_key = models.CharField(max_length=255)
+    publisher_key = models.CharField(max_length=255, blank=True)
+    range_name = models.CharField(max_length=255)
+    publisher_name = models.CharField(max_length=255, blank=True)
+    entry_count = models.PositiveIntegerField(default=0)
+    image_count = models.PositiveIntegerField(default=0)
+    file_count = models.PositiveIntegerField(default=0)
+    representative_image = models.ForeignKey(
+        Image, on_delete=models.SET_NULL, related_name='+', null=True, blank=True
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['range_key', 'publisher_key']
+        verbose_name = "Range Summary"
+        verbose_name_plural = "Range Summaries"
+        constraints = [
+            models.UniqueConstraint(fields=['range_key', 'publisher_key'], name='unique_range_summary'),
+        ]
+
+    def __str__(self):
+        return f"{self.range_name} ({self.publisher_name or 'Unknown Publisher'})"
@@ -0,0 +1,158 @@
+"""
+Maintenance of the RangeSummary table.
+
+Saves and deletes of entries, images and files mark the affected
+(range, publisher) keys as dirty; once the transaction commits, every dirty
+range is recounted from its entries in a handful of grouped queries. A
+cascading delete of an entry with hundreds of images therefore recounts its
+range once. rebuild_summaries recomputes the whole table (see the
+rebuild_range_summaries command). Both bump the collection page version
+after writing, since the page-cache receivers run before the recount.
+"""
+import threading
+
+from django.db import models, transaction
+from django.db.models import Count
+
+from image_upload.models import Entry, Image, PrintFile, STLFile, range_slug_for
+from stl_collection.page_cache import COLLECTION_VERSION, bump_versions_on_commit
+
+from .models import RangeSummary
+
+SUMMARY_FIELDS = ['range_name', 'publisher_name', 'entry_count', 'image_count', 'file_count', 'representative_image']
+
+
+def summary_key(range_name, publisher):
+    """(range slug, publisher_key) of an entry, or None if it has no range."""
+    range_key = range_slug_for(range_name)
+    if not range_key:
+        return None
+    return range_key, (publisher or '').strip().lower()
+
+
+def _counts_by_entry(model, entries):
+    return dict(model.objects.filter(entry__in=entries).order_by().values_list('entry_id').annotate(Count('id')))
+
+
+def summarize(entries):
+    """Unsaved RangeSummary rows by key for the given Entry queryset."""
+    image_counts = _counts_by_entry(Image, entries)
+    stl_counts = _counts_by_entry(STLFile, entries)
+    print_counts = _counts_by_entry(PrintFile, entries)
+    primary_images = dict(
+        Image.objects.filter(entry__in=entries, is_primary=True).order_by('-id').values_list('entry_id', 'id')
+    )
+
+    summaries = {}
+    # Newest entries first: they name the summary and provide its image
+    for entry_id, range_name, publisher in entries.order_by('-upload_date', '-id').values_list('id', 'range', 'publisher'):
+        key = summary_key(range_name, publisher)
+        if key is None:
+            continue
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = RangeSummary(
+                range_key=key[0],
+                publisher_key=key[1],
+                range_name=range_name.strip(),
+                publisher_name=(publisher or '').strip(),
+            )
+        summary.entry_count += 1
+        summary.image_count += image_counts.get(entry_id, 0)
+        summary.file_count += stl_counts.get(entry_id, 0) + print_counts.get(entry_id, 0)
+        if summary.representative_image_id is None:
+            summary.representative_image_id = primary_images.get(entry_id)
+    return summaries
+
+
+def refresh_summaries(range_keys):
+    """Recount every summary of the given range keys."""
+    range_keys = set(range_keys)
+    if not range_keys:
+        return
+    entries = Entry.objects.filter(range_slug__in=range_keys)
+    summaries = {key: summary for key, summary in summarize(entries).items() if key[0] in range_keys}
+
+    with transaction.atomic():
+        stale = [
+            pk for pk, range_key, publisher_key in
+            RangeSummary.objects.filter(range_key__in=range_keys).values_list('pk', 'range_key', 'publisher_key')
+            if (range_key, publisher_key) not in summaries
+        ]
+        RangeSummary.objects.filter(pk__in=stale).delete()
+        RangeSummary.objects.bulk_create(
+            summaries.values(),
+            update_conflicts=True,
+            unique_fields=['range_key', 'publisher_key'],
+            update_fields=SUMMARY_FIELDS + ['updated_at'],
+        )
+        # The range list may have been cached from the old counts since the
+        # change itself bumped the version
+        bump_versions_on_commit(COLLECTION_VERSION)
+
+
+def rebuild_summaries():
+    """Recompute the whole table. Returns the number of summaries."""
+    summaries = summarize(Entry.objects.exclude(range_slug=''))
+    with transaction.atomic():
+        RangeSummary.objects.all().delete()
+        RangeSummary.objects.bulk_create(summaries.values())
+        bump_versions_on_commit(COLLECTION_VERSION)
+    return len(summaries)
+
+
+class DirtyRanges(threading.local):
+    """Range keys and entry ids changed in the current thread, recounted on commit."""
+
+    def __init__(self):
+        self.range_keys = set()
+        self.entry_ids = set()
+
+    def add(self, range_keys=(), entry_ids=(), using=None):
+        self.range_keys.update(range_keys)
+        self.entry_ids.update(entry_ids)
+        # Every change registers a flush; the first one after commit does the work.
+        # Marks left by a rolled back transaction are simply recounted later.
+        transaction.on_commit(self.flush, using=using)
+
+    def flush(self):
+        range_keys, entry_ids = self.range_keys, self.entry_ids
+        if not range_keys and not entry_ids:
+            return
+        self.range_keys, self.entry_ids = set(), set()
+        range_keys.update(Entry.objects.filter(id__in=entry_ids).exclude(range_slug='').values_list('range_slug', flat=True))
+        refresh_summaries(range_keys)
+
+
+dirty_ranges = DirtyRanges()
+
+
+def remember_entry_key(sender, instance, **kwargs):
+    """post_init receiver: the key an entry had when loaded, to spot range changes."""
+    values = instance.__dict__
+    # Deferred fields are left alone rather than loaded
+    if 'range' in values and 'publisher' in values:
+        instance._summary_key = summary_key(values['range'], values['publisher'])
+
+
+def entry_changed(sender, instance, using, **kwargs):
+    """post_save/post_delete receiver for Entry."""
+    keys = {summary_key(instance.range, instance.publisher), getattr(instance, '_summary_key', None)}
+    dirty_ranges.add(range_keys=[key[0] for key in keys if key], using=using)
+    instance._summary_key = summary_key(instance.range, instance.publisher)
+
+
+def entry_content_changed(sender, instance, using, **kwargs):
+    """post_save/post_delete receiver for Image, STLFile and PrintFile."""
+    if instance.entry_id:
+        dirty_ranges.add(entry_ids=[instance.entry_id], using=using)
+
+
+def connect_summary_signals():
+    models.signals.post_init.connect(remember_entry_key, sender=Entry, dispatch_uid='range_summary_init:entry')
+    models.signals.post_save.connect(entry_changed, sender=Entry, dispatch_uid='range_summary_saved:entry')
+    models.signals.post_delete.connect(entry_changed, sender=Entry, dispatch_uid='range_summary_deleted:entry')
+    for model in (Image, STLFile, PrintFile):
+        label = model._meta.label
+        models.signals.post_save.connect(entry_content_changed, sender=model, dispatch_uid=f'range_summary_saved:{label}')
+        models.signals.post_delete.connect(entry_content_changed, sender=model, dispatch_uid=f'range_summary_deleted:{label}')
@@ -1,3 +1,128 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from image_upload.models import Entry, Image, STLFile
+from tags.models import Tag, TagType
+
+from .models import RangeSummary
+from .summary import dirty_ranges
+
+
+class RangeSummaryTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.dragon = Entry.objects.create(name='Dragon', publisher='Forge', range='Beasts')
+        self.wyrm = Entry.objects.create(name='Wyrm', publisher='forge ', range='beasts')
+        self.knight = Entry.objects.create(name='Knight', publisher=None, range='Beasts')
+
+    def summaries(self):
+        return {
+            (summary.range_key, summary.publisher_key): (summary.entry_count, summary.image_count, summary.file_count)
+            for summary in RangeSummary.objects.all()
+        }
+
+    def test_signals_keep_summaries_current(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.create(name='Hydra', publisher='Forge', range='Beasts')
+            image = Image.objects.create(entry=self.dragon, image='uploaded_images/dragon.jpg', name='Dragon', is_primary=True)
+            STLFile.objects.create(entry=self.wyrm, file=SimpleUploadedFile('wyrm.stl', b'solid'), original_name='wyrm.stl')
+        self.assertEqual(self.summaries(), {('beasts', 'forge'): (3, 1, 1), ('beasts', ''): (1, 0, 0)})
+        self.assertEqual(RangeSummary.objects.get(publisher_key='forge').representative_image, image)
+
+        # Moving an entry recounts both its old and its new range
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wyrm.range = 'Serpents'
+            self.wyrm.save()
+        self.assertEqual(self.summaries()[('beasts', 'forge')], (2, 1, 0))
+        self.assertEqual(self.summaries()[('serpents', 'forge')], (1, 0, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dragon.delete()
+            self.knight.delete()
+        self.assertEqual(self.summaries(), {('beasts', 'forge'): (1, 0, 0), ('serpents', 'forge'): (1, 0, 1)})
+
+    def test_rebuild_and_list(self):
+        call_command('rebuild_range_summaries', stdout=io.StringIO())
+        self.assertEqual(self.summaries(), {('beasts', 'forge'): (2, 0, 0), ('beasts', ''): (1, 0, 0)})
+
+        user = get_user_model().objects.create_user('viewer', password='secret')
+        self.client.force_login(user)
+        # Session and user, then only reads of the summary table
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('ranges:list'))
+        self.assertEqual(response.context['total_ranges'], 1)
+        self.assertEqual(response.context['total_entries'], 3)
+        beasts = response.context['page_obj'][0]
+        # Spellings are merged and displayed as the newest entry writes them
+        self.assertEqual(beasts['publishers'], {'forge': 2, 'Unknown Publisher': 1})
+
+
+    def test_range_list_is_not_cached_between_change_and_recount(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user('viewer', password='secret'))
+        url = reverse('ranges:list')
+        call_command('rebuild_range_summaries', stdout=io.StringIO())
+        self.assertEqual(self.client.get(url).context['total_entries'], 3)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Entry.objects.create(name='Hydra', publisher='Forge', range='Beasts')
+        # The page version is bumped before the summaries are recounted
+        recounts = [callback for callback in callbacks if callback == dirty_ranges.flush]
+        for callback in callbacks:
+            if callback not in recounts:
+                callback()
+        self.client.get(url)
+        for callback in recounts:
+            callback()
+        response = self.client.get(url)
+        # Rendered again rather than the page cached from the old counts
+        self.assertIsNotNone(response.context)
+        self.assertEqual(response.context['total_entries'], 4)
+
+
+class RangeDetailTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('viewer', password='secret')
+        self.client.force_login(self.user)
+        self.dragon = Entry.objects.create(name='Dragon', publisher='Forge', range='Battle Beasts')
+        self.wyrm = Entry.objects.create(name='Wyrm', publisher='Anvil', range='battle beasts')
+        Entry.objects.create(name='Knight', publisher='Forge', range='Heroes')
+        chaos = Tag.objects.create(name='Chaos', tag_type=TagType.objects.get(name='Faction Tag'))
+        self.wyrm.tags.add(chaos)
+
+    def test_detail_by_slug(self):
+        self.assertEqual(self.dragon.range_slug, 'battle-beasts')
+        url = reverse('ranges:detail', args=['battle-beasts'])
+        # Session, user, grouped stats, page, then images and tags for the page
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+        self.assertEqual([entry.name for entry in response.context['page_obj']], ['Dragon', 'Wyrm'])
+        self.assertEqual(response.context['publishers'], ['Anvil', 'Forge'])
+        self.assertEqual(response.context['total_entries'], 2)
+
+        response = self.client.get(url, {'publisher': 'Forge'})
+        self.assertEqual([entry.name for entry in response.context['page_obj']], ['Dragon'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+        # Search matches the entries' tags
+        response = self.client.get(url, {'search': 'chaos'})
+        self.assertEqual([entry.name for entry in response.context['page_obj']], ['Wyrm'])
+
+    def test_old_range_name_urls_redirect(self):
+        response = self.client.get(reverse('ranges:detail', args=['Battle Beasts']))
+        self.assertRedirects(response, reverse('ranges:detail', args=['battle-beasts']))
+
+        response = self.client.get(reverse('ranges:detail', args=['missing']))
+        self.assertEqual(response.context['error'], 'Range not found')
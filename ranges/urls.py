@@ -5,5 +5,6 @@ app_name = 'ranges'
 
 urlpatterns = [
     path('', views.range_list, name='list'),
-    path('<str:range_name>/', views.range_detail, name='detail'),
+    path('<str:range_slug>/', views.range_detail, name='detail'),
+    path('<str:range_slug>/download/', views.download_range_bundle, name='download'),
 ]
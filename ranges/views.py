@@ -1,145 +1,158 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import redirect, render, get_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Count, Q
-from image_upload.models import Image
+from django.db.models import Count, Exists, Max, OuterRef, Q, Sum
+from django.http import Http404
+from image_upload.downloads import bundle_response
+from image_upload.models import Entry, range_slug_for
+from image_upload.naming import to_camel_case
+from stl_collection.page_cache import cache_page_versions
+
+from .models import RangeSummary
 
 @login_required
+@cache_page_versions('range_list')
 def range_list(request):
     """List all ranges with counts, search and filtering"""
-    # Get all ranges with image counts
-    ranges_data = (
-        Image.objects
-        .exclude(range__isnull=True)
-        .exclude(range__exact='')
-        .values('range', 'publisher')
-        .annotate(image_count=Count('id'))
-        .order_by('range', 'publisher')
-    )
+    # Counts per (range, publisher) are kept in RangeSummary
+    summaries = RangeSummary.objects.all()
     
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        ranges_data = ranges_data.filter(
-            Q(range__icontains=search_query) |
-            Q(publisher__icontains=search_query)
+        summaries = summaries.filter(
+            Q(range_name__icontains=search_query) |
+            Q(publisher_name__icontains=search_query)
         )
     
     # Filter by publisher
     publisher_filter = request.GET.get('publisher', '')
     if publisher_filter:
-        ranges_data = ranges_data.filter(publisher__icontains=publisher_filter)
+        summaries = summaries.filter(publisher_name__icontains=publisher_filter)
     
     # Get unique publishers for filter dropdown
     publishers = (
-        Image.objects
-        .exclude(publisher__isnull=True)
-        .exclude(publisher__exact='')
-        .exclude(range__isnull=True)
-        .exclude(range__exact='')
-        .values_list('publisher', flat=True)
+        RangeSummary.objects
+        .exclude(publisher_key='')
+        .order_by('publisher_key')
+        .values_list('publisher_name', flat=True)
         .distinct()
-        .order_by('publisher')
     )
     
-    # Group ranges data by range name for better display
-    ranges_grouped = {}
-    total_ranges = 0
-    total_images = 0
+    total_entries = summaries.aggregate(total=Sum('entry_count'))['total'] or 0
     
-    for item in ranges_data:
-        range_name = item['range']
-        publisher = item['publisher'] or 'Unknown Publisher'
-        count = item['image_count']
-        
-        if range_name not in ranges_grouped:
-            ranges_grouped[range_name] = {
-                'name': range_name,
-                'publishers': {},
-                'total_count': 0
-            }
-            total_ranges += 1
-        
-        ranges_grouped[range_name]['publishers'][publisher] = count
-        ranges_grouped[range_name]['total_count'] += count
-        total_images += count
-    
-    # Convert to list and sort by range name
-    ranges_list = sorted(ranges_grouped.values(), key=lambda x: x['name'].lower())
-    
-    # Pagination
-    paginator = Paginator(ranges_list, 12)
+    # Paginate range keys, then load the summaries of the ranges on the page
+    range_keys = summaries.order_by('range_key').values_list('range_key', flat=True).distinct()
+    paginator = Paginator(range_keys, 12)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    ranges_grouped = {}
+    page_summaries = (
+        summaries
+        .filter(range_key__in=list(page_obj.object_list))
+        .select_related('representative_image')
+        .order_by('range_key', 'publisher_key')
+    )
+    for summary in page_summaries:
+        range_data = ranges_grouped.setdefault(summary.range_key, {
+            'name': summary.range_name,
+            'slug': summary.range_key,
+            'publishers': {},
+            'total_count': 0,
+            'image': summary.representative_image,
+        })
+        publisher = summary.publisher_name or 'Unknown Publisher'
+        range_data['publishers'][publisher] = range_data['publishers'].get(publisher, 0) + summary.entry_count
+        range_data['total_count'] += summary.entry_count
+        range_data['image'] = range_data['image'] or summary.representative_image
+    page_obj.object_list = list(ranges_grouped.values())
+    
     return render(request, 'ranges/list.html', {
         'page_obj': page_obj,
         'search_query': search_query,
         'publisher_filter': publisher_filter,
         'publishers': publishers,
-        'total_ranges': total_ranges,
-        'total_images': total_images,
+        'total_ranges': paginator.count,
+        'total_entries': total_entries,
     })
 
 @login_required
-def range_detail(request, range_name):
+def range_detail(request, range_slug):
     """Show detailed view of a specific range"""
-    # Get all images in this range
-    images = Image.objects.filter(range__iexact=range_name)
+    entries = Entry.objects.filter(range_slug=range_slug)
+    
+    # Publishers, per-publisher counts and the range name in one grouped query
+    range_stats = list(
+        entries
+        .order_by('publisher')
+        .values('publisher')
+        .annotate(count=Count('id'), range_name=Max('range'))
+    )
     
-    if not images.exists():
+    if not range_stats:
+        # Old links used the raw range name
+        canonical_slug = range_slug_for(range_slug)
+        if canonical_slug and canonical_slug != range_slug:
+            return redirect('ranges:detail', range_slug=canonical_slug)
         # Handle case where range doesn't exist
         return render(request, 'ranges/detail.html', {
-            'range_name': range_name,
+            'range_name': range_slug,
             'error': 'Range not found'
         })
     
+    range_name = range_stats[0]['range_name']
+    publishers = [stat['publisher'] for stat in range_stats if stat['publisher']]
+    range_total = sum(stat['count'] for stat in range_stats)
+    total = range_total
+    
     # Filter by publisher if specified
     publisher_filter = request.GET.get('publisher', '')
     if publisher_filter:
-        images = images.filter(publisher__icontains=publisher_filter)
+        entries = entries.filter(publisher=publisher_filter)
+        total = sum(stat['count'] for stat in range_stats if stat['publisher'] == publisher_filter)
     
-    # Search within the range
+    # Search within the range, including the entries' tags
     search_query = request.GET.get('search', '')
     if search_query:
-        images = images.filter(
+        entries = entries.filter(
             Q(name__icontains=search_query) |
             Q(publisher__icontains=search_query) |
-            Q(tags__name__icontains=search_query)
-        ).distinct()
-    
-    # Get publishers for this range
-    publishers = (
-        Image.objects
-        .filter(range__iexact=range_name)
-        .exclude(publisher__isnull=True)
-        .exclude(publisher__exact='')
-        .values_list('publisher', flat=True)
-        .distinct()
-        .order_by('publisher')
-    )
+            Exists(Entry.tags.through.objects.filter(entry_id=OuterRef('pk'), tag__name__icontains=search_query))
+        )
+        total = None
     
-    # Get range statistics
-    range_stats = (
-        Image.objects
-        .filter(range__iexact=range_name)
-        .values('publisher')
-        .annotate(count=Count('id'))
-        .order_by('publisher')
-    )
+    entries = entries.order_by('name', 'id').prefetch_related('images', 'tags__tag_type')
     
-    # Pagination
-    paginator = Paginator(images, 16)
+    # Pagination; the count is already known unless searching
+    paginator = Paginator(entries, 16)
+    if total is not None:
+        paginator.count = total
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
     return render(request, 'ranges/detail.html', {
         'range_name': range_name,
+        'range_slug': range_slug,
         'page_obj': page_obj,
         'search_query': search_query,
         'publisher_filter': publisher_filter,
         'publishers': publishers,
         'range_stats': range_stats,
-        'total_images': images.count(),
+        'total_entries': range_total,
     })
+
+
+@login_required
+def download_range_bundle(request, range_slug):
+    """Stream every file of every entry in a range as a single zip, one folder per entry."""
+    entries = list(
+        Entry.objects
+        .filter(range_slug=range_slug)
+        .order_by('name', 'id')
+        .prefetch_related('stl_files', 'print_files', 'images', 'user_prints')
+    )
+    if not entries:
+        raise Http404('Range not found')
+    return bundle_response(entries, f'{to_camel_case(entries[0].range)}.zip', per_entry_folder=True)
@@ -0,0 +1,247 @@
+"""
+Per-view caching of rendered pages with versioned invalidation.
+
+cache_page_versions() caches a view's full response, keyed on the view, the
+class of user (anonymous, user or staff - the templates only branch on
+is_staff), the normalized query string and the current value of the version
+counters the page depends on. Writes never delete cached pages: model signals
+bump the affected versions (see connect_page_cache_signals), so the next
+request builds a new key and the old pages simply expire. Versions are kept
+in the cache itself so every process sharing the cache backend sees them.
+
+Cached pages are shared between users, so the per-user parts of the shared
+layout - the CSRF token and the username - are rendered as placeholders
+(see the page_cache_placeholders context processor) and filled in for each
+response. Requests with pending flash messages are never cached or served
+from the cache.
+
+Pages also carry a weak ETag built from the same key, so a browser coming
+back to an unchanged page gets a 304 without the page being rendered.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import signals
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.html import escape
+from django.utils.http import urlencode
+
+CSRF_PLACEHOLDER = '__page_cache_csrf_token__'
+USERNAME_PLACEHOLDER = '__page_cache_username__'
+
+# Pages listing entries; bumped by any change to entries, their files or tags
+COLLECTION_VERSION = 'collection'
+# Tag names and colours shown next to entries
+TAGS_VERSION = 'tags'
+# Precomputed related entries (see image_details.similarity)
+RELATED_VERSION = 'related'
+
+
+def entry_version(entry_id):
+    """Version name of a single entry's detail page."""
+    return f'entry:{entry_id}'
+
+
+def page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _version_key(name):
+    return f'page_cache:version:{name}'
+
+
+def get_versions(names):
+    """Current value of each named version, starting unknown ones now."""
+    cache = page_cache()
+    keys = {name: _version_key(name) for name in names}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for name, key in keys.items():
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions[name] = found[key]
+    return versions
+
+
+def bump_versions(*names):
+    """Invalidate every page depending on the named versions."""
+    # A fresh timestamp rather than an increment: no read-modify-write race,
+    # and a version never comes back after the cache was cleared
+    value = time.time_ns()
+    page_cache().set_many({_version_key(name): value for name in names}, timeout=None)
+
+
+def bump_versions_on_commit(*names, using=None):
+    """
+    Bump now and again once the transaction commits.
+
+    A page rendered by another request while the transaction is still open
+    shows the old data under the first new version; the second bump drops it.
+    """
+    bump_versions(*names)
+    transaction.on_commit(lambda: bump_versions(*names), using=using)
+
+
+def user_class(request):
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    return 'staff' if request.user.is_staff else 'user'
+
+
+def normalized_query(request):
+    """The query string with parameters sorted and empty values dropped."""
+    return urlencode(sorted(
+        (name, value) for name, values in request.GET.lists() for value in values if value
+    ))
+
+
+def page_cache_key(view_name, request, view_kwargs, versions):
+    parts = [
+        view_name,
+        user_class(request),
+        urlencode(sorted(view_kwargs.items())),
+        normalized_query(request),
+        urlencode(sorted(versions.items())),
+    ]
+    digest = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    return f'page_cache:page:{view_name}:{digest}'
+
+
+def personalize(request, content):
+    """Fill the per-user placeholders of a cached page."""
+    if CSRF_PLACEHOLDER.encode() in content:
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    if USERNAME_PLACEHOLDER.encode() in content:
+        content = content.replace(USERNAME_PLACEHOLDER.encode(), escape(request.user.get_username()).encode())
+    return content
+
+
+def page_etag(request, key):
+    """
+    Weak ETag of a page as this browser saw it: the page's cache key plus the
+    user and CSRF secret that were filled into its placeholders.
+    """
+    parts = [key, str(request.user.pk), request.META.get('CSRF_COOKIE', '')]
+    return 'W/"%s"' % hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
+
+
+def cache_page_versions(view_name, versions=(COLLECTION_VERSION,)):
+    """
+    Cache a view's rendered page until one of its versions is bumped.
+
+    `versions` is a list of version names, or a function taking the view's
+    keyword arguments and returning one (for pages of a single object). Only
+    GET and HEAD requests answered with a 200 are cached. Those responses
+    carry a weak ETag, and a matching If-None-Match is answered with a 304
+    before anything is rendered or read from the cache. Put the decorator
+    below login_required so redirects are never cached.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view_func(request, *args, **kwargs)
+
+            names = versions(**kwargs) if callable(versions) else versions
+            key = page_cache_key(view_name, request, kwargs, get_versions(names))
+            etag = page_etag(request, key)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return _revalidated(response, etag)
+
+            timeout = settings.PAGE_CACHE_TIMEOUT
+            cached = page_cache().get(key) if timeout else None
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(personalize(request, content), content_type=content_type)
+                return _revalidated(response, etag)
+
+            request.page_cache_render = True
+            try:
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+            finally:
+                request.page_cache_render = False
+            if response.status_code != 200 or response.streaming:
+                return response
+            if timeout and not response.cookies:
+                page_cache().set(key, (response.content, response['Content-Type']), timeout)
+            response.content = personalize(request, response.content)
+            return _revalidated(response, etag)
+        return wrapper
+    return decorator
+
+
+def _revalidated(response, etag):
+    # Browsers keep the page but check back on every visit
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def page_cache_placeholders(request):
+    """
+    Context processor: per-user values as placeholders while a page is
+    rendered for the cache. Must come after the auth context processor.
+    """
+    if not getattr(request, 'page_cache_render', False):
+        return {}
+    return {
+        'csrf_token': CSRF_PLACEHOLDER,
+        'page_cache_username': USERNAME_PLACEHOLDER,
+    }
+
+
+def entry_changed(sender, instance, using, **kwargs):
+    """post_save/post_delete receiver for Entry."""
+    bump_versions_on_commit(COLLECTION_VERSION, entry_version(instance.pk), using=using)
+
+
+def entry_content_changed(sender, instance, using, **kwargs):
+    """post_save/post_delete receiver for models belonging to an entry."""
+    names = [COLLECTION_VERSION]
+    if instance.entry_id:
+        names.append(entry_version(instance.entry_id))
+    bump_versions_on_commit(*names, using=using)
+
+
+def entry_tags_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """m2m_changed receiver for Entry.tags."""
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # instance is a Tag; a clear() from the tag side leaves pk_set empty
+        names = [COLLECTION_VERSION] + [entry_version(pk) for pk in pk_set or ()]
+        if action == 'post_clear':
+            names.append(TAGS_VERSION)
+    else:
+        names = [COLLECTION_VERSION, entry_version(instance.pk)]
+    bump_versions_on_commit(*names, using=using)
+
+
+def vocabulary_changed(sender, using, **kwargs):
+    """post_save/post_delete receiver for Tag and TagType."""
+    bump_versions_on_commit(COLLECTION_VERSION, TAGS_VERSION, using=using)
+
+
+def connect_page_cache_signals():
+    from image_upload.models import Entry, Image, PrintFile, STLFile, UserPrintImage
+    from tags.models import Tag, TagType
+
+    receivers = [(entry_changed, Entry)]
+    receivers += [(entry_content_changed, model) for model in (Image, STLFile, PrintFile, UserPrintImage)]
+    receivers += [(vocabulary_changed, model) for model in (Tag, TagType)]
+    for receiver, model in receivers:
+        label = model._meta.label
+        signals.post_save.connect(receiver, sender=model, dispatch_uid=f'page_cache_saved:{label}')
+        signals.post_delete.connect(receiver, sender=model, dispatch_uid=f'page_cache_deleted:{label}')
+    signals.m2m_changed.connect(entry_tags_changed, sender=Entry.tags.through, dispatch_uid='page_cache_entry_tags')
@@ -32,6 +32,7 @@ ALLOWED_HOSTS = ['*']
 
 INSTALLED_APPS = [
     'unfold',  # Admin theme - must be before django.contrib.admin
+    'unfold.contrib.filters',  # Autocomplete list filters for the admin
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
     'ranges',
     'tag_assign',
     'image_details',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -70,6 +72,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'stl_collection.page_cache.page_cache_placeholders',
             ],
         },
     },
@@ -89,6 +92,34 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Rendered pages and their version counters live in files so that every
+# process sees the same versions: web workers, the job worker and management
+# commands such as import_collection invalidate pages straight away. Keep the
+# directory outside MEDIA_ROOT; a shared backend such as Redis works as well.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'stl-collection',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+# Rendered pages (see stl_collection.page_cache); a timeout of 0 disables it
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 300  # Seconds
+
+# Keeps pages cached by the development server out of test runs
+TEST_RUNNER = 'stl_collection.test_runner.TestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -131,6 +162,24 @@ STATICFILES_DIRS = [
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Browser cache lifetime of unique-named (immutable) media files; when a web
+# server serves MEDIA_ROOT it should send the same Cache-Control header
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 3600
+
+# How file downloads are served: 'django', 'nginx' (X-Accel-Redirect) or
+# 'sendfile' (X-Sendfile). For nginx, FILE_DOWNLOAD_INTERNAL_PREFIX must be an
+# `internal` location aliased to MEDIA_ROOT.
+FILE_DOWNLOAD_BACKEND = 'django'
+FILE_DOWNLOAD_INTERNAL_PREFIX = '/protected-media/'
+
+# Background jobs (processed by `python manage.py run_jobs`)
+JOBS_RETRY_DELAY = 30  # Seconds before the first retry; doubles on each attempt
+JOBS_LOCK_TIMEOUT = 3600  # Seconds before a running job is considered abandoned
+STL_ANALYSIS_MAX_MEMBER_SIZE = 1024 * 1024 * 1024  # Skip geometry for larger STL members
+JOBS_ISOLATE_LIMITED_TASKS = True  # Run tasks with time/memory limits in a child process
+STL_PREVIEW_TIME_LIMIT = 120  # Seconds per preview render job
+STL_PREVIEW_MEMORY_LIMIT = 3 * 1024 * 1024 * 1024  # Address space per preview render job
+STL_PREVIEW_SIZE = 512  # Rendered preview width and height in pixels
 
 # Login/Logout URLs
 LOGIN_URL = '/accounts/login/'
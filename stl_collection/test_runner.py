@@ -0,0 +1,25 @@
+"""
+Test runner giving each test run its own in-memory page cache.
+
+The page cache is file based (see the CACHES setting), so pages and version
+counters would otherwise survive from the development server or a previous
+run, where the same entry ids showed different data. The replacement shares
+its storage with the default local-memory cache, so tests clearing `cache`
+clear cached pages too.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        caches = dict(settings.CACHES)
+        caches[settings.PAGE_CACHE_ALIAS] = caches['default']
+        self._page_cache_override = override_settings(CACHES=caches)
+        self._page_cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._page_cache_override.disable()
+        super().teardown_test_environment(**kwargs)
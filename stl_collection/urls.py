@@ -30,9 +30,10 @@ urlpatterns = [
     path('ranges/', include('ranges.urls')),
     path('assign/', include('tag_assign.urls')),
     path('details/', include('image_details.urls')),
+    path('jobs/', include('jobs.urls')),
     path('accounts/', include('django.contrib.auth.urls')),  # Built-in auth views
 ]
 
 # Serve media files during development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(settings.MEDIA_URL, view=views.serve_media, document_root=settings.MEDIA_ROOT)
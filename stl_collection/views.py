@@ -1,37 +1,52 @@
+import re
+
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from image_upload.models import Entry, Image
-from tags.models import Tag
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+from collection.stats import get_stats
+from image_upload.models import Entry
+from .page_cache import cache_page_versions
+
+# Uploads are stored under names ending in a random hex id (plus "_thumb" for
+# thumbnails), so the bytes behind such a media URL never change
+UNIQUE_MEDIA_NAME = re.compile(r'_[0-9a-f]{8}(?:_[\w-]+)?\.\w+$')
 
+@cache_page_versions('public_landing')
 def public_landing(request):
     """Public landing page for unauthenticated users"""
     if request.user.is_authenticated:
         return redirect('home')
     
     # Show basic stats for public view
-    total_entries = Entry.objects.count()
-    total_tags = Tag.objects.count()
+    stats = get_stats()
     
     return render(request, 'public_landing.html', {
-        'total_images': total_entries,
-        'total_tags': total_tags,
+        'total_images': stats.entry_count,
+        'total_tags': stats.tag_count,
     })
 
 @login_required
+@cache_page_versions('landing_page')
 def landing_page(request):
     """Authenticated home page showing the latest 4 uploaded entries"""
     latest_images = Entry.objects.order_by('-upload_date')[:4]
     
-    # Statistics
-    total_images = Entry.objects.count()
-    total_tags = Tag.objects.count()
-    total_publishers = Entry.objects.exclude(publisher__isnull=True).exclude(publisher__exact='').values('publisher').distinct().count()
-    total_ranges = Entry.objects.exclude(range__isnull=True).exclude(range__exact='').values('range').distinct().count()
+    # Statistics, maintained by collection.stats
+    stats = get_stats()
     
     return render(request, 'landing_page.html', {
         'latest_images': latest_images,
-        'total_images': total_images,
-        'total_tags': total_tags,
-        'total_publishers': total_publishers,
-        'total_ranges': total_ranges,
+        'total_images': stats.entry_count,
+        'total_tags': stats.tag_count,
+        'total_publishers': stats.publisher_count,
+        'total_ranges': stats.range_count,
     })
+
+def serve_media(request, path, document_root=None):
+    """Development media server; unique-named files may be cached for good"""
+    response = serve(request, path, document_root=document_root)
+    if response.status_code == 200 and UNIQUE_MEDIA_NAME.search(path):
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE, immutable=True)
+    return response
@@ -1,7 +1,8 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 from unfold.admin import ModelAdmin
-from .models import Tag, TagType
+from .models import ImportMapping, Tag, TagType
 from .widgets import ColorPickerWidget
 
 @admin.register(TagType)
@@ -13,6 +14,13 @@ class TagTypeAdmin(ModelAdmin):
     list_editable = ['sort_order', 'is_active', 'show_in_gallery', 'set_at_upload']
     filter_horizontal = ['reference_tagtypes']
     
+    def get_queryset(self, request):
+        return (
+            super().get_queryset(request)
+            .annotate(tag_count=Count('tags'))
+            .prefetch_related('reference_tagtypes')
+        )
+    
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
         form.base_fields['color'].widget = ColorPickerWidget()
@@ -31,31 +39,43 @@ class TagTypeAdmin(ModelAdmin):
     color_preview.admin_order_field = 'color'
     
     def reference_tagtypes_display(self, obj):
+        # all() rather than exists() so the prefetched rows are used
         ref_types = obj.reference_tagtypes.all()
-        if ref_types.exists():
+        if ref_types:
             return ', '.join([rt.name for rt in ref_types])
         return '-'
     reference_tagtypes_display.short_description = 'Reference Tag Types'
     
     def tag_count(self, obj):
-        return obj.tags.count()
+        return obj.tag_count
     tag_count.short_description = 'Tags'
+    tag_count.admin_order_field = 'tag_count'
 
 @admin.register(Tag)
 class TagAdmin(ModelAdmin):
     list_display = ['name', 'tag_type', 'reference_tags_display', 'usage_count', 'created_at']
+    readonly_fields = ['usage_count']
     list_filter = ['tag_type', 'created_at']
     search_fields = ['name']
     ordering = ['tag_type__sort_order', 'tag_type__name', 'name']
-    filter_horizontal = ['reference_tags']
+    list_select_related = ['tag_type']
+    autocomplete_fields = ['reference_tags']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('reference_tags__tag_type')
     
     def reference_tags_display(self, obj):
         ref_tags = obj.reference_tags.all()
-        if ref_tags.exists():
+        if ref_tags:
             return ', '.join([f"{rt.name} ({rt.tag_type})" for rt in ref_tags])
         return '-'
     reference_tags_display.short_description = 'Reference Tags'
-    
-    def usage_count(self, obj):
-        return obj.entry_set.count()
-    usage_count.short_description = 'Usage Count'
+
+@admin.register(ImportMapping)
+class ImportMappingAdmin(ModelAdmin):
+    list_display = ['column', 'tag_type', 'delimiter', 'normalization', 'collapse_whitespace', 'sort_order', 'is_active']
+    list_filter = ['is_active', 'normalization', 'tag_type']
+    search_fields = ['column', 'tag_type__name']
+    ordering = ['sort_order', 'column']
+    list_editable = ['delimiter', 'normalization', 'collapse_whitespace', 'sort_order', 'is_active']
+    list_select_related = ['tag_type']
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TagsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tags'
+
+    def ready(self):
+        from .cache import connect_vocabulary_signals
+        from .usage import connect_usage_signals
+        connect_vocabulary_signals()
+        connect_usage_signals()
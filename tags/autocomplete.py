@@ -0,0 +1,140 @@
+"""
+Per-process prefix index over tag names, for the typeahead endpoint.
+
+Names are folded (accents stripped, case folded) and every word of a name
+starts a key in one sorted list, so "dra" finds both "Dragon" and "Red
+Dragon" with two binary searches. Matches are ranked by usage
+(Tag.usage_count), then name.
+
+Like the vocabulary cache (see tags.cache), the index is rebuilt when the
+vocabulary version changes, which tag signals bump; checking it is one
+small query per lookup. Usage counts are not part of the vocabulary, so the
+index is also rebuilt every USAGE_MAX_AGE seconds.
+"""
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+
+from .cache import current_version
+from .models import Tag
+
+USAGE_MAX_AGE = 300  # Seconds
+WORD_START = re.compile(r'\w+')
+
+
+def fold(text):
+    """`text` without accents and case, for matching."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def index_keys(name):
+    """Folded suffixes of `name` starting at each word, and the whole name."""
+    folded = fold(name)
+    return {folded} | {folded[match.start():] for match in WORD_START.finditer(folded)}
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """One consistent build of the index; replaced whole, never modified."""
+    keys: list
+    key_tag_ids: list
+    tags: dict
+    ranked_ids: list
+    rank: dict
+    references: dict
+
+
+EMPTY_SNAPSHOT = IndexSnapshot(keys=[], key_tag_ids=[], tags={}, ranked_ids=[], rank={}, references={})
+
+
+class TagAutocompleteIndex:
+    """Sorted word-prefix keys of every tag name, with tag details for the response."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.loaded_at = 0
+        # Lookups read this one reference without the lock, so a rebuild
+        # swaps in a complete snapshot with a single assignment
+        self.snapshot = EMPTY_SNAPSHOT
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+
+    def refresh(self):
+        """Rebuild the index if the vocabulary changed or the usage counts are stale."""
+        version = current_version()
+        with self._lock:
+            if version == self.version and time.monotonic() - self.loaded_at < USAGE_MAX_AGE:
+                return
+            self.snapshot = self._build()
+            self.version = version
+            self.loaded_at = time.monotonic()
+
+    @staticmethod
+    def _build():
+        tags = {}
+        keys = []
+        for tag in Tag.objects.select_related('tag_type'):
+            tags[tag.id] = {
+                'id': tag.id,
+                'name': tag.name,
+                'tag_type_id': tag.tag_type_id,
+                'color': tag.get_color(),
+                'text_color': tag.get_text_color(),
+                'usage': tag.usage_count,
+            }
+            keys.extend((key, tag.id) for key in index_keys(tag.name))
+        keys.sort()
+
+        references = {}
+        links = Tag.reference_tags.through.objects.values_list('from_tag_id', 'to_tag_id')
+        for tag_id, reference_id in links:
+            references.setdefault(tag_id, set()).add(reference_id)
+
+        ranked_ids = sorted(tags, key=lambda tag_id: (-tags[tag_id]['usage'], fold(tags[tag_id]['name'])))
+        return IndexSnapshot(
+            keys=[key for key, _ in keys],
+            key_tag_ids=[tag_id for _, tag_id in keys],
+            tags=tags,
+            ranked_ids=ranked_ids,
+            rank={tag_id: position for position, tag_id in enumerate(ranked_ids)},
+            references=references,
+        )
+
+    def search(self, query, limit=10, tag_type_id=None, reference=None):
+        """
+        The `limit` most used tags with a word starting with `query` (all tags
+        if it is blank), as dicts. `reference` is a reference tag id, or
+        'none' for tags without reference tags. Call refresh() first.
+        """
+        snapshot = self.snapshot
+        folded = fold(query).strip()
+        if folded:
+            start = bisect.bisect_left(snapshot.keys, folded)
+            end = bisect.bisect_left(snapshot.keys, folded + '\U0010ffff', start)
+            candidates = sorted(set(snapshot.key_tag_ids[start:end]), key=snapshot.rank.__getitem__)
+        else:
+            candidates = snapshot.ranked_ids
+
+        matches = []
+        for tag_id in candidates:
+            tag = snapshot.tags[tag_id]
+            if tag_type_id is not None and tag['tag_type_id'] != tag_type_id:
+                continue
+            if reference == 'none' and tag_id in snapshot.references:
+                continue
+            if reference not in (None, 'none') and reference not in snapshot.references.get(tag_id, ()):
+                continue
+            matches.append(tag)
+            if len(matches) == limit:
+                break
+        return matches
+
+
+tag_index = TagAutocompleteIndex()
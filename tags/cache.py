@@ -0,0 +1,130 @@
+"""
+Per-process cache of the tag vocabulary (tag types and tags by name) and
+the compiled import row mapper.
+
+The vocabulary is loaded once and then reused for bulk tagging, so creating
+an entry no longer needs a get_or_create query per tag type and tag name.
+Changes are tracked with the single-row VocabularyVersion counter: every
+save or delete of a Tag, TagType or ImportMapping, and every change to a
+tag's reference tags, bumps it (see connect_vocabulary_signals), and so does
+resolve_tags when it bulk-creates tags. Each use of the cache
+costs one query to compare versions, which keeps processes in sync with
+changes made by other processes.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import F, signals
+
+from .import_mapping import RowMapper, load_row_mapper
+from .models import ImportMapping, Tag, TagType, VocabularyVersion
+
+
+def current_version():
+    """Current vocabulary version (0 before anything has changed)."""
+    return VocabularyVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_version():
+    """Record a vocabulary change."""
+    if not VocabularyVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        VocabularyVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+class TagVocabularyCache:
+    """Tag types and tags by name, reloaded when the vocabulary version changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.tag_types = {}
+        self.tags = {}
+        self.row_mapper = RowMapper([])
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+
+    def refresh(self):
+        """Reload the vocabulary if it changed since it was last loaded."""
+        version = current_version()
+        with self._lock:
+            if version == self.version:
+                return
+            self.tag_types = {tag_type.name: tag_type for tag_type in TagType.objects.all()}
+            self.tags = {tag.name: tag for tag in Tag.objects.select_related('tag_type')}
+            self.row_mapper = load_row_mapper()
+            self.version = version
+
+    def resolve_tags(self, names_by_type, tag_types):
+        """
+        Tags by name for `names_by_type` ({tag type name: [tag names]}).
+
+        Known tags come from the cache; missing ones are created with a single
+        bulk_create, using the tag type they were listed under. A tag that
+        already exists keeps its own type. `tag_types` maps tag type names to
+        TagType rows (see RowMapper.tag_types). Call refresh() first.
+        """
+        resolved = {}
+        missing = {}
+        for tag_type_name, names in names_by_type.items():
+            for name in names:
+                tag = self.tags.get(name)
+                if tag is not None:
+                    resolved[name] = tag
+                elif name not in missing:
+                    missing[name] = Tag(name=name, tag_type=tag_types[tag_type_name])
+
+        if missing:
+            # ignore_conflicts covers tags created concurrently; the ids are read back
+            Tag.objects.bulk_create(missing.values(), ignore_conflicts=True)
+            created = list(Tag.objects.select_related('tag_type').filter(name__in=list(missing)))
+            resolved.update((tag.name, tag) for tag in created)
+            bump_version()
+            # Read inside the transaction, which holds the counter row, so
+            # this is the version our bump produced
+            version = current_version()
+            # Only cache the new tags once they are committed
+            transaction.on_commit(lambda: self._add_tags(created, version))
+        return resolved
+
+    def _add_tags(self, tags, version):
+        """Add committed tags; `version` is the vocabulary version that created them."""
+        with self._lock:
+            self.tags.update((tag.name, tag) for tag in tags)
+            if self.version == version - 1:
+                # Nothing else changed since the cache was loaded
+                self.version = version
+            elif self.version is not None and self.version < version:
+                # Another change came in between: reload on the next refresh
+                self.version = None
+
+
+tag_cache = TagVocabularyCache()
+
+
+def vocabulary_changed(sender, **kwargs):
+    """post_save/post_delete receiver for Tag, TagType and ImportMapping."""
+    bump_version()
+    tag_cache.invalidate()
+    # A reload during the transaction may have seen rows that get rolled back
+    transaction.on_commit(tag_cache.invalidate, using=kwargs.get('using'))
+
+
+def reference_tags_changed(sender, action, **kwargs):
+    """m2m_changed receiver for Tag.reference_tags."""
+    if action.startswith('post_'):
+        vocabulary_changed(sender, **kwargs)
+
+
+def connect_vocabulary_signals():
+    for model in (Tag, TagType, ImportMapping):
+        signals.post_save.connect(
+            vocabulary_changed, sender=model, dispatch_uid=f'vocabulary_saved:{model._meta.label}'
+        )
+        signals.post_delete.connect(
+            vocabulary_changed, sender=model, dispatch_uid=f'vocabulary_deleted:{model._meta.label}'
+        )
+    signals.m2m_changed.connect(
+        reference_tags_changed, sender=Tag.reference_tags.through, dispatch_uid='vocabulary_reference_tags'
+    )
@@ -0,0 +1,80 @@
+"""
+Row mapping for imports, compiled from the ImportMapping table.
+
+Each active mapping becomes a small transform (split on the delimiter, clean
+up whitespace, normalize case) chosen once when the mapper is built, so
+mapping a row is a loop over precompiled functions. The tag vocabulary cache
+builds the mapper whenever it reloads (see tags.cache), and both the import
+API and the import_collection command use it.
+"""
+from .models import ImportMapping
+
+NORMALIZERS = {
+    ImportMapping.NORMALIZE_NONE: None,
+    ImportMapping.NORMALIZE_LOWER: str.lower,
+    ImportMapping.NORMALIZE_UPPER: str.upper,
+    ImportMapping.NORMALIZE_TITLE: str.title,
+}
+
+
+def compile_transform(delimiter, normalization, collapse_whitespace):
+    """
+    Build a function turning a raw column value into a list of tag names.
+
+    A string is split on `delimiter` (if any); a list is taken as already
+    split. Every name is trimmed, optionally whitespace-collapsed and
+    case-normalized; empty names and repeats are dropped.
+    """
+    if collapse_whitespace:
+        def tidy(value):
+            return ' '.join(value.split())
+    else:
+        tidy = str.strip
+    normalize = NORMALIZERS[normalization]
+    clean = (lambda value: normalize(tidy(value))) if normalize else tidy
+
+    def transform(value):
+        if isinstance(value, str):
+            parts = value.split(delimiter) if delimiter else [value]
+        else:
+            parts = [str(part) for part in value]
+        names = []
+        for part in parts:
+            name = clean(part)
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    return transform
+
+
+class RowMapper:
+    """Turns an import row ({column: value}) into tag names per tag type."""
+
+    def __init__(self, mappings):
+        self.tag_types = {}
+        self.columns = []
+        self._rules = []
+        for mapping in mappings:
+            self.tag_types[mapping.tag_type.name] = mapping.tag_type
+            self.columns.append(mapping.column)
+            self._rules.append((
+                mapping.column,
+                mapping.tag_type.name,
+                compile_transform(mapping.delimiter, mapping.normalization, mapping.collapse_whitespace),
+            ))
+
+    def map(self, row):
+        """Tag names by tag type name for `row`; unmapped columns are ignored."""
+        names_by_type = {}
+        for column, tag_type_name, transform in self._rules:
+            value = row.get(column)
+            if not value:
+                continue
+            names = names_by_type.setdefault(tag_type_name, [])
+            names.extend(name for name in transform(value) if name not in names)
+        return {tag_type_name: names for tag_type_name, names in names_by_type.items() if names}
+
+
+def load_row_mapper():
+    return RowMapper(ImportMapping.objects.filter(is_active=True).select_related('tag_type'))
@@ -0,0 +1,25 @@
+"""
+Django management command to check Tag.usage_count against the entry-tag
+links and fix any tag whose count has drifted.
+
+The counts are kept up to date by signals; run this periodically (e.g. from
+cron) to repair changes that bypass them, such as raw SQL or restores.
+
+Usage:
+    python manage.py reconcile_tag_usage
+"""
+
+from django.core.management.base import BaseCommand
+
+from tags.usage import reconcile_usage
+
+
+class Command(BaseCommand):
+    help = 'Recount tag usage counts that no longer match the entries using each tag'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_usage()
+        if fixed:
+            self.stdout.write(self.style.WARNING(f'Fixed the usage count of {fixed} tag(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All tag usage counts are correct.'))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0007_remove_tag_reference_tag_tag_reference_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VocabularyVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Vocabulary Version',
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# The columns imports used to hard-code, with the tag types they created
+DEFAULT_MAPPINGS = [
+    ('Publisher', '#3498db', 10, ''),
+    ('Faction Tag', '#e74c3c', 20, ''),
+    ('Army Role', '#2ecc71', 30, ''),
+    ('GW Alternative', '#f39c12', 40, ';'),
+]
+
+
+def create_default_mappings(apps, schema_editor):
+    TagType = apps.get_model('tags', 'TagType')
+    ImportMapping = apps.get_model('tags', 'ImportMapping')
+    for name, color, sort_order, delimiter in DEFAULT_MAPPINGS:
+        tag_type, _ = TagType.objects.get_or_create(
+            name=name,
+            defaults={
+                'description': f'{name} tags',
+                'color': color,
+                'sort_order': sort_order,
+                'is_active': True,
+                'show_in_gallery': True,
+                'set_at_upload': True
+            }
+        )
+        ImportMapping.objects.get_or_create(
+            column=name,
+            defaults={'tag_type': tag_type, 'delimiter': delimiter, 'sort_order': sort_order}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tags', '0008_vocabulary_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportMapping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column', models.CharField(help_text='CSV column header / API tag key', max_length=100, unique=True)),
+                ('delimiter', models.CharField(blank=True, help_text='Split the value into several tags on this text (leave blank for one tag per value)', max_length=5)),
+                ('normalization', models.CharField(choices=[('none', 'Keep as written'), ('lower', 'lower case'), ('upper', 'UPPER CASE'), ('title', 'Title Case')], default='none', max_length=10)),
+                ('collapse_whitespace', models.BooleanField(default=True, help_text='Collapse inner runs of whitespace to one space (values are always trimmed)')),
+                ('sort_order', models.PositiveIntegerField(default=0, help_text='Lower numbers are applied first')),
+                ('is_active', models.BooleanField(default=True, help_text='Inactive mappings are ignored by imports')),
+                ('tag_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_mappings', to='tags.tagtype')),
+            ],
+            options={
+                'verbose_name': 'Import Mapping',
+                'verbose_name_plural': 'Import Mappings',
+                'ordering': ['sort_order', 'column'],
+            },
+        ),
+        migrations.RunPython(create_default_mappings, migrations.RunPython.noop),
+    ]
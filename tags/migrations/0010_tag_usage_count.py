@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_usage(apps, schema_editor):
+    Tag = apps.get_model('tags', 'Tag')
+    EntryTag = apps.get_model('image_upload', 'Entry').tags.through
+    counts = (
+        EntryTag.objects.filter(tag_id=OuterRef('pk')).order_by()
+        .values('tag_id').annotate(count=Count('*')).values('count')
+    )
+    Tag.objects.update(usage_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image_upload', '0011_entry_upload_order_index'),
+        ('tags', '0009_import_mapping'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='usage_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_usage, migrations.RunPython.noop),
+    ]
@@ -36,6 +36,8 @@ class Tag(models.Model):
         related_name='referenced_by',
         help_text="Optional: Reference tags from the types specified by this tag's TagType"
     )
+    # Number of entries using the tag, maintained by tags.usage
+    usage_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -71,3 +73,51 @@ class Tag(models.Model):
         
         # Return black for light colors, white for dark colors
         return 'black' if brightness > 128 else 'white'
+
+
+class ImportMapping(models.Model):
+    """Maps an import column (CSV header or API tag key) to the tag type its values become."""
+    NORMALIZE_NONE = 'none'
+    NORMALIZE_LOWER = 'lower'
+    NORMALIZE_UPPER = 'upper'
+    NORMALIZE_TITLE = 'title'
+    NORMALIZATION_CHOICES = [
+        (NORMALIZE_NONE, 'Keep as written'),
+        (NORMALIZE_LOWER, 'lower case'),
+        (NORMALIZE_UPPER, 'UPPER CASE'),
+        (NORMALIZE_TITLE, 'Title Case'),
+    ]
+
+    column = models.CharField(max_length=100, unique=True, help_text="CSV column header / API tag key")
+    tag_type = models.ForeignKey(TagType, on_delete=models.CASCADE, related_name='import_mappings')
+    delimiter = models.CharField(
+        max_length=5,
+        blank=True,
+        help_text="Split the value into several tags on this text (leave blank for one tag per value)"
+    )
+    normalization = models.CharField(max_length=10, choices=NORMALIZATION_CHOICES, default=NORMALIZE_NONE)
+    collapse_whitespace = models.BooleanField(default=True, help_text="Collapse inner runs of whitespace to one space (values are always trimmed)")
+    sort_order = models.PositiveIntegerField(default=0, help_text="Lower numbers are applied first")
+    is_active = models.BooleanField(default=True, help_text="Inactive mappings are ignored by imports")
+
+    class Meta:
+        ordering = ['sort_order', 'column']
+        verbose_name = "Import Mapping"
+        verbose_name_plural = "Import Mappings"
+
+    def __str__(self):
+        return f"{self.column} → {self.tag_type}"
+
+
+class VocabularyVersion(models.Model):
+    """
+    Single-row counter bumped whenever tags, tag types or import mappings change.
+    Lets per-process tag caches and HTTP validators detect changes cheaply.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Vocabulary Version"
+
+    def __str__(self):
+        return f"Tag vocabulary v{self.version}"
@@ -1,3 +1,261 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from image_upload.models import Entry
+
+from .autocomplete import fold, tag_index
+from .cache import bump_version, current_version, tag_cache
+from .usage import reconcile_usage
+from .models import ImportMapping, Tag, TagType
+
+
+class TagVocabularyCacheTests(TestCase):
+    def setUp(self):
+        # The cache lives for the whole process; don't reuse what other tests loaded
+        tag_cache.invalidate()
+        self.addCleanup(tag_cache.invalidate)
+        # Created with the default import mappings
+        self.publisher = TagType.objects.get(name='Publisher')
+        self.faction = TagType.objects.get(name='Faction Tag')
+        self.forge = Tag.objects.create(name='Forge', tag_type=self.publisher)
+
+    def test_resolve_tags_creates_missing_tags_in_bulk(self):
+        tag_types = {'Publisher': self.publisher, 'Faction Tag': self.faction}
+        tag_cache.refresh()
+        version = current_version()
+
+        # Existing tags come from the cache: insert, read back, version bump and read
+        with self.assertNumQueries(4):
+            tags = tag_cache.resolve_tags(
+                {'Publisher': ['Forge'], 'Faction Tag': ['Chaos', 'Order', 'Chaos']},
+                tag_types,
+            )
+        self.assertEqual(set(tags), {'Forge', 'Chaos', 'Order'})
+        self.assertEqual(tags['Forge'], self.forge)
+        self.assertEqual(Tag.objects.get(name='Order').tag_type, self.faction)
+        self.assertEqual(current_version(), version + 1)
+
+        # Nothing missing, nothing queried
+        with self.assertNumQueries(0):
+            tag_cache.resolve_tags({'Publisher': ['Forge']}, tag_types)
+
+    def test_created_tags_keep_the_cache_in_step_with_the_database(self):
+        tag_types = {'Faction Tag': self.faction}
+        tag_cache.refresh()
+        with self.captureOnCommitCallbacks(execute=True):
+            tag_cache.resolve_tags({'Faction Tag': ['Chaos']}, tag_types)
+        # Only our own change happened: the cache is current without a reload
+        self.assertEqual(tag_cache.version, current_version())
+        self.assertIn('Chaos', tag_cache.tags)
+
+        # Another process changed the vocabulary before our tags were created
+        bump_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            tag_cache.resolve_tags({'Faction Tag': ['Order']}, tag_types)
+        self.assertIsNone(tag_cache.version)
+
+        # Reloaded by another thread before the commit callback ran
+        tag_cache.refresh()
+        with self.captureOnCommitCallbacks(execute=True):
+            tag_cache.resolve_tags({'Faction Tag': ['Death']}, tag_types)
+            tag_cache.refresh()
+        self.assertEqual(tag_cache.version, current_version())
+
+    def test_vocabulary_changes_invalidate_the_cache(self):
+        tag_cache.refresh()
+        with self.assertNumQueries(1):
+            tag_cache.refresh()
+
+        renamed = Tag.objects.create(name='Chaos', tag_type=self.faction)
+        tag_cache.refresh()
+        self.assertIn('Chaos', tag_cache.tags)
+
+        renamed.name = 'Disorder'
+        renamed.save()
+        tag_cache.refresh()
+        self.assertNotIn('Chaos', tag_cache.tags)
+        self.assertEqual(tag_cache.tags['Disorder'].tag_type, self.faction)
+
+        self.faction.delete()
+        tag_cache.refresh()
+        self.assertNotIn('Faction Tag', tag_cache.tag_types)
+        self.assertNotIn('Disorder', tag_cache.tags)
+
+
+class RowMapperTests(TestCase):
+    def setUp(self):
+        tag_cache.invalidate()
+        self.addCleanup(tag_cache.invalidate)
+
+    def test_default_mappings_match_the_original_import_columns(self):
+        tag_cache.refresh()
+        tags = tag_cache.row_mapper.map({
+            'Name': 'Dragon',
+            'Publisher': ' Forge ',
+            'Faction Tag': 'Chaos',
+            'Army Role': '',
+            'GW Alternative': 'Drake; Wyrm ;;Drake',
+        })
+        self.assertEqual(tags, {'Publisher': ['Forge'], 'Faction Tag': ['Chaos'], 'GW Alternative': ['Drake', 'Wyrm']})
+
+    def test_new_mappings_apply_without_code_changes(self):
+        tag_cache.refresh()
+        scale = TagType.objects.create(name='Scale')
+        ImportMapping.objects.create(
+            column='Scales', tag_type=scale, delimiter='|', normalization=ImportMapping.NORMALIZE_LOWER
+        )
+        ImportMapping.objects.filter(column='Army Role').update(is_active=False)
+        ImportMapping.objects.filter(column='Faction Tag').update(normalization=ImportMapping.NORMALIZE_TITLE)
+        # Queryset updates send no signals
+        tag_cache.invalidate()
+
+        tag_cache.refresh()
+        tags = tag_cache.row_mapper.map({
+            'Scales': '32MM |  75  mm',
+            'Army Role': 'Monster',
+            'Faction Tag': ['chaos   undivided'],
+        })
+        self.assertEqual(tags, {'Scale': ['32mm', '75 mm'], 'Faction Tag': ['Chaos Undivided']})
+        self.assertEqual(tag_cache.row_mapper.tag_types['Scale'], scale)
+
+
+class TagAutocompleteTests(TestCase):
+    def setUp(self):
+        tag_index.invalidate()
+        self.addCleanup(tag_index.invalidate)
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        self.url = reverse('tags:api_autocomplete')
+        self.faction = TagType.objects.get(name='Faction Tag')
+        self.dragon = Tag.objects.create(name='Dragon', tag_type=self.faction)
+        self.red_dragon = Tag.objects.create(name='Red Dragon')
+        self.draconic = Tag.objects.create(name='Draconic Élite', tag_type=self.faction)
+        for name in ('Wyrm', 'Drake'):
+            Entry.objects.create(name=name).tags.add(self.red_dragon)
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertTrue(response.json()['success'])
+        return [tag['name'] for tag in response.json()['tags']]
+
+    def test_words_match_by_prefix_most_used_first(self):
+        self.assertEqual(self.names(q='dra'), ['Red Dragon', 'Draconic Élite', 'Dragon'])
+        self.assertEqual(self.names(q='DRAGON'), ['Red Dragon', 'Dragon'])
+        self.assertEqual(self.names(q='red d'), ['Red Dragon'])
+        self.assertEqual(self.names(q='dra', tag_type=self.faction.id, limit=1), ['Draconic Élite'])
+
+    def test_accents_and_case_are_folded(self):
+        self.assertEqual(fold('Élite'), fold('elite'))
+        self.assertEqual(self.names(q='elite'), ['Draconic Élite'])
+        self.assertEqual(self.names(q='ÉLI'), ['Draconic Élite'])
+
+    def test_reference_filter(self):
+        self.dragon.reference_tags.add(self.red_dragon)
+        self.assertEqual(self.names(q='dra', reference=self.red_dragon.id), ['Dragon'])
+        self.assertEqual(self.names(q='dra', reference='none'), ['Red Dragon', 'Draconic Élite'])
+
+    def test_tag_changes_refresh_the_index(self):
+        self.names(q='dra')
+        # Only the version check
+        tag_index.refresh()
+        with self.assertNumQueries(1):
+            tag_index.refresh()
+
+        self.dragon.name = 'Wyvern'
+        self.dragon.save()
+        self.assertEqual(self.names(q='wyv'), ['Wyvern'])
+        self.assertNotIn('Dragon', self.names(q='dra'))
+
+    def test_rebuilds_replace_the_snapshot_whole(self):
+        tag_index.refresh()
+        before = tag_index.snapshot
+        Tag.objects.create(name='Dragonet')
+        tag_index.refresh()
+        # A lookup still holding the old snapshot sees consistent old data
+        self.assertIsNot(tag_index.snapshot, before)
+        self.assertEqual(len(before.keys), len(before.key_tag_ids))
+        self.assertNotIn('Dragonet', [tag['name'] for tag in before.tags.values()])
+        self.assertIn('Dragonet', self.names(q='dragone'))
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(self.url, {'tag_type': 'faction'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TagUsageCountTests(TestCase):
+    def setUp(self):
+        self.chaos = Tag.objects.create(name='Chaos')
+        self.order = Tag.objects.create(name='Order')
+        self.dragon = Entry.objects.create(name='Dragon')
+        self.knight = Entry.objects.create(name='Knight')
+
+    def assertUsage(self, chaos, order):
+        self.assertEqual(
+            [Tag.objects.get(pk=tag.pk).usage_count for tag in (self.chaos, self.order)],
+            [chaos, order],
+        )
+
+    def test_counts_follow_tag_links(self):
+        self.dragon.tags.add(self.chaos, self.order)
+        self.dragon.tags.add(self.chaos)
+        self.knight.tags.add(self.chaos)
+        self.assertUsage(2, 1)
+
+        # Removing a tag the entry doesn't have changes nothing
+        self.knight.tags.remove(self.chaos, self.order)
+        self.assertUsage(1, 1)
+
+        self.order.entry_set.add(self.knight)
+        self.assertUsage(1, 2)
+        self.dragon.tags.clear()
+        self.assertUsage(0, 1)
+        self.order.entry_set.clear()
+        self.assertUsage(0, 0)
+
+    def test_deleting_an_entry_releases_its_tags(self):
+        self.dragon.tags.add(self.chaos)
+        self.knight.tags.add(self.chaos, self.order)
+        self.knight.delete()
+        self.assertUsage(1, 0)
+        Entry.objects.all().delete()
+        self.assertUsage(0, 0)
+
+    def test_reconcile_fixes_drifted_counts(self):
+        self.dragon.tags.add(self.chaos)
+        Entry.tags.through.objects.create(entry=self.knight, tag=self.order)
+        Tag.objects.filter(pk=self.chaos.pk).update(usage_count=5)
+        self.assertEqual(reconcile_usage(), 2)
+        self.assertUsage(1, 1)
+        self.assertEqual(reconcile_usage(), 0)
+
+
+class AdminChangelistQueryTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='secret'))
+
+    def add_rows(self, count):
+        for _ in range(count):
+            number = TagType.objects.count()
+            tag_type = TagType.objects.create(name=f'Type {number}')
+            tag_type.reference_tagtypes.add(TagType.objects.first())
+            reference = Tag.objects.create(name=f'Reference {number}', tag_type=tag_type)
+            tag = Tag.objects.create(name=f'Tag {number}', tag_type=tag_type)
+            tag.reference_tags.add(reference)
+            Entry.objects.create(name=f'Entry {number}').tags.add(tag)
+
+    def changelist_queries(self):
+        counts = {}
+        for model in ('tag', 'tagtype'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(f'admin:tags_{model}_changelist'))
+            self.assertEqual(response.status_code, 200)
+            counts[model] = len(queries)
+        return counts
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_rows(2)
+        queries = self.changelist_queries()
+        self.add_rows(5)
+        self.assertEqual(self.changelist_queries(), queries)
@@ -14,6 +14,7 @@ urlpatterns = [
     path('tagtype/edit/<int:tagtype_id>/', views.edit_tagtype, name='edit_tagtype'),
     path('tagtype/delete/<int:tagtype_id>/', views.delete_tagtype, name='delete_tagtype'),
     # API endpoints
+    path('api/autocomplete/', views.autocomplete_tags, name='api_autocomplete'),
     path('api/reference-tags/<int:tagtype_id>/', views.get_reference_tags, name='api_reference_tags'),
     path('api/tagtype/update-order/', views.update_tagtype_order, name='update_tagtype_order'),
     path('api/tagtype/<int:tagtype_id>/toggle-gallery/', views.toggle_gallery_visibility, name='toggle_gallery_visibility'),
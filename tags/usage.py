@@ -0,0 +1,81 @@
+"""
+Maintenance of Tag.usage_count, the number of entries using each tag.
+
+Adding tags increments their counters with a single UPDATE. Removals and
+clears recount the affected tags from the link table instead, because
+remove() reports the ids it was given rather than the links it deleted.
+Deleting an entry drops its links without an m2m_changed signal, so its tags
+are noted before the delete and recounted after it. Code that links tags
+with bulk_create calls add_usage or recount_usage itself, and
+reconcile_usage (see the reconcile_tag_usage command) repairs any drift.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery, signals
+from django.db.models.functions import Coalesce
+
+from image_upload.models import Entry
+
+from .models import Tag
+
+EntryTag = Entry.tags.through
+
+
+def _counted_usage():
+    counts = (
+        EntryTag.objects.filter(tag_id=OuterRef('pk')).order_by()
+        .values('tag_id').annotate(count=Count('*')).values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def add_usage(tag_ids, count=1):
+    """Count `count` more entries for each tag in `tag_ids`."""
+    if tag_ids:
+        Tag.objects.filter(pk__in=tag_ids).update(usage_count=F('usage_count') + count)
+
+
+def recount_usage(tag_ids):
+    """Recount the tags in `tag_ids` from the link table, in one UPDATE."""
+    if tag_ids:
+        Tag.objects.filter(pk__in=tag_ids).update(usage_count=_counted_usage())
+
+
+def reconcile_usage():
+    """Fix every tag whose counter is wrong. Returns the number fixed."""
+    stale = Tag.objects.alias(counted=_counted_usage()).filter(~Q(usage_count=F('counted')))
+    tag_ids = list(stale.values_list('pk', flat=True))
+    recount_usage(tag_ids)
+    return len(tag_ids)
+
+
+def entry_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """m2m_changed receiver for Entry.tags."""
+    if reverse:
+        # instance is a Tag and pk_set holds entry ids
+        if action == 'post_add':
+            add_usage([instance.pk], len(pk_set))
+        elif action in ('post_remove', 'post_clear'):
+            recount_usage([instance.pk])
+    elif action == 'post_add':
+        add_usage(pk_set)
+    elif action == 'post_remove':
+        recount_usage(pk_set)
+    elif action == 'pre_clear':
+        instance._usage_tag_ids = list(instance.tags.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        recount_usage(instance.__dict__.pop('_usage_tag_ids', ()))
+
+
+def remember_entry_tags(sender, instance, **kwargs):
+    """pre_delete receiver for Entry: the tags to recount once it is gone."""
+    instance._usage_tag_ids = list(instance.tags.values_list('pk', flat=True))
+
+
+def entry_deleted(sender, instance, **kwargs):
+    """post_delete receiver for Entry."""
+    recount_usage(instance.__dict__.pop('_usage_tag_ids', ()))
+
+
+def connect_usage_signals():
+    signals.m2m_changed.connect(entry_tags_changed, sender=EntryTag, dispatch_uid='tag_usage_entry_tags')
+    signals.pre_delete.connect(remember_entry_tags, sender=Entry, dispatch_uid='tag_usage_entry_deleting')
+    signals.post_delete.connect(entry_deleted, sender=Entry, dispatch_uid='tag_usage_entry_deleted')
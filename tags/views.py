@@ -1,8 +1,11 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
+from .autocomplete import tag_index
+from .cache import bump_version
 from .models import Tag, TagType
 from .forms import TagForm, TagTypeForm
 import json
@@ -52,6 +55,11 @@ def tag_list(request):
         # Filter for tags with no reference tags
         tags = tags.filter(reference_tags__isnull=True)
     
+    # Most used first on request; the counts are kept on the tags (see tags.usage)
+    sort = request.GET.get('sort', '')
+    if sort == 'usage':
+        tags = tags.order_by('-usage_count', 'name')
+    
     return render(request, 'tags/list.html', {
         'tags': tags,
         'tag_types': tag_types,
@@ -59,13 +67,14 @@ def tag_list(request):
         'selected_tag_type_obj': selected_tag_type_obj,
         'reference_tags': reference_tags,
         'selected_reference_tag': reference_tag_filter,
+        'sort': sort,
         'active_tab': 'tags'
     })
 
 @staff_member_required
 def tagtype_list(request):
     """List all tag types - staff only"""
-    tagtypes = TagType.objects.all()
+    tagtypes = TagType.objects.annotate(tag_count=Count('tags'))
     return render(request, 'tags/list.html', {
         'tagtypes': tagtypes,
         'active_tab': 'tagtypes'
@@ -222,6 +231,27 @@ def get_reference_tags(request, tagtype_id):
         'reference_tagtypes': reference_data
     })
 
+@staff_member_required
+def autocomplete_tags(request):
+    """
+    API endpoint for tag typeahead: the most used tags with a word starting
+    with `q`, optionally limited to a tag type and a reference tag
+    (`reference=none` for tags without one)
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 100)
+        tag_type = request.GET.get('tag_type', '')
+        tag_type_id = int(tag_type) if tag_type else None
+        reference = request.GET.get('reference', '')
+        if reference and reference != 'none':
+            reference = int(reference)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid filter'}, status=400)
+
+    tag_index.refresh()
+    tags = tag_index.search(request.GET.get('q', ''), limit, tag_type_id, reference or None)
+    return JsonResponse({'success': True, 'tags': tags})
+
 @staff_member_required
 @require_POST
 def update_tagtype_order(request):
@@ -237,6 +267,8 @@ def update_tagtype_order(request):
             
             if tagtype_id and sort_order is not None:
                 TagType.objects.filter(id=tagtype_id).update(sort_order=sort_order)
+        # Queryset updates send no signals
+        bump_version()
         
         return JsonResponse({'success': True})
     except Exception as e: